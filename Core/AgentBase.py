@@ -29,8 +29,6 @@ class AgentBase:
         An attribute that keeps track of all the metrics logged during training
     lookBack: int
         The number of days to look back to make a decision
-    tickerData: list
-        The list of all tickers this agent was trained on
     allActions: list
         A list of all actions possible for agents
     actionSize: int
@@ -50,7 +48,6 @@ class AgentBase:
     def assignDataProcessor(self, dataProcessor):
         self.dataProcessor = dataProcessor
         self.lookBack = dataProcessor.lookBack
-        self.tickerData = self.dataProcessor.tickerData.copy()
 
     def initActions(self):
         """Method to initialize all the possible actions for agents
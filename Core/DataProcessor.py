@@ -1,7 +1,19 @@
 import pandas as pd
+import numpy as np
+import hashlib
+import inspect
+import json
 import math
 import os
-from DataStore.APIInterface import YFinance
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait
+from DataStore import APIInterface
+from DataStore.TickStore import TickStore
+from DataStore.Resampler import Resampler
+from DataStore.Panel import Panel
+from DataStore.FeatureCache import getFeatureCache
+from Core import Indicators
+from Core.Scalers import getScaler
 
 
 class DataProcessor():
@@ -24,42 +36,214 @@ class DataProcessor():
     apiSource: DataStore.APIInterface
         An object of the API interface. The source from where the data is to
         be download if not present already
+    loadFailures: dict
+        The error message of each ticker that could not be loaded
+    store: DataStore.TickStore
+        The store from which the ticker data is read
+    resampler: DataStore.Resampler
+        Builds the interval from finer stored bars if it isn't stored itself
+    featureCache: DataStore.FeatureCache
+        The on-disk cache of the computed features
+    dtypes: dict
+        The dtype policy, i.e. the dtype of the "price" features and of the
+        "volume" feature. All features are kept in these dtypes, from
+        getFeatures through to the datasets built for the model
+    scaler: str
+        The name of the scaler of the features, see Core.Scalers. None if
+        the features are not scaled
+    scalers: dict
+        The fitted scaler of each ticker
 
     """
-
-    def __init__(self, tickers, features, interval):
+    DEFAULT_DTYPES = {"price": "float32", "volume": "float32"}
+    # attributes that are not serialized, they are recreated on first use
+    TRANSIENT = ["tickerData", "apiSource", "store", "resampler",
+                 "featureCache"]
+    # where getTrainingData(cache=True) keeps the processed datasets
+    DATASET_CACHE = "DataStore/DatasetCache"
+
+    def __init__(self, tickers, features, interval, dtypes=None):
         self.tickers = tickers
         self.features = features
         self.interval = interval.upper()
+        self.dtypes = dict(self.DEFAULT_DTYPES)
+        if dtypes is not None:
+            self.dtypes.update(dtypes)
+        self.scaler = None
+        self.scalers = {}
         self.initFeatures()
-        self.apiSource = YFinance()
+        self.apiSource = APIInterface.getSource()
+        self.store = TickStore()
+        self.resampler = Resampler(self.store)
+        self.featureCache = getFeatureCache()
         self.loadTickerData()
 
+    def __getstate__(self):
+        """Returns the state to be serialized
+
+        Only the configuration of the processor is kept. The ticker data
+        and the store and API clients are left out and recreated when they
+        are first used after loading, see __getattr__.
+        """
+        state = self.__dict__.copy()
+        for name in self.TRANSIENT:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        """Restores a serialized processor
+
+        This also accepts processors saved before __getstate__ existed,
+        whose stale ticker data and clients are dropped as well.
+        """
+        state = dict(state)
+        for name in self.TRANSIENT:
+            state.pop(name, None)
+        state.setdefault("dtypes", dict(self.DEFAULT_DTYPES))
+        state.setdefault("loadFailures", {})
+        state.setdefault("scaler", None)
+        state.setdefault("scalers", {})
+        self.__dict__.update(state)
+
+    def __getattr__(self, name):
+        """Lazily recreates the attributes left out when serializing
+
+        This is only called for attributes that are missing, so the ticker
+        data of a loaded processor is read from the store the first time it
+        is used.
+        """
+        if name not in self.TRANSIENT or "tickers" not in self.__dict__:
+            message = "'{}' object has no attribute '{}'"
+            raise AttributeError(message.format(self.__class__.__name__,
+                                                name))
+        if name == "apiSource":
+            self.apiSource = APIInterface.getSource()
+        elif name == "store":
+            self.store = TickStore()
+        elif name == "resampler":
+            self.resampler = Resampler(self.store)
+        elif name == "featureCache":
+            self.featureCache = getFeatureCache()
+        elif name == "tickerData":
+            self.loadTickerData()
+        return self.__dict__[name]
+
     def initFeatures(self):
-        # TODO: Increase number of features
         self.OHLCV = ["open", "high", "low", "close", "volume"]
-        self.additionalFeatures = []
+        # the indicators, which take their parameters after an underscore,
+        # for example sma_50. See Core.Indicators
+        self.additionalFeatures = list(Indicators.indicators.keys())
         self.allFeatures = []
         self.allFeatures.extend(self.OHLCV)
         self.allFeatures.extend(self.additionalFeatures)
 
-    def loadTickerData(self):
+    def loadTickerData(self, maxWorkers=8, block=True):
         """Method to load the ticker data
 
         Loads all the tickers specified in self.tickers, and creates a
-        class variable self.tickerData that contains all the ticker data
+        class variable self.tickerData that contains all the ticker data.
+        If a ticker isn't stored at self.interval but is stored at a finer
+        interval, it is resampled instead of being downloaded.
+
+        The tickers are read, downloaded if missing, and have their features
+        computed by a pool of workers. A failure for one ticker does not
+        stop the others, it is collected in self.loadFailures instead.
+        self.tickerData and self.loadFailures are replaced when the loading
+        finishes, see TickerLoadHandle.result(), so until then they keep the
+        data of the previous call.
+
+        Parameters
+        ----------
+        maxWorkers: int, optional
+            The maximum number of tickers that are loaded concurrently
+        block: bool, optional
+            Whether to wait for all the tickers to be loaded. If False, the
+            method returns as soon as the loading has started
+
+        Returns
+        -------
+        handle: TickerLoadHandle
+            The handle of the loading, which can be waited on
         """
-        self.tickerData = {}
-        for ticker in self.tickers:
-            path = "DataStore/StockData/{}/{}.csv".format(self.interval,
-                                                          ticker)
-            if not os.path.isfile(path):
-                self.downloadData(ticker)
-            data = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+        self.__dict__.setdefault("tickerData", {})
+        self.__dict__.setdefault("loadFailures", {})
+        handle = TickerLoadHandle(self, maxWorkers)
+        if block:
+            handle.result()
+        return handle
+
+    def loadTicker(self, ticker):
+        """Method to load the features of a single ticker
+
+        The features are taken from the feature cache when they were
+        already computed from the same data, or extended when only new bars
+        were added since. The first getWarmUp() bars are left out, as their
+        features are NaN or still depend on where the data starts.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The features of the ticker
+        """
+        if not self.resampler.canRead(ticker, self.interval):
+            self.downloadData(ticker)
+        data = self.resampler.read(ticker, self.interval)
+        version = self.resampler.getVersion(ticker, self.interval)
+        features = self.featureCache.get(ticker, self.interval,
+                                         self.getFeatureSpec(), version,
+                                         data, self.getFeatures,
+                                         self.getWarmUp())
+        return features.iloc[self.getWarmUp():]
+
+    def getFeatureSpec(self):
+        """Returns everything that decides how the features are computed
+
+        This identifies the features of this processor in the feature
+        cache, so a child class whose getFeatures depends on other
+        attributes should add them.
+
+        Returns
+        -------
+        spec: dict
+            The JSON serializable feature specification
+        """
+        processor = "{}.{}".format(self.__class__.__module__,
+                                   self.__class__.__name__)
+        return {"processor": processor, "features": self.features,
+                "dtypes": self.dtypes}
+
+    def getConfig(self):
+        """Returns the configuration that decides the processed data
 
-            data = data.sort_index(ascending=True)
-            data = self.getFeatures(data)
-            self.tickerData[ticker] = data
+        This is the class of the processor and the value of each parameter
+        of its constructor, like lookBack and forecast, except the tickers.
+        Attributes that change while the processor is used, like the
+        fitted scalers, are left out so the configuration stays the same.
+
+        Returns
+        -------
+        config: dict
+            The JSON serializable configuration
+        """
+        names = set()
+        for cls in type(self).__mro__:
+            if "__init__" in cls.__dict__:
+                names.update(inspect.signature(cls.__init__).parameters)
+        names -= {"self", "tickers"}
+        config = {"processor": self.getFeatureSpec()["processor"]}
+        for name in sorted(names):
+            if name not in self.__dict__:
+                continue
+            try:
+                config[name] = json.loads(json.dumps(self.__dict__[name]))
+            except (TypeError, ValueError):
+                continue
+        return config
 
     def downloadData(self, ticker):
         if "D" in self.interval:
@@ -82,22 +266,292 @@ class DataProcessor():
 
         This method calculates/retrieves the features mentioned in
         self.features and adds their respective columns in the pandas
-        DataFrame.
+        DataFrame. Each feature is cast to its dtype in the dtype policy.
+
+        All the indicator features are computed in one pass over the data,
+        which shares the intermediate results between them.
 
         Returns:
         data: pd.DataFrame
             The dataframe containing all the specified features
         """
         newDF = pd.DataFrame(index=data.index)
+        engine = Indicators.FeatureEngine(data)
         for feature in self.features:
-            if feature.lower() not in self.allFeatures:
-                raise Exception("{} feature is not available".format(feature))
             if feature.lower() in self.OHLCV:
-                newDF[feature] = data[self.getColumnName(data, feature)]
-            # TODO: Implement ways to get other features using ta-lib
+                values = data[self.getColumnName(data, feature)].values
+            elif Indicators.isIndicator(feature):
+                values = engine.compute(feature)
+            else:
+                raise Exception("{} feature is not available".format(feature))
+            newDF[feature] = values.astype(self.getDType(feature),
+                                           copy=False)
 
         return newDF
 
+    def getDType(self, feature):
+        """Returns the dtype of a feature under the dtype policy
+
+        Parameters
+        ----------
+        feature: str
+            The name of the feature
+
+        Returns
+        -------
+        dtype: numpy.dtype
+            The dtype the feature is kept in
+        """
+        if feature.lower() == "volume":
+            return np.dtype(self.dtypes["volume"])
+        return np.dtype(self.dtypes["price"])
+
+    def getMemoryReport(self):
+        """Returns the memory used by the loaded ticker data
+
+        The memory is compared against keeping every feature as float64,
+        to show how much the dtype policy saves.
+
+        Returns
+        -------
+        report: dict
+            The bytes used, the bytes float64 would use, the bytes saved
+            and the fraction saved
+        """
+        used = 0
+        wide = 0
+        for data in self.tickerData.values():
+            used += int(data.memory_usage(index=True).sum())
+            wide += int(data.index.nbytes) + 8 * data.size
+        saved = wide - used
+        return {"bytes": used, "float64Bytes": wide, "savedBytes": saved,
+                "savedFraction": saved / wide if wide else 0.0}
+
+    def getWarmUp(self):
+        """Returns the number of bars needed before the first valid feature
+
+        Some features, like moving averages, need a number of earlier bars
+        before they can be computed. Reading this many extra bars is enough
+        to compute the features for the latest bars.
+
+        Returns
+        -------
+        warmUp: int
+            The number of extra bars needed
+        """
+        return max([Indicators.getWarmUp(feature)
+                    for feature in self.features] + [0])
+
+    def getLatestFeatures(self, ticker, numRows):
+        """Method to get the features of only the latest bars of a ticker
+
+        Only the last numRows bars plus the warm-up bars are read and the
+        features are computed over them alone, so the cost does not depend
+        on the length of the history.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        numRows: int
+            The number of latest bars needed
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The features of the last numRows bars
+        """
+        data = self.resampler.readTail(ticker, self.interval,
+                                       numRows + self.getWarmUp())
+        return self.getFeatures(data)[-numRows:]
+
+    def getPanel(self, start=None, end=None):
+        """Returns the features of all the tickers as an aligned panel
+
+        Parameters
+        ----------
+        start: str or pandas.Timestamp, optional
+            The first date to include
+        end: str or pandas.Timestamp, optional
+            The last date to include
+
+        Returns
+        -------
+        panel: DataStore.Panel
+            The (ticker, time, feature) panel of self.tickerData on a shared
+            calendar
+        """
+        dtype = np.result_type(*[self.getDType(feature)
+                                 for feature in self.features])
+        panel = Panel.fromFrames(self.tickerData, self.features, dtype)
+        if start is not None or end is not None:
+            panel = panel.select(start=start, end=end)
+        return panel
+
+    def getPanelTicker(self, data, context):
+        """Method to get the dataframe of a ticker if data is a panel
+
+        This lets inputProcessor be given either the dataframe of a ticker
+        or a DataStore.Panel, in which case the bars of context["ticker"]
+        (or of the only ticker of the panel) are used.
+
+        Parameters
+        ----------
+        data: pandas.DataFrame or DataStore.Panel
+            The data given to inputProcessor
+        context: dict
+            The context given to inputProcessor
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The bars of the ticker
+        """
+        if not isinstance(data, Panel):
+            return data
+        if context and context.get("ticker") is not None:
+            ticker = context["ticker"]
+        elif len(data.tickers) == 1:
+            ticker = data.tickers[0]
+        else:
+            raise Exception("context must specify the ticker of the panel")
+        return data.getTicker(ticker)
+
+    def getTickerValues(self, data, context, features=None):
+        """Method to get the values of a ticker as a numpy array
+
+        Like getPanelTicker, but no dataframe is built. For a panel, the
+        values of the ticker are a view of the panel, unless the ticker is
+        missing some of the bars of the calendar, in which case only the
+        bars it has are copied out. The leading rows in which a feature is
+        still NaN, like the warm-up of an indicator, are left out.
+
+        Parameters
+        ----------
+        data: pandas.DataFrame or DataStore.Panel
+            The data given to inputProcessor
+        context: dict
+            The context given to inputProcessor
+        features: list, optional
+            The features to get. If None, every feature is returned
+
+        Returns
+        -------
+        values: numpy.ndarray
+            The (time, feature) values of the ticker
+        """
+        if not isinstance(data, Panel):
+            if features is not None:
+                data = data[[self.getColumnName(data, feature)
+                             for feature in features]]
+            return self.dropLeadingNaN(data.values)
+        if context and context.get("ticker") is not None:
+            ticker = context["ticker"]
+        elif len(data.tickers) == 1:
+            ticker = data.tickers[0]
+        else:
+            raise Exception("context must specify the ticker of the panel")
+        values, mask = data.getTickerValues(ticker, features)
+        if not mask.all():
+            values = values[mask]
+        return self.dropLeadingNaN(values)
+
+    def dropLeadingNaN(self, values):
+        """Returns values without its leading rows that contain a NaN
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The (time, feature) values
+
+        Returns
+        -------
+        values: numpy.ndarray
+            A view of values from the first row without a NaN
+        """
+        if values.dtype.kind != "f" or len(values) == 0:
+            return values
+        missing = np.isnan(values.reshape(len(values), -1)).any(axis=1)
+        if missing.all():
+            return values[len(values):]
+        return values[np.argmin(missing):]
+
+    def scaleData(self, data, context):
+        """Method to scale the features of a ticker with its scaler
+
+        The scaler of a ticker is fitted on the ticker data the first time
+        it is needed, and kept with the processor after that.
+
+        Parameters
+        ----------
+        data: pandas.DataFrame or numpy.ndarray
+            The features of the ticker
+        context: dict
+            The context given to inputProcessor, with the ticker
+
+        Returns
+        -------
+        data: pandas.DataFrame or numpy.ndarray
+            The scaled features, of the same type as data, or data itself
+            if there is no scaler
+        """
+        if self.scaler is None:
+            return data
+        scaler = self.getTickerScaler(context["ticker"], data)
+        if isinstance(data, np.ndarray):
+            return scaler.transform(data)
+        return pd.DataFrame(scaler.transform(data.values), index=data.index,
+                            columns=data.columns)
+
+    def unscaleData(self, values, context, column, rows=None):
+        """Method to undo the scaling of predictions of a feature
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The scaled predictions
+        context: dict
+            The context given to outputProcessor, with the ticker
+        column: int
+            The position of the predicted feature
+        rows: numpy.ndarray, optional
+            The row of the data given to inputProcessor at which each row of
+            predictions was made, see Core.Scalers.Scaler.inverse()
+
+        Returns
+        -------
+        values: numpy.ndarray
+            The predictions in the units of the feature
+        """
+        if self.scaler is None:
+            return values
+        scaler = self.getTickerScaler(context["ticker"])
+        return scaler.inverse(values, column, rows)
+
+    def getTickerScaler(self, ticker, data=None):
+        """Returns the scaler of a ticker, fitting it on first use
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        data: pandas.DataFrame or numpy.ndarray, optional
+            The features to fit on if the ticker has no ticker data
+
+        Returns
+        -------
+        scaler: Core.Scalers.Scaler
+            The fitted scaler
+        """
+        if ticker not in self.scalers:
+            if ticker in self.tickerData:
+                data = self.tickerData[ticker]
+            if data is None:
+                raise Exception("No data to fit the scaler of " + ticker)
+            self.scalers[ticker] = getScaler(self.scaler).fit(
+                np.asarray(getattr(data, "values", data)))
+        return self.scalers[ticker]
+
     def getColumnName(self, data, feature):
         """Method to get proper column name from dataframe
 
@@ -132,8 +586,10 @@ class DataProcessor():
 
         Parameters
         ----------
-        data: dict
-            The dict containing raw ticker data
+        data: pandas.DataFrame or DataStore.Panel
+            The raw ticker data. If this is a panel, use getTickerValues
+            or getPanelTicker to get the values or the dataframe of
+            context["ticker"]
         context: dict
             A dictionary containing information about the usage of this
             function.
@@ -180,19 +636,38 @@ class DataProcessor():
         raise NotImplementedError("Must override outputProcessor")
 
     def getTrainingData(self, validationSplit=0.7, shuffle=True,
-                        batchSize=64):
+                        batchSize=64, weights=None, shuffleBuffer=10000,
+                        maxWorkers=8, seed=None, cache=False):
         """Method specifying how to prepare training data
 
+        The windows of each ticker are built in parallel and the tickers are
+        then interleaved into a single dataset. Without weights the tickers
+        take turns, one window at a time, until all of them run out. With
+        weights each window is drawn from a ticker at random with the given
+        probabilities, and tickers that run out are dropped from the draw.
+
         Parameters
         ----------
         validationSplit: float
             The float indicating how much of the data should be used for
             training. The other portion is used for validation.
         shuffle: boolean
-            A boolean indicating whether the data should be shuffled before
-            training
+            A boolean indicating whether the training data should be shuffled
         batchSize: int
             A number indicating the batchsize of the data for training
+        weights: dict, optional
+            The relative sampling weight of each ticker in the training data.
+            Tickers that are left out or have a weight of 0 are not trained on
+        shuffleBuffer: int, optional
+            The number of windows held in the shuffle buffer. A larger buffer
+            shuffles better at the cost of memory
+        maxWorkers: int, optional
+            The number of tickers whose windows are built at the same time
+        seed: int, optional
+            The seed of the sampling and shuffling
+        cache: bool, optional
+            Whether the processed windows of each ticker are kept on disk.
+            See getTickerDatasets()
 
         Returns
         -------
@@ -201,30 +676,285 @@ class DataProcessor():
         validDS: tf.data.Dataset
             The target for the model
         """
-
-        context = {}
-        context["isTrain"] = True
-        lenTrain = 0
-        lenValid = 0
-        trainDS = None
-        validDS = None
-        for i, ticker in enumerate(self.tickers):
-            context["ticker"] = ticker
-            data = self.tickerData[ticker].copy()
-            splitIndex = math.floor(validationSplit * len(data))
-            lenTrain += len(data[:splitIndex])
-            lenValid += len(data[splitIndex:])
-            if i == 0:
-                trainDS = self.inputProcessor(data[:splitIndex], context)
-                validDS = self.inputProcessor(data[splitIndex:], context)
-            else:
-                tmpTrain = self.inputProcessor(data[:splitIndex], context)
-                tmpValid = self.inputProcessor(data[splitIndex:], context)
-                trainDS.concatenate(tmpTrain)
-                validDS.concatenate(tmpValid)
+        from tensorflow import data as DS
+
+        tickers = [ticker for ticker in self.tickers
+                   if ticker in self.tickerData]
+        if len(tickers) == 0:
+            raise Exception("No ticker data to train on")
+        # the scalers are fitted again on the data being trained on
+        self.scalers = {}
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            datasets = list(executor.map(
+                lambda ticker: self.getTickerDatasets(ticker,
+                                                      validationSplit,
+                                                      cache),
+                tickers))
+        trainSets = [train for train, _ in datasets]
+        validSets = [valid for _, valid in datasets]
+        tickerWeights = None
+        if weights is not None:
+            tickerWeights = [float(weights.get(ticker, 0))
+                             for ticker in tickers]
+            trainSets = [train for train, weight
+                         in zip(trainSets, tickerWeights) if weight > 0]
+            tickerWeights = [weight for weight in tickerWeights if weight > 0]
+            if len(trainSets) == 0:
+                raise Exception("Every ticker has a weight of 0")
+        trainDS = self.interleaveDatasets(trainSets, tickerWeights, seed)
+        validDS = self.interleaveDatasets(validSets)
         if shuffle:
-            trainDS.shuffle(lenTrain)
-            validDS.shuffle(lenValid)
-        trainDS = trainDS.batch(batchSize).prefetch(1)
-        validDS = validDS.batch(batchSize).prefetch(1)
+            trainDS = trainDS.shuffle(shuffleBuffer, seed=seed,
+                                      reshuffle_each_iteration=True)
+        trainDS = trainDS.batch(batchSize).prefetch(DS.AUTOTUNE)
+        validDS = validDS.batch(batchSize).prefetch(DS.AUTOTUNE)
         return trainDS, validDS
+
+    def getTickerDatasets(self, ticker, validationSplit, cache=False):
+        """Returns the training and validation windows of a ticker
+
+        With cache, the windows are saved under DATASET_CACHE the first
+        time they are built. Later calls, from this or any other process,
+        load them from there without calling inputProcessor() again, as
+        long as the configuration of the processor and the ticker data are
+        the same. Saved windows of older ticker data are removed. Processes
+        building the same windows at once don't overwrite each other, see
+        saveTickerDatasets().
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        validationSplit: float
+            The portion of the data used for training
+        cache: bool, optional
+            Whether the windows are kept on disk
+
+        Returns
+        -------
+        trainDS: tf.data.Dataset
+            The unbatched training windows
+        validDS: tf.data.Dataset
+            The unbatched validation windows
+        """
+        from tensorflow import data as DS
+
+        # a cache hit skips inputProcessor, which would fit the scaler
+        if self.scaler is not None:
+            self.getTickerScaler(ticker)
+        if cache:
+            folder = self.getDatasetCachePath(ticker, validationSplit)
+            paths = [os.path.join(folder, split)
+                     for split in ["train", "valid"]]
+            if all(os.path.isdir(path) for path in paths):
+                return DS.Dataset.load(paths[0]), DS.Dataset.load(paths[1])
+        datasets = []
+        for processed in self.getTickerWindows(ticker, validationSplit):
+            if not isinstance(processed, DS.Dataset):
+                processed = DS.Dataset.from_tensor_slices(processed)
+            datasets.append(processed)
+        if cache:
+            self.saveTickerDatasets(folder, datasets)
+            datasets = [DS.Dataset.load(path) for path in paths]
+        return datasets[0], datasets[1]
+
+    def saveTickerDatasets(self, folder, datasets):
+        """Method to save the windows of a ticker to the dataset cache
+
+        The windows are saved to a temporary folder of this process, which
+        is then renamed to folder in one step. If another process saved the
+        same windows first, its folder is kept. The saved windows of older
+        ticker data are removed afterwards.
+
+        Parameters
+        ----------
+        folder: str
+            The folder of the windows, see getDatasetCachePath()
+        datasets: list
+            The training and validation tf.data.Dataset
+        """
+        tmpFolder = "{}.{}.tmp".format(folder, os.getpid())
+        if os.path.isdir(tmpFolder):
+            shutil.rmtree(tmpFolder)
+        os.makedirs(tmpFolder)
+        for dataset, split in zip(datasets, ["train", "valid"]):
+            dataset.save(os.path.join(tmpFolder, split))
+        try:
+            os.rename(tmpFolder, folder)
+        except OSError:
+            # the windows were saved by another process in the meantime
+            shutil.rmtree(tmpFolder, ignore_errors=True)
+        tickerFolder = os.path.dirname(folder)
+        for name in os.listdir(tickerFolder):
+            path = os.path.join(tickerFolder, name)
+            if path != folder and not name.endswith(".tmp"):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def getDatasetCachePath(self, ticker, validationSplit):
+        """Returns the folder of the cached windows of a ticker
+
+        The folder is named after the configuration of the processor, the
+        ticker and a hash of the ticker data, so any change to either gives
+        a new folder.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        validationSplit: float
+            The portion of the data used for training
+
+        Returns
+        -------
+        folder: str
+            <DATASET_CACHE>/<config hash>/<ticker>/<data hash>
+        """
+        config = json.dumps(self.getConfig(), sort_keys=True)
+        configKey = hashlib.sha1(config.encode()).hexdigest()
+        data = self.tickerData[ticker]
+        digest = self.featureCache.getDigest(data, len(data))
+        dataKey = hashlib.sha1("{} {}".format(
+            digest, validationSplit).encode()).hexdigest()
+        return os.path.join(self.DATASET_CACHE, configKey, ticker, dataKey)
+
+    def getTickerWindows(self, ticker, validationSplit):
+        """Returns the processed training and validation data of a ticker
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        validationSplit: float
+            The portion of the data used for training
+
+        Returns
+        -------
+        train: object
+            The output of inputProcessor() for the training data
+        valid: object
+            The output of inputProcessor() for the validation data
+        """
+        context = {"isTrain": True, "ticker": ticker}
+        data = self.tickerData[ticker].copy()
+        splitIndex = math.floor(validationSplit * len(data))
+        return (self.inputProcessor(data[:splitIndex], context),
+                self.inputProcessor(data[splitIndex:], context))
+
+    def interleaveDatasets(self, datasets, weights=None, seed=None):
+        """Returns the windows of several datasets as a single dataset
+
+        Parameters
+        ----------
+        datasets: list
+            The tf.data.Dataset of each ticker
+        weights: list, optional
+            The probability of drawing each dataset. If None, the datasets
+            take turns
+        seed: int, optional
+            The seed of the random draws
+
+        Returns
+        -------
+        dataset: tf.data.Dataset
+            The interleaved dataset
+        """
+        from tensorflow import data as DS
+
+        if len(datasets) == 1:
+            return datasets[0]
+        if weights is None:
+            choices = DS.Dataset.range(len(datasets)).repeat()
+            return DS.Dataset.choose_from_datasets(
+                datasets, choices, stop_on_empty_dataset=False)
+        total = sum(weights)
+        return DS.Dataset.sample_from_datasets(
+            datasets, [weight / total for weight in weights], seed=seed,
+            stop_on_empty_dataset=False)
+
+
+class TickerLoadHandle():
+    """The handle of a DataProcessor.loadTickerData() call
+
+    The tickers are submitted to a thread pool when the handle is created.
+    As each ticker finishes, its features are added to the tickerData of
+    the handle, or its error to the loadFailures of the handle. result()
+    then sets them as the tickerData and loadFailures of the processor, so
+    concurrent loadTickerData() calls never mix their tickers.
+
+    Attributes
+    ----------
+    dataProcessor: DataProcessor
+        The processor whose tickers are being loaded
+    tickers: list
+        The tickers being loaded
+    tickerData: dict
+        The features of the tickers loaded so far
+    loadFailures: dict
+        The error of each ticker that could not be loaded
+    futures: dict
+        The ticker of each submitted future
+    """
+    def __init__(self, dataProcessor, maxWorkers=8):
+        self.dataProcessor = dataProcessor
+        self.tickers = list(dataProcessor.tickers)
+        self.tickerData = {}
+        self.loadFailures = {}
+        executor = ThreadPoolExecutor(max_workers=maxWorkers)
+        self.futures = {}
+        for ticker in self.tickers:
+            future = executor.submit(self.load, ticker)
+            self.futures[future] = ticker
+        executor.shutdown(wait=False)
+
+    def load(self, ticker):
+        try:
+            data = self.dataProcessor.loadTicker(ticker)
+        except Exception as e:
+            self.loadFailures[ticker] = "{}: {}".format(
+                e.__class__.__name__, e)
+            return
+        self.tickerData[ticker] = data
+
+    def done(self):
+        """Returns True once every ticker has finished loading
+        """
+        return all(future.done() for future in self.futures)
+
+    def getProgress(self):
+        """Returns the number of finished and total tickers
+        """
+        finished = sum(future.done() for future in self.futures)
+        return finished, len(self.futures)
+
+    def result(self, timeout=None):
+        """Waits for all the tickers to finish loading
+
+        The loaded tickers, in the order of the tickers, and the failures
+        are then set as the tickerData and loadFailures of the processor.
+
+        Parameters
+        ----------
+        timeout: float, optional
+            The maximum time in seconds to wait
+
+        Returns
+        -------
+        tickerData: dict
+            The features of every ticker that was loaded
+
+        Raises
+        ------
+        Exception
+            If none of the tickers could be loaded
+        """
+        wait(list(self.futures), timeout=timeout)
+        if not self.done():
+            raise Exception("Timed out loading the ticker data")
+        tickerData = {ticker: self.tickerData[ticker]
+                      for ticker in self.tickers if ticker in self.tickerData}
+        self.dataProcessor.tickerData = tickerData
+        self.dataProcessor.loadFailures = dict(self.loadFailures)
+        if self.loadFailures and not tickerData:
+            message = "Could not load any ticker: {}"
+            raise Exception(message.format(self.loadFailures))
+        return tickerData
@@ -4,6 +4,9 @@ import pickle
 import dill
 import datetime
 import json
+import numpy as np
+from DataStore.Panel import Panel
+from DataStore.WindowStore import WindowStore
 
 
 class RegressorBase():
@@ -175,7 +178,8 @@ class RegressorBase():
 
     def train(self, epochs=1000, earlyStopping=True,
               patience=15, callbacks=[], shuffle=False,
-              batchSize=64, validationSplit=0.7):
+              batchSize=64, validationSplit=0.7, windowName=None,
+              cache=False):
         """The method to start training the model
 
         Parameters
@@ -200,6 +204,14 @@ class RegressorBase():
             training
         batchSize: int
             A number indicating the batchsize of the data for training
+        windowName: str, optional
+            The name under which the windows of the data processor were
+            exported with DataStore.WindowStore. The windows are then
+            streamed from disk instead of being built in memory, and
+            validationSplit is the one they were exported with
+        cache: bool, optional
+            Whether the processed training data is kept on disk, so that
+            retraining with the same data processor skips the processing
         """
         if self.dataProcessor is None:
             message = "DataProcessor not specified for this model"
@@ -210,9 +222,19 @@ class RegressorBase():
             callback = keras.callbacks.EarlyStopping(patience=patience)
             callbacks.append(callback)
 
-        trainDS, validDS = self.dataProcessor.getTrainingData(validationSplit,
-                                                              shuffle,
-                                                              batchSize)
+        if windowName is None:
+            trainDS, validDS = self.dataProcessor.getTrainingData(
+                validationSplit, shuffle, batchSize, cache=cache)
+        else:
+            windowStore = WindowStore()
+            config = windowStore.readIndex(windowName)["config"]
+            if config != windowStore.getConfig(self.dataProcessor):
+                message = "{} was exported by a different data processor"
+                raise Exception(message.format(windowName))
+            trainDS = windowStore.getDataset(windowName, "train", batchSize,
+                                             shuffle)
+            validDS = windowStore.getDataset(windowName, "valid", batchSize,
+                                             False)
 
         history = self.model.fit(trainDS, epochs=epochs,
                                  callbacks=callbacks,
@@ -240,3 +262,53 @@ class RegressorBase():
         procInput = self.dataProcessor.inputProcessor(data, context)
         prediction = self.model.predict(procInput)
         return self.dataProcessor.outputProcessor(prediction, context)
+
+    def predictMany(self, data, batchSize=256, context=None):
+        """Returns the predictions of several tickers from one predict call
+
+        The input windows of every ticker are built by inputProcessor and
+        stacked, so the model runs over all of them in large batches. The
+        predictions are then split back and passed through outputProcessor
+        one ticker at a time.
+
+        Parameters
+        ----------
+        data: dict or DataStore.Panel
+            The features of each ticker, or a panel of the tickers
+        batchSize: int, optional
+            The number of windows the model predicts at a time
+        context: dict, optional
+            Additional context given to inputProcessor and outputProcessor,
+            along with isTrain and the ticker
+
+        Returns
+        -------
+        predictions: dict
+            The output of outputProcessor for each ticker
+        """
+        if isinstance(data, Panel):
+            items = [(ticker, data) for ticker in data.tickers]
+        else:
+            items = list(data.items())
+        contexts = []
+        inputs = []
+        for ticker, tickerData in items:
+            tickerContext = dict(context or {})
+            tickerContext.update({"isTrain": False, "ticker": ticker})
+            contexts.append(tickerContext)
+            inputs.append(np.asarray(
+                self.dataProcessor.inputProcessor(tickerData,
+                                                  tickerContext)))
+        if len(inputs) == 0:
+            return {}
+        prediction = self.model.predict(np.concatenate(inputs),
+                                        batch_size=batchSize)
+        predictions = {}
+        start = 0
+        for (ticker, _), tickerContext, tickerInput in zip(items, contexts,
+                                                           inputs):
+            end = start + len(tickerInput)
+            predictions[ticker] = self.dataProcessor.outputProcessor(
+                prediction[start:end], tickerContext)
+            start = end
+        return predictions
@@ -0,0 +1,543 @@
+import math
+import numpy as np
+
+# every indicator that can be used as a feature, keyed by its name. See
+# registerIndicator() for the structure of each entry. The warm-up of the
+# recursive indicators is long enough for the starting value to decay below
+# float32 precision: 10 * n bars for EMAs and 20 * n for Wilder's smoothing
+indicators = {}
+
+
+def registerIndicator(name, compute, defaults, warmUp, description=""):
+    """Module level method to add an indicator to the registry
+
+    A feature is named after its indicator followed by its parameters,
+    separated by underscores, for example sma_50 or macd_12_26_9. Missing
+    parameters take their default values, so sma is the same as sma_20.
+
+    Parameters
+    ----------
+    name: str
+        The name of the indicator, in lower case
+    compute: function
+        A function taking a FeatureEngine followed by the parameters and
+        returning the indicator as a float64 numpy array
+    defaults: list
+        The default value of each parameter
+    warmUp: function
+        A function taking the parameters and returning the number of bars
+        needed before the indicator is valid
+    description: str, optional
+        A short description of the indicator
+    """
+    indicators[name] = {"compute": compute, "defaults": defaults,
+                        "warmUp": warmUp, "description": description}
+
+
+def parseFeature(feature):
+    """Module level method to split a feature into an indicator and params
+
+    Parameters
+    ----------
+    feature: str
+        The name of the feature, for example rsi_14
+
+    Returns
+    -------
+    name: str
+        The name of the indicator
+    params: tuple
+        The parameters of the indicator, with the defaults filled in
+    """
+    parts = feature.lower().split("_")
+    name = parts[0]
+    if name not in indicators:
+        raise Exception("{} feature is not available".format(feature))
+    defaults = indicators[name]["defaults"]
+    if len(parts) - 1 > len(defaults):
+        message = "{} takes at most {} parameters"
+        raise Exception(message.format(name, len(defaults)))
+    params = []
+    for i, default in enumerate(defaults):
+        if i + 1 < len(parts):
+            try:
+                value = float(parts[i + 1])
+            except ValueError:
+                message = "{} is not a valid parameter of {}"
+                raise Exception(message.format(parts[i + 1], feature))
+            params.append(int(value) if value.is_integer() else value)
+        else:
+            params.append(default)
+    return name, tuple(params)
+
+
+def isIndicator(feature):
+    """Module level method to check whether a feature is an indicator
+
+    Parameters
+    ----------
+    feature: str
+        The name of the feature
+
+    Returns
+    -------
+    isIndicator: bool
+        True if the feature is computed by an indicator
+    """
+    return feature.lower().split("_")[0] in indicators
+
+
+def getWarmUp(feature):
+    """Module level method to get the warm-up of a feature
+
+    For indicators that depend on the whole history, like EMA and RSI, this
+    is the number of bars after which the starting value no longer matters.
+
+    Parameters
+    ----------
+    feature: str
+        The name of the feature
+
+    Returns
+    -------
+    warmUp: int
+        The number of bars needed before the feature is valid
+    """
+    if not isIndicator(feature):
+        return 0
+    name, params = parseFeature(feature)
+    return indicators[name]["warmUp"](*params)
+
+
+def getDefaultFeatures():
+    """Module level method to get the default feature of every indicator
+
+    Returns
+    -------
+    features: list
+        The name of each indicator with its default parameters
+    """
+    features = []
+    for name, indicator in indicators.items():
+        params = [str(param) for param in indicator["defaults"]]
+        features.append("_".join([name] + params))
+    return features
+
+
+def computeFeatures(data, features):
+    """Module level method to compute indicator features of a ticker
+
+    Parameters
+    ----------
+    data: pandas.DataFrame
+        The raw OHLCV bars of the ticker
+    features: list
+        The names of the indicator features
+
+    Returns
+    -------
+    columns: dict
+        The float64 numpy array of each feature
+    """
+    engine = FeatureEngine(data)
+    return {feature: engine.compute(feature) for feature in features}
+
+
+def getBlockSize(beta, maxGrowth=50.0):
+    """Module level method to get the block length of getRecurrence()
+
+    Parameters
+    ----------
+    beta: float
+        The decay of the previous value, between 0 and 1
+    maxGrowth: float, optional
+        The log of the largest power of 1 / beta used in a block
+
+    Returns
+    -------
+    blockSize: int
+        The number of steps in a block
+    """
+    return int(max(1, maxGrowth // -math.log(beta)))
+
+
+def getPowers(beta, start, stop):
+    """Module level method to get the powers of beta from start to stop
+
+    The powers are computed with Python floats, the same way the streaming
+    indicators compute them, so both give the same values.
+    """
+    return np.array([beta ** k for k in range(start, stop)])
+
+
+def getRecurrence(inputs, beta, initial):
+    """Module level method to solve a first order linear recurrence
+
+    Returns y where y[t] = beta * y[t - 1] + inputs[t], starting from
+    y[-1] = initial, without a loop over the values. The values are split
+    into blocks of getBlockSize(beta) steps. Within a block, y is a
+    cumulative sum of the inputs scaled by powers of 1 / beta, scaled back
+    by powers of beta, plus the carry from the previous block. Only the
+    last value of each block is carried over to the next one, in a loop
+    over the blocks. The blocks are short enough that the powers of beta
+    stay within exp(50).
+
+    Core.StreamingIndicators.Smoother does the same operations in the same
+    order one step at a time, so the streaming and batch values are equal
+    bit for bit.
+
+    Parameters
+    ----------
+    inputs: numpy.ndarray
+        The input of each step
+    beta: float
+        The decay of the previous value, between 0 and 1
+    initial: float
+        The value before the first step
+
+    Returns
+    -------
+    values: numpy.ndarray
+        The value after each step
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    size = len(inputs)
+    if size == 0 or beta == 0:
+        return inputs.copy()
+    blockSize = min(size, getBlockSize(beta))
+    numBlocks = -(-size // blockSize)
+    blocks = np.zeros(numBlocks * blockSize)
+    blocks[:size] = inputs
+    blocks = blocks.reshape(numBlocks, blockSize)
+    local = np.cumsum(blocks * getPowers(1.0 / beta, 0, blockSize), axis=1)
+    local *= getPowers(beta, 0, blockSize)
+    carries = np.empty(numBlocks)
+    factor = beta ** blockSize
+    previous = initial
+    for block, end in enumerate(local[:, -1].tolist()):
+        carries[block] = previous
+        previous = factor * previous + end
+    local += carries[:, None] * getPowers(beta, 1, blockSize + 1)
+    return local.ravel()[:size]
+
+
+class FeatureEngine():
+    """Computes the indicators of a single ticker
+
+    Intermediate results, like the moving averages or the true range, are
+    kept by their parameters, so indicators that need the same intermediate
+    compute it only once. For example macd_12_26_9, ema_12 and ema_26 share
+    both of their EMAs.
+
+    The windowed indicators are vectorized with cumulative sums. Recursive
+    smoothing (EMA and Wilder's smoothing) is vectorized in blocks, see
+    getRecurrence(). Every value is computed with the same floating point
+    operations, in the same order, as the streaming indicators in
+    Core.StreamingIndicators, so both are equal bit for bit.
+
+    Attributes
+    ----------
+    data: pandas.DataFrame
+        The raw OHLCV bars of the ticker
+    results: dict
+        The intermediate results computed so far
+    """
+    def __init__(self, data):
+        self.data = data
+        self.results = {}
+
+    def compute(self, feature):
+        """Method to compute a feature
+
+        Parameters
+        ----------
+        feature: str
+            The name of the feature, for example bbupper_20_2
+
+        Returns
+        -------
+        values: numpy.ndarray
+            The float64 values of the feature, NaN during the warm-up
+        """
+        name, params = parseFeature(feature)
+        return indicators[name]["compute"](self, *params)
+
+    def getResult(self, key, compute):
+        if key not in self.results:
+            self.results[key] = compute()
+        return self.results[key]
+
+    def getColumn(self, name):
+        """Returns a raw column as a float64 array
+
+        Parameters
+        ----------
+        name: str
+            The name of the column, case insensitive
+        """
+        def compute():
+            for column in self.data.columns:
+                if column.lower() == name:
+                    return np.asarray(self.data[column].values,
+                                      dtype=np.float64)
+            raise Exception("{} column is needed".format(name))
+        return self.getResult(("column", name), compute)
+
+    def getCumSum(self, source):
+        return self.getResult(("cumsum", source),
+                              lambda: np.cumsum(self.getColumn(source)))
+
+    def sma(self, source, n):
+        def compute():
+            total = self.getCumSum(source)
+            out = np.full(len(total), np.nan)
+            if len(total) >= n:
+                out[n - 1] = total[n - 1] / n
+                out[n:] = (total[n:] - total[:-n]) / n
+            return out
+        return self.getResult(("sma", source, n), compute)
+
+    def rollingStd(self, values, mean, n):
+        """Returns the population standard deviation over a rolling window
+
+        The squared deviations are added up oldest first, one position of
+        the window at a time, with every position vectorized over the bars.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The values
+        mean: numpy.ndarray
+            The mean of the window ending at each bar
+        n: int
+            The length of the window
+        """
+        out = np.full(len(values), np.nan)
+        numWindows = len(values) - n + 1
+        if numWindows <= 0:
+            return out
+        windowMean = mean[n - 1:]
+        squares = np.zeros(numWindows)
+        for k in range(n):
+            deviation = values[k:k + numWindows] - windowMean
+            squares = squares + deviation * deviation
+        out[n - 1:] = np.sqrt(squares / n)
+        return out
+
+    def smooth(self, values, n, alpha):
+        """Returns the recursive exponential smoothing of an array
+
+        The first valid value is the mean of the first n values, after
+        which each value is alpha * value + (1 - alpha) * previous, see
+        getRecurrence(). Leading NaNs of values are skipped.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The values to smooth
+        n: int
+            The number of values averaged for the first value
+        alpha: float
+            The weight of the newest value
+        """
+        out = np.full(len(values), np.nan)
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) == 0 or len(values) - valid[0] < n:
+            return out
+        start = valid[0] + n - 1
+        # added up in order, like the streaming indicators do
+        out[start] = np.cumsum(values[valid[0]:start + 1])[-1] / n
+        out[start + 1:] = getRecurrence(alpha * values[start + 1:],
+                                        1.0 - alpha, out[start])
+        return out
+
+    def ema(self, source, n):
+        return self.getResult(
+            ("ema", source, n),
+            lambda: self.smooth(self.getColumn(source), n, 2.0 / (n + 1)))
+
+    def getDiff(self, source):
+        def compute():
+            values = self.getColumn(source)
+            out = np.full(len(values), np.nan)
+            out[1:] = values[1:] - values[:-1]
+            return out
+        return self.getResult(("diff", source), compute)
+
+    def getTrueRange(self):
+        def compute():
+            high = self.getColumn("high")
+            low = self.getColumn("low")
+            close = self.getColumn("close")
+            trueRange = high - low
+            if len(close) > 1:
+                previous = close[:-1]
+                trueRange[1:] = np.maximum(
+                    trueRange[1:],
+                    np.maximum(np.abs(high[1:] - previous),
+                               np.abs(low[1:] - previous)))
+            return trueRange
+        return self.getResult(("trueRange",), compute)
+
+    def getReturns(self, n):
+        def compute():
+            close = self.getColumn("close")
+            out = np.full(len(close), np.nan)
+            out[n:] = close[n:] / close[:-n] - 1.0
+            return out
+        return self.getResult(("returns", n), compute)
+
+    def getSessions(self):
+        """Returns the start position of each trading day
+        """
+        def compute():
+            index = self.data.index
+            if getattr(index, "tz", None) is not None:
+                index = index.tz_localize(None)
+            days = np.asarray(index.values, dtype="datetime64[D]")
+            if len(days) == 0:
+                return np.zeros(0, dtype=np.int64)
+            changes = np.flatnonzero(days[1:] != days[:-1]) + 1
+            return np.concatenate([[0], changes])
+        return self.getResult(("sessions",), compute)
+
+
+def computeSMA(engine, n):
+    return engine.sma("close", n)
+
+
+def computeEMA(engine, n):
+    return engine.ema("close", n)
+
+
+def computeRSI(engine, n):
+    def compute():
+        diff = engine.getDiff("close")
+        gains = np.where(diff > 0, diff, 0.0)
+        losses = np.where(diff < 0, -diff, 0.0)
+        gains[0] = losses[0] = np.nan
+        avgGain = engine.smooth(gains, n, 1.0 / n)
+        avgLoss = engine.smooth(losses, n, 1.0 / n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100.0 - 100.0 / (1.0 + avgGain / avgLoss)
+        # no losses in the window
+        rsi[(avgLoss == 0) & ~np.isnan(avgGain)] = 100.0
+        return rsi
+    return engine.getResult(("rsi", n), compute)
+
+
+def computeMACDLine(engine, fast, slow):
+    return engine.getResult(
+        ("macd", fast, slow),
+        lambda: engine.ema("close", fast) - engine.ema("close", slow))
+
+
+def computeMACDSignal(engine, fast, slow, signal):
+    return engine.getResult(
+        ("macdSignal", fast, slow, signal),
+        lambda: engine.smooth(computeMACDLine(engine, fast, slow), signal,
+                              2.0 / (signal + 1)))
+
+
+def computeMACD(engine, fast, slow, signal):
+    return computeMACDLine(engine, fast, slow)
+
+
+def computeMACDHist(engine, fast, slow, signal):
+    return computeMACDLine(engine, fast, slow) - \
+        computeMACDSignal(engine, fast, slow, signal)
+
+
+def computeBollingerStd(engine, n):
+    return engine.getResult(
+        ("bbStd", n),
+        lambda: engine.rollingStd(engine.getColumn("close"),
+                                  engine.sma("close", n), n))
+
+
+def computeBollingerUpper(engine, n, k):
+    return engine.sma("close", n) + k * computeBollingerStd(engine, n)
+
+
+def computeBollingerMid(engine, n):
+    return engine.sma("close", n)
+
+
+def computeBollingerLower(engine, n, k):
+    return engine.sma("close", n) - k * computeBollingerStd(engine, n)
+
+
+def computeATR(engine, n):
+    return engine.getResult(
+        ("atr", n),
+        lambda: engine.smooth(engine.getTrueRange(), n, 1.0 / n))
+
+
+def computeVWAP(engine):
+    """The volume weighted average price since the start of each day"""
+    def compute():
+        typical = (engine.getColumn("high") + engine.getColumn("low") +
+                   engine.getColumn("close")) / 3.0
+        volume = engine.getColumn("volume")
+        priceVolume = typical * volume
+        starts = engine.getSessions()
+        ends = np.concatenate([starts[1:], [len(volume)]])
+        totalPV = np.empty(len(volume))
+        totalVolume = np.empty(len(volume))
+        for start, end in zip(starts, ends):
+            totalPV[start:end] = np.cumsum(priceVolume[start:end])
+            totalVolume[start:end] = np.cumsum(volume[start:end])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = totalPV / totalVolume
+        # no volume traded yet in the day
+        return np.where(totalVolume > 0, vwap, typical)
+    return engine.getResult(("vwap",), compute)
+
+
+def computeVolatility(engine, n):
+    def compute():
+        returns = engine.getReturns(1)
+        total = np.cumsum(np.nan_to_num(returns))
+        mean = np.full(len(returns), np.nan)
+        if len(returns) > n:
+            mean[n] = total[n] / n
+            mean[n + 1:] = (total[n + 1:] - total[1:-n]) / n
+        out = np.full(len(returns), np.nan)
+        out[1:] = engine.rollingStd(returns[1:], mean[1:], n)
+        return out
+    return engine.getResult(("volatility", n), compute)
+
+
+def computeReturns(engine, n):
+    return engine.getReturns(n)
+
+
+registerIndicator("sma", computeSMA, [20], lambda n: n - 1,
+                  "Simple moving average of the close")
+registerIndicator("ema", computeEMA, [20], lambda n: 10 * n,
+                  "Exponential moving average of the close")
+registerIndicator("rsi", computeRSI, [14], lambda n: 20 * n,
+                  "Relative strength index, with Wilder's smoothing")
+registerIndicator("macd", computeMACD, [12, 26, 9],
+                  lambda fast, slow, signal: 10 * slow,
+                  "Difference of the fast and slow EMA of the close")
+registerIndicator("macdsignal", computeMACDSignal, [12, 26, 9],
+                  lambda fast, slow, signal: 10 * (slow + signal),
+                  "EMA of the MACD")
+registerIndicator("macdhist", computeMACDHist, [12, 26, 9],
+                  lambda fast, slow, signal: 10 * (slow + signal),
+                  "Difference of the MACD and its signal")
+registerIndicator("bbupper", computeBollingerUpper, [20, 2],
+                  lambda n, k: n - 1, "Upper Bollinger band")
+registerIndicator("bbmid", computeBollingerMid, [20], lambda n: n - 1,
+                  "Middle Bollinger band")
+registerIndicator("bblower", computeBollingerLower, [20, 2],
+                  lambda n, k: n - 1, "Lower Bollinger band")
+registerIndicator("atr", computeATR, [14], lambda n: 20 * n,
+                  "Average true range, with Wilder's smoothing")
+registerIndicator("vwap", computeVWAP, [], lambda: 0,
+                  "Volume weighted average price of the day")
+registerIndicator("volatility", computeVolatility, [20], lambda n: n,
+                  "Standard deviation of the returns")
+registerIndicator("returns", computeReturns, [1], lambda n: n,
+                  "Returns of the close over n bars")
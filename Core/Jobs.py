@@ -5,6 +5,9 @@ from Utils import UIInitializer as uint
 import inspect
 import pandas as pd
 from DataStore import APIInterface
+from DataStore.TickStore import TickStore
+from DataStore.Resampler import Resampler, getBarEnds
+from Core.StreamingIndicators import StreamingFeatures
 from Core.TelegramBot import Bot as bot
 import os
 import json
@@ -38,7 +41,15 @@ class SubscriptionJob():
         The location of all the ticker data
     source: APIInterface
         An instance of one of the APIInterfaces. By default it is
-        YFinance()
+        APIInterface.getSource()
+    store: DataStore.TickStore
+        The store from which the ticker data is read
+    resampler: DataStore.Resampler
+        Reads the ticker data, resampling it from finer bars if needed
+    featureStreams: dict
+        The streaming feature state of each ticker and its latest lookBack
+        rows of features. This is saved after every task, so a restarted
+        job carries on from where it stopped
     """
     def __init__(self, agentName, agentSaveLoc,
                  tickerDataPath="DataStore/StockData/",
@@ -48,9 +59,13 @@ class SubscriptionJob():
         self.agentSaveLoc = agentSaveLoc
         self.tickerDataLoc = tickerDataPath
         self.rotateProxy = rotateProxy
-        self.source = APIInterface.YFinance(autoRotate=rotateProxy)
+        self.source = APIInterface.getSource(autoRotate=rotateProxy)
+        self.store = TickStore(tickerDataPath)
+        self.resampler = Resampler(self.store)
         self.agent = self.loadAgent()
         self.interval = self.agent.dataProcessor.interval.lower()
+        self.featureStreams = {}
+        self.loadFeatureStreams()
 
     def loadAgent(self):
         """Method to load the agent and return it
@@ -73,13 +88,23 @@ class SubscriptionJob():
         self.tickers = model.dataProcessor.tickers
         return model
 
-    def task(self):
+    def task(self, sendMessage=True):
         """Defines the tasks to be done when subscribed
 
         The set of tasks include,
             1. Downloading and saving the new ticker data
             2. Inferencing
             3. Messaging the root about the action
+
+        Parameters
+        ----------
+        sendMessage: bool, optional
+            Whether the message is to be sent to the root user
+
+        Returns
+        -------
+        message: str
+            The message for the actions taken, None if there were none
         """
         self.updateStockData()
         tickerActions = {}
@@ -103,9 +128,43 @@ class SubscriptionJob():
             tickerActions[ticker]["action"] = action
             tickerActions[ticker]["price"] = data["Close"].values[-1]
 
+        self.saveFeatureStreams()
         message = self.generateMessage(self.name, tickerActions)
-        if message:
+        if message and sendMessage:
             bot.sendMessage(message)
+        return message
+
+    def replay(self, numSteps, sendMessage=False):
+        """Method to run the job against a replay source
+
+        Instead of waiting for the schedule, the source's replay clock is
+        moved forward by the job's interval and the task is run, numSteps
+        times. This runs a subscription as fast as the agent can infer.
+
+        Parameters
+        ----------
+        numSteps: int
+            The number of intervals to replay
+        sendMessage: bool, optional
+            Whether the messages are to be sent to the root user
+
+        Returns
+        -------
+        messages: list
+            The message generated at each step
+        """
+        if not hasattr(self.source, "clock"):
+            message = "{} does not have a replay clock"
+            raise Exception(message.format(self.source.__class__.__name__))
+        if "d" in self.interval:
+            step = pd.Timedelta(days=int(self.interval[:-1]))
+        else:
+            step = pd.Timedelta(minutes=int(self.interval[:-1]))
+        messages = []
+        for _ in range(numSteps):
+            self.source.clock.advance(step)
+            messages.append(self.task(sendMessage))
+        return messages
 
     def generateMessage(self, agentName, tickerActions):
         """Method to generate the message to be sent to the admin
@@ -147,12 +206,10 @@ class SubscriptionJob():
     def updateStockData(self):
         """Method to update all the ticker the agent was trained on
         """
-        if self.interval == "1d":
-            for ticker in self.tickers:
-                self.source.saveIntraDay(ticker)
-        else:
-            for ticker in self.tickers:
-                self.source.saveInterDay(ticker, self.interval)
+        report = self.source.saveMany(self.tickers, self.interval,
+                                      savePath=self.tickerDataLoc)
+        if report["failed"]:
+            self.source.printReport(report)
 
     def scheduleJob(self):
         """Method to define the inference and messaging frequency
@@ -176,7 +233,14 @@ class SubscriptionJob():
         """Method to return the input for the model
 
         This method passes the raw data through the agent's dataProcessor
-        and returns the proper input form for the inputProcessor
+        and returns the proper input form for the inputProcessor.
+
+        The features are kept up to date with streaming indicators. The
+        first call for a ticker reads the last lookBack bars plus the bars
+        the features need to warm up. After that only the bars newer than
+        the last one seen are read, and each one updates the features in
+        constant time. Only complete bars are streamed, as a bar once seen
+        is never updated again.
 
         Parameters
         ----------
@@ -185,11 +249,96 @@ class SubscriptionJob():
         interval:
             The interval size of the data that is to be read
         """
-        path = "{}/{}/{}.csv".format(self.tickerDataLoc, interval.upper(),
-                                     ticker)
-        df = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
-        df = self.agent.dataProcessor.getFeatures(df)
-        return df[-self.agent.dataProcessor.lookBack:]
+        dataProcessor = self.agent.dataProcessor
+        if ticker in self.featureStreams:
+            stream, window = self.featureStreams[ticker]
+            data = self.resampler.readRange(ticker, interval,
+                                            start=stream.lastDate)
+            data = self.getCompleteBars(data, interval)
+            window = pd.concat([window, stream.updateFrame(data)])
+        else:
+            stream = StreamingFeatures(dataProcessor.features)
+            numRows = dataProcessor.lookBack + dataProcessor.getWarmUp()
+            data = self.resampler.readTail(ticker, interval, numRows + 1)
+            data = self.getCompleteBars(data, interval)[-numRows:]
+            window = stream.updateFrame(data)
+        window = window[-dataProcessor.lookBack:]
+        self.featureStreams[ticker] = (stream, window)
+        return window.astype({feature: dataProcessor.getDType(feature)
+                              for feature in window.columns})
+
+    def getCompleteBars(self, data, interval):
+        """Method to drop the bars that are still forming
+
+        Sources may return the bar of the running interval, so the bars
+        that end after the current time are dropped. A replay source is
+        compared with its replay clock.
+
+        Parameters
+        ----------
+        data: pandas.DataFrame
+            The bars of a ticker
+        interval: str
+            The interval of the bars
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The bars that are complete
+        """
+        if len(data) == 0:
+            return data
+        if hasattr(self.source, "getClockTime"):
+            now = self.source.getClockTime(data.index)
+        else:
+            now = pd.Timestamp.now(tz=data.index.tz)
+        return data[getBarEnds(data.index, interval) <= now]
+
+    def getFeatureStatePath(self):
+        return "DataStore/JobStore/FeatureStates/{}.json".format(self.name)
+
+    def saveFeatureStreams(self):
+        """Method to save the streaming feature state of every ticker
+        """
+        state = {}
+        for ticker, (stream, window) in self.featureStreams.items():
+            tz = window.index.tz
+            state[ticker] = {"stream": stream.getState(),
+                             "dates": [str(date) for date in window.index],
+                             "tz": None if tz is None else str(tz),
+                             "values": window.values.tolist()}
+        path = self.getFeatureStatePath()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w+") as f:
+            json.dump(state, f)
+
+    def loadFeatureStreams(self):
+        """Method to restore the saved streaming feature state
+
+        A state that doesn't match the agent's features is ignored, and the
+        features of those tickers are warmed up again.
+        """
+        path = self.getFeatureStatePath()
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            state = json.load(f)
+        features = self.agent.dataProcessor.features
+        for ticker, tickerState in state.items():
+            stream = StreamingFeatures(features)
+            try:
+                stream.setState(tickerState["stream"])
+            except Exception:
+                continue
+            if tickerState["tz"] is None:
+                index = pd.to_datetime(tickerState["dates"])
+            else:
+                index = pd.to_datetime(tickerState["dates"], utc=True)
+                index = index.tz_convert(tickerState["tz"])
+            index = pd.DatetimeIndex(index, name="Date")
+            window = pd.DataFrame(tickerState["values"], index=index,
+                                  columns=features, dtype=float)
+            self.featureStreams[ticker] = (stream, window)
 
     def save(self):
         """Method to save the current subscription
@@ -240,7 +389,7 @@ class DataDownloadJob():
         The location at which the ticker data is to be stored
     source: APIInterface
         An instance of one of the APIInterfaces. By default it is
-        YFinance()
+        APIInterface.getSource()
     """
     def __init__(self, tickers, interval,
                  tickerSaveLoc="DataStore/StockData/",
@@ -257,7 +406,7 @@ class DataDownloadJob():
         self.rotateProxy = rotateProxy
         self.tickerSaveLoc = tickerSaveLoc
 
-        self.source = APIInterface.YFinance(autoRotate=rotateProxy)
+        self.source = APIInterface.getSource(autoRotate=rotateProxy)
 
     def makeUniqueTagName(self):
         """Method to make a unqiue tag name for the job
@@ -274,12 +423,9 @@ class DataDownloadJob():
         The set of tasks include,
             1. Downloading and saving the new ticker data
         """
-        if self.interval == "1d":
-            for ticker in self.tickers:
-                self.source.saveIntraDay(ticker)
-        else:
-            for ticker in self.tickers:
-                self.source.saveIntraDay(ticker, self.interval)
+        report = self.source.saveMany(self.tickers, self.interval,
+                                      savePath=self.tickerSaveLoc)
+        self.source.printReport(report)
 
     def scheduleJob(self):
         """Method to define the inference and messaging frequency
@@ -444,6 +590,9 @@ def deleteSubscription(name):
     schedule.clear(name)
     path = "DataStore/JobStore/"
     os.remove(path + name + ".subscription.json")
+    statePath = path + "FeatureStates/" + name + ".json"
+    if os.path.exists(statePath):
+        os.remove(statePath)
 
 
 def deleteDataDownload(name):
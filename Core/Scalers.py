@@ -0,0 +1,265 @@
+import numpy as np
+import pandas as pd
+
+
+class Scaler():
+    """The base class of the scalers
+
+    A scaler is fitted once on the data of a ticker, with vectorized
+    statistics over each feature, and kept with the data processor. It then
+    scales any data of the ticker with broadcasting, and inverts the scaled
+    predictions of a feature.
+
+    Scalers whose statistics change along the data, like RollingScaler,
+    compute them in transform() and keep the statistics of each row of the
+    last data transformed, so that predictions made from that data can be
+    inverted with the statistics of the rows they were made at.
+
+    Attributes
+    ----------
+    center: numpy.ndarray
+        The value subtracted from each feature, either one per feature or
+        one per row and feature
+    scale: numpy.ndarray
+        The value each feature is divided by after that
+    """
+    def __init__(self):
+        self.center = None
+        self.scale = None
+
+    def fit(self, values):
+        """Method to compute the statistics of the data
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The data, of shape (rows, features)
+
+        Returns
+        -------
+        scaler: Scaler
+            The fitted scaler itself
+        """
+        return self
+
+    def getStats(self, values):
+        """Returns the center and scale used to transform values
+        """
+        if self.center is None:
+            raise Exception("The scaler has to be fitted first")
+        return self.center, self.scale
+
+    def transform(self, values, inPlace=False):
+        """Method to scale data
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The data, of shape (rows, features)
+        inPlace: bool, optional
+            Whether values is overwritten instead of copied. It must then
+            have a float dtype
+
+        Returns
+        -------
+        scaled: numpy.ndarray
+            The scaled data, in the float dtype of values
+        """
+        values = np.asarray(values)
+        if not inPlace:
+            dtype = values.dtype
+            if not np.issubdtype(dtype, np.floating):
+                dtype = np.float64
+            values = values.astype(dtype, copy=True)
+        center, scale = self.getStats(values)
+        np.subtract(values, center, out=values, casting="unsafe")
+        np.divide(values, scale, out=values, casting="unsafe")
+        return values
+
+    def inverse(self, values, column, rows=None):
+        """Method to undo the scaling of predictions of a feature
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The scaled predictions, one row of predictions per row of rows
+        column: int
+            The position of the predicted feature
+        rows: numpy.ndarray, optional
+            For scalers with per row statistics, the row of the last data
+            transformed at which each row of predictions was made. If None,
+            the last row is used
+
+        Returns
+        -------
+        values: numpy.ndarray
+            The predictions in the units of the data
+        """
+        center, scale = self.getStats(None)
+        center, scale = center[..., column], scale[..., column]
+        if np.ndim(center) == 1:
+            if rows is None:
+                center, scale = center[-1], scale[-1]
+            else:
+                center, scale = center[rows], scale[rows]
+                shape = (len(rows),) + (1,) * (np.ndim(values) - 1)
+                center, scale = center.reshape(shape), scale.reshape(shape)
+        return np.asarray(values) * scale + center
+
+
+def getScale(spread):
+    """Module level method to replace spreads of 0 or NaN with 1
+
+    A constant feature is then only shifted, instead of being divided by 0.
+    """
+    spread = np.array(spread, dtype=np.float64)
+    spread[~(spread > 0)] = 1.0
+    return spread
+
+
+class MinMaxScaler(Scaler):
+    """Scales each feature to between 0 and 1 over the fitted data
+    """
+    def fit(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        low = np.nanmin(values, axis=0)
+        self.center = low
+        self.scale = getScale(np.nanmax(values, axis=0) - low)
+        return self
+
+
+class ZScoreScaler(Scaler):
+    """Scales each feature to a mean of 0 and a standard deviation of 1
+    """
+    def fit(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.center = np.nanmean(values, axis=0)
+        self.scale = getScale(np.nanstd(values, axis=0))
+        return self
+
+
+class RollingScaler(Scaler):
+    """Z-scores each row with the statistics of the rows up to it
+
+    Only past and current rows are used, so no future data leaks into the
+    scaled values.
+
+    Attributes
+    ----------
+    window: int
+        The number of rows the statistics are taken over. If None, every
+        row up to the current one is used (an expanding window)
+    """
+    def __init__(self, window=20):
+        super().__init__()
+        self.window = window
+
+    def fit(self, values):
+        # the statistics depend on the rows being scaled
+        self.center = None
+        self.scale = None
+        return self
+
+    def __getstate__(self):
+        # the statistics of the last data transformed aren't worth saving
+        state = self.__dict__.copy()
+        state.update({"center": None, "scale": None})
+        return state
+
+    def getStats(self, values):
+        if values is None:
+            return super().getStats(values)
+        frame = pd.DataFrame(np.asarray(values, dtype=np.float64))
+        if self.window is None:
+            rolling = frame.expanding(min_periods=1)
+        else:
+            rolling = frame.rolling(self.window, min_periods=1)
+        self.center = rolling.mean().values
+        self.scale = getScale(rolling.std(ddof=0).values)
+        return self.center, self.scale
+
+
+class LogReturnScaler(Scaler):
+    """Replaces each value with its log return from the previous row
+
+    The first row has no previous row, so its log return is 0. Predicted
+    log returns are inverted into values by compounding them from the value
+    of the row they were made at, so all the values must be positive.
+
+    Attributes
+    ----------
+    last: numpy.ndarray
+        The values of the last data transformed
+    """
+    def __init__(self):
+        super().__init__()
+        self.last = None
+
+    def fit(self, values):
+        self.last = None
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["last"] = None
+        return state
+
+    def transform(self, values, inPlace=False):
+        values = np.asarray(values)
+        self.last = np.array(values, dtype=np.float64)
+        logValues = np.log(self.last)
+        returns = np.zeros_like(logValues)
+        returns[1:] = logValues[1:] - logValues[:-1]
+        if inPlace:
+            values[...] = returns
+            return values
+        dtype = values.dtype
+        if not np.issubdtype(dtype, np.floating):
+            dtype = np.float64
+        return returns.astype(dtype)
+
+    def inverse(self, values, column, rows=None):
+        if self.last is None:
+            raise Exception("The scaler has to transform the data first")
+        base = self.last[:, column]
+        values = np.asarray(values, dtype=np.float64)
+        if rows is None:
+            return base[-1] * np.exp(np.cumsum(values, axis=-1))
+        shape = (len(rows),) + (1,) * (values.ndim - 1)
+        return base[rows].reshape(shape) * np.exp(np.cumsum(values, axis=-1))
+
+
+# the scaler of each name that data processors accept, see getScaler()
+scalers = {
+    "minmax": MinMaxScaler,
+    "zscore": ZScoreScaler,
+    "rolling": RollingScaler,
+    "expanding": lambda: RollingScaler(None),
+    "logreturn": LogReturnScaler,
+}
+
+
+def getScaler(name):
+    """Module level method to create a scaler from its name
+
+    Like features, parameters follow the name after underscores, so
+    rolling_50 is a RollingScaler over 50 rows.
+
+    Parameters
+    ----------
+    name: str
+        minmax, zscore, rolling_<window>, expanding or logreturn
+
+    Returns
+    -------
+    scaler: Scaler
+        The unfitted scaler
+    """
+    parts = name.lower().split("_")
+    if parts[0] not in scalers:
+        raise Exception("{} scaler is not available".format(name))
+    try:
+        params = [int(part) for part in parts[1:]]
+    except ValueError:
+        raise Exception("{} is not a valid scaler".format(name))
+    return scalers[parts[0]](*params)
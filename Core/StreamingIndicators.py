@@ -0,0 +1,452 @@
+import collections
+import json
+import math
+import pandas as pd
+from Core import Indicators
+
+NAN = float("nan")
+
+
+class StreamingIndicator():
+    """The base class of the streaming indicators
+
+    A streaming indicator keeps the running state of an indicator, so that
+    each new bar is processed in constant time instead of recomputing the
+    indicator over the whole history. Every update does the same floating
+    point operations, in the same order, as Core.Indicators, so the values
+    are bit-for-bit equal to the batch engine.
+
+    The state is made of numbers, deques and other streaming indicators, so
+    getState() can be written to JSON and restored with setState().
+    """
+    def update(self, bar):
+        """Method to process a new bar
+
+        Parameters
+        ----------
+        bar: dict
+            The bar, with the lower case keys open, high, low, close, volume
+            and date
+
+        Returns
+        -------
+        value: float
+            The value of the indicator at this bar, NaN during the warm-up
+        """
+        raise NotImplementedError("Must override update")
+
+    def getState(self):
+        """Returns the running state of the indicator
+
+        Returns
+        -------
+        state: dict
+            The JSON serializable state
+        """
+        state = {}
+        for name, value in self.__dict__.items():
+            if isinstance(value, StreamingIndicator):
+                value = {"indicator": value.getState()}
+            elif isinstance(value, collections.deque):
+                value = {"deque": list(value), "maxlen": value.maxlen}
+            state[name] = value
+        return state
+
+    def setState(self, state):
+        """Method to restore the running state of the indicator
+
+        Parameters
+        ----------
+        state: dict
+            A state returned by getState()
+        """
+        for name, value in state.items():
+            if isinstance(value, dict) and "indicator" in value:
+                getattr(self, name).setState(value["indicator"])
+            elif isinstance(value, dict) and "deque" in value:
+                setattr(self, name, collections.deque(value["deque"],
+                                                      value["maxlen"]))
+            else:
+                setattr(self, name, value)
+
+
+class RunningMean(StreamingIndicator):
+    """The mean of the last n values, from differences of a running sum
+
+    This matches the cumulative sum differences of FeatureEngine.sma().
+    """
+    def __init__(self, n):
+        self.n = n
+        self.count = 0
+        self.total = 0.0
+        self.totals = collections.deque(maxlen=n)
+
+    def update(self, value):
+        self.total += value
+        self.count += 1
+        if self.count < self.n:
+            mean = NAN
+        elif self.count == self.n:
+            mean = self.total / self.n
+        else:
+            mean = (self.total - self.totals[0]) / self.n
+        self.totals.append(self.total)
+        return mean
+
+
+class Smoother(StreamingIndicator):
+    """Recursive exponential smoothing, as in FeatureEngine.smooth()
+
+    Leading NaNs are skipped, the first value is the mean of the first n
+    values and after that each value is alpha * value + (1 - alpha) *
+    previous. This is computed in blocks of steps, like
+    Core.Indicators.getRecurrence(): the running sum of the block and the
+    carry from the previous block are kept, so that every value takes the
+    same operations as in the batch engine.
+    """
+    def __init__(self, n, alpha):
+        self.n = n
+        self.alpha = alpha
+        self.beta = 1.0 - alpha
+        self.count = 0
+        self.total = 0.0
+        self.current = None
+        self.carry = None
+        self.blockTotal = 0.0
+        self.position = 0
+
+    def update(self, value):
+        if self.current is not None:
+            return self.step(self.alpha * value)
+        if self.count == 0 and math.isnan(value):
+            return NAN
+        self.total += value
+        self.count += 1
+        if self.count < self.n:
+            return NAN
+        self.current = self.total / self.n
+        self.carry = self.current
+        return self.current
+
+    def setState(self, state):
+        if state.get("current") is not None and "carry" not in state:
+            # saved before the smoothing was done in blocks
+            raise Exception("The state of the smoother is out of date")
+        super().setState(state)
+
+    def step(self, value):
+        if self.beta == 0:
+            self.current = value
+            return self.current
+        beta = self.beta
+        self.blockTotal += value * (1.0 / beta) ** self.position
+        local = self.blockTotal * beta ** self.position
+        self.current = local + self.carry * beta ** (self.position + 1)
+        self.position += 1
+        blockSize = Indicators.getBlockSize(beta)
+        if self.position == blockSize:
+            self.carry = beta ** blockSize * self.carry + local
+            self.blockTotal = 0.0
+            self.position = 0
+        return self.current
+
+
+def getRollingStd(window, mean):
+    """Module level method to get the population std of a window
+
+    The squared deviations are added up oldest first, as in
+    FeatureEngine.rollingStd().
+    """
+    squares = 0.0
+    for value in window:
+        deviation = value - mean
+        squares = squares + deviation * deviation
+    return math.sqrt(squares / len(window))
+
+
+class SMA(StreamingIndicator):
+    def __init__(self, n):
+        self.mean = RunningMean(n)
+
+    def update(self, bar):
+        return self.mean.update(bar["close"])
+
+
+class EMA(StreamingIndicator):
+    def __init__(self, n):
+        self.smoother = Smoother(n, 2.0 / (n + 1))
+
+    def update(self, bar):
+        return self.smoother.update(bar["close"])
+
+
+class RSI(StreamingIndicator):
+    def __init__(self, n):
+        self.previous = None
+        self.gains = Smoother(n, 1.0 / n)
+        self.losses = Smoother(n, 1.0 / n)
+
+    def update(self, bar):
+        close = bar["close"]
+        if self.previous is None:
+            self.previous = close
+            return NAN
+        diff = close - self.previous
+        self.previous = close
+        avgGain = self.gains.update(diff if diff > 0 else 0.0)
+        avgLoss = self.losses.update(-diff if diff < 0 else 0.0)
+        if avgLoss == 0 and not math.isnan(avgGain):
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avgGain / avgLoss)
+
+
+class MACD(StreamingIndicator):
+    """The MACD line, signal and histogram of the close
+
+    Attributes
+    ----------
+    output: str
+        Which of "macd", "macdsignal" or "macdhist" update() returns
+    """
+    def __init__(self, fast, slow, signal, output="macd"):
+        self.output = output
+        self.fast = Smoother(fast, 2.0 / (fast + 1))
+        self.slow = Smoother(slow, 2.0 / (slow + 1))
+        self.signal = Smoother(signal, 2.0 / (signal + 1))
+
+    def update(self, bar):
+        line = self.fast.update(bar["close"]) - self.slow.update(bar["close"])
+        signal = self.signal.update(line)
+        if self.output == "macdsignal":
+            return signal
+        if self.output == "macdhist":
+            return line - signal
+        return line
+
+
+class Bollinger(StreamingIndicator):
+    """A Bollinger band of the close
+
+    Attributes
+    ----------
+    output: str
+        Which of "bbupper", "bbmid" or "bblower" update() returns
+    """
+    def __init__(self, n, k=2, output="bbmid"):
+        self.k = k
+        self.output = output
+        self.mean = RunningMean(n)
+        self.window = collections.deque(maxlen=n)
+
+    def update(self, bar):
+        self.window.append(bar["close"])
+        mean = self.mean.update(bar["close"])
+        if self.output == "bbmid" or math.isnan(mean):
+            return mean
+        std = getRollingStd(self.window, mean)
+        if self.output == "bbupper":
+            return mean + self.k * std
+        return mean - self.k * std
+
+
+class ATR(StreamingIndicator):
+    def __init__(self, n):
+        self.previous = None
+        self.smoother = Smoother(n, 1.0 / n)
+
+    def update(self, bar):
+        trueRange = bar["high"] - bar["low"]
+        if self.previous is not None:
+            trueRange = max(trueRange, max(abs(bar["high"] - self.previous),
+                                           abs(bar["low"] - self.previous)))
+        self.previous = bar["close"]
+        return self.smoother.update(trueRange)
+
+
+class VWAP(StreamingIndicator):
+    def __init__(self):
+        self.day = None
+        self.totalPV = 0.0
+        self.totalVolume = 0.0
+
+    def update(self, bar):
+        day = str(pd.Timestamp(bar["date"]).date())
+        if day != self.day:
+            self.day = day
+            self.totalPV = 0.0
+            self.totalVolume = 0.0
+        typical = (bar["high"] + bar["low"] + bar["close"]) / 3.0
+        self.totalPV += typical * bar["volume"]
+        self.totalVolume += bar["volume"]
+        if self.totalVolume > 0:
+            return self.totalPV / self.totalVolume
+        return typical
+
+
+class Volatility(StreamingIndicator):
+    def __init__(self, n):
+        self.n = n
+        self.previous = None
+        # the batch engine counts the missing first return as 0
+        self.mean = RunningMean(n)
+        self.window = collections.deque(maxlen=n)
+
+    def update(self, bar):
+        close = bar["close"]
+        if self.previous is None:
+            self.previous = close
+            self.mean.update(0.0)
+            return NAN
+        value = close / self.previous - 1.0
+        self.previous = close
+        self.window.append(value)
+        mean = self.mean.update(value)
+        if self.mean.count <= self.n:
+            return NAN
+        return getRollingStd(self.window, mean)
+
+
+class Returns(StreamingIndicator):
+    def __init__(self, n):
+        self.closes = collections.deque(maxlen=n)
+
+    def update(self, bar):
+        close = bar["close"]
+        value = NAN
+        if len(self.closes) == self.closes.maxlen:
+            value = close / self.closes[0] - 1.0
+        self.closes.append(close)
+        return value
+
+
+# the streaming version of each indicator in Core.Indicators
+streamingIndicators = {
+    "sma": SMA,
+    "ema": EMA,
+    "rsi": RSI,
+    "macd": lambda fast, slow, signal: MACD(fast, slow, signal, "macd"),
+    "macdsignal": lambda fast, slow, signal: MACD(fast, slow, signal,
+                                                  "macdsignal"),
+    "macdhist": lambda fast, slow, signal: MACD(fast, slow, signal,
+                                                "macdhist"),
+    "bbupper": lambda n, k: Bollinger(n, k, "bbupper"),
+    "bbmid": lambda n: Bollinger(n, output="bbmid"),
+    "bblower": lambda n, k: Bollinger(n, k, "bblower"),
+    "atr": ATR,
+    "vwap": VWAP,
+    "volatility": Volatility,
+    "returns": Returns,
+}
+
+
+class StreamingFeatures():
+    """Keeps the streaming state of every feature of a ticker
+
+    Raw OHLCV features are passed through and indicator features are
+    updated with their streaming indicator.
+
+    Attributes
+    ----------
+    features: list
+        The names of the features
+    indicators: dict
+        The streaming indicator of each indicator feature
+    lastDate: pandas.Timestamp
+        The date of the last bar processed
+    """
+    def __init__(self, features):
+        self.features = features
+        self.indicators = {}
+        self.lastDate = None
+        for feature in features:
+            if Indicators.isIndicator(feature):
+                name, params = Indicators.parseFeature(feature)
+                self.indicators[feature] = streamingIndicators[name](*params)
+
+    def update(self, bar):
+        """Method to process a new bar
+
+        Parameters
+        ----------
+        bar: dict
+            The bar, with the lower case keys open, high, low, close, volume
+            and date
+
+        Returns
+        -------
+        values: list
+            The value of each feature at this bar
+        """
+        values = []
+        for feature in self.features:
+            if feature in self.indicators:
+                values.append(self.indicators[feature].update(bar))
+            else:
+                values.append(float(bar[feature.lower()]))
+        self.lastDate = pd.Timestamp(bar["date"])
+        return values
+
+    def updateFrame(self, data):
+        """Method to process the new bars of a dataframe
+
+        Bars that are not newer than the last processed bar are skipped.
+
+        Parameters
+        ----------
+        data: pandas.DataFrame
+            The raw OHLCV bars
+
+        Returns
+        -------
+        features: pandas.DataFrame
+            The float64 features of the new bars
+        """
+        if self.lastDate is not None:
+            data = data[data.index > self.lastDate]
+        columns = {column.lower(): data[column].values.astype(float).tolist()
+                   for column in data.columns}
+        rows = []
+        for i, date in enumerate(data.index):
+            bar = {name: values[i] for name, values in columns.items()}
+            bar["date"] = date
+            rows.append(self.update(bar))
+        return pd.DataFrame(rows, index=data.index, columns=self.features,
+                            dtype=float)
+
+    def getState(self):
+        """Returns the state of all the features
+
+        Returns
+        -------
+        state: dict
+            The JSON serializable state
+        """
+        lastDate = None if self.lastDate is None else str(self.lastDate)
+        return {"features": self.features, "lastDate": lastDate,
+                "indicators": {feature: indicator.getState()
+                               for feature, indicator
+                               in self.indicators.items()}}
+
+    def setState(self, state):
+        """Method to restore the state of all the features
+
+        Parameters
+        ----------
+        state: dict
+            A state returned by getState()
+        """
+        if state["features"] != self.features:
+            raise Exception("The state is of different features")
+        self.lastDate = None
+        if state["lastDate"] is not None:
+            self.lastDate = pd.Timestamp(state["lastDate"])
+        for feature, indicatorState in state["indicators"].items():
+            self.indicators[feature].setState(indicatorState)
+
+    def save(self, path):
+        with open(path, "w+") as f:
+            json.dump(self.getState(), f)
+
+    def load(self, path):
+        with open(path) as f:
+            self.setState(json.load(f))
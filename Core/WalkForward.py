@@ -0,0 +1,272 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from Core.Scalers import getScaler
+
+# the variables that cap the threads of numpy and tensorflow in a worker
+THREAD_VARIABLES = ["OMP_NUM_THREADS", "MKL_NUM_THREADS",
+                    "OPENBLAS_NUM_THREADS", "TF_NUM_INTRAOP_THREADS",
+                    "TF_NUM_INTEROP_THREADS"]
+
+
+def getFolds(length, numFolds=5, mode="expanding", trainSize=None,
+             testSize=None, gap=0):
+    """Module level method to split a series into walk-forward folds
+
+    The test ranges follow each other to the end of the series, and each
+    fold trains on the bars before its test range. With an expanding window
+    every fold trains from the first bar, with a rolling window each fold
+    trains on the trainSize bars before its test range.
+
+    Parameters
+    ----------
+    length: int
+        The number of bars in the series
+    numFolds: int, optional
+        The number of folds
+    mode: str, optional
+        Either expanding or rolling
+    trainSize: int, optional
+        The number of training bars of a rolling window. By default, the
+        training bars of the first fold
+    testSize: int, optional
+        The number of test bars of each fold. By default the series is split
+        into numFolds + 1 equal parts, the first of which is only trained on
+    gap: int, optional
+        The number of bars left out between the training and test bars
+
+    Returns
+    -------
+    folds: list
+        The (train, test) slices of each fold
+    """
+    if mode not in ["expanding", "rolling"]:
+        raise Exception("mode must be expanding or rolling")
+    if testSize is None:
+        testSize = (length - gap) // (numFolds + 1)
+    firstEnd = length - gap - numFolds * testSize
+    if testSize < 1 or firstEnd < 1:
+        message = "{} bars are too few for {} folds"
+        raise Exception(message.format(length, numFolds))
+    if trainSize is None:
+        trainSize = firstEnd
+    folds = []
+    for i in range(numFolds):
+        trainEnd = firstEnd + i * testSize
+        trainStart = 0
+        if mode == "rolling":
+            trainStart = max(0, trainEnd - trainSize)
+        testStart = trainEnd + gap
+        folds.append((slice(trainStart, trainEnd),
+                      slice(testStart, testStart + testSize)))
+    return folds
+
+
+def limitThreads(threads):
+    """Module level method to cap the threads of a worker
+
+    This is the initializer of the worker processes, so only the
+    environment of the worker is changed. tensorflow reads these variables
+    when it is imported, which trainFold() does after this has run. numpy
+    is already imported by then, as this module needs it, so it keeps the
+    threads it started with.
+
+    Parameters
+    ----------
+    threads: int
+        The number of threads the worker may use
+    """
+    for name in THREAD_VARIABLES:
+        os.environ[name] = str(threads)
+
+
+def getFoldDatasets(dataProcessor, folds, fold, batchSize=64):
+    """Module level method to build the datasets of a fold
+
+    Each ticker contributes the windows of its own training and test
+    slices. The test windows start lookBack bars before the test slice, so
+    that the first test window predicts its first bar. Scalers are fitted on
+    the training bars of the fold only.
+
+    Parameters
+    ----------
+    dataProcessor: Core.DataProcessor
+        The data processor of the model
+    folds: dict
+        The folds of each ticker, see getFolds()
+    fold: int
+        The position of the fold
+    batchSize: int, optional
+        The number of windows in a batch
+
+    Returns
+    -------
+    trainDS: tf.data.Dataset
+        The shuffled training batches
+    testDS: tf.data.Dataset
+        The test batches
+    """
+    from tensorflow import data as DS
+
+    lookBack = getattr(dataProcessor, "lookBack", 0)
+    trainSets = []
+    testSets = []
+    for ticker, tickerFolds in folds.items():
+        trainSlice, testSlice = tickerFolds[fold]
+        data = dataProcessor.tickerData[ticker]
+        train = data.iloc[trainSlice]
+        test = data.iloc[max(0, testSlice.start - lookBack):testSlice.stop]
+        if dataProcessor.scaler is not None:
+            scaler = getScaler(dataProcessor.scaler).fit(train.values)
+            dataProcessor.scalers[ticker] = scaler
+        context = {"isTrain": True, "ticker": ticker}
+        for part, datasets in [(train, trainSets), (test, testSets)]:
+            processed = dataProcessor.inputProcessor(part, context)
+            if not isinstance(processed, DS.Dataset):
+                processed = DS.Dataset.from_tensor_slices(processed)
+            datasets.append(processed)
+    trainDS = dataProcessor.interleaveDatasets(trainSets)
+    trainDS = trainDS.shuffle(10000, reshuffle_each_iteration=True)
+    testDS = dataProcessor.interleaveDatasets(testSets)
+    trainDS = trainDS.batch(batchSize).prefetch(DS.AUTOTUNE)
+    testDS = testDS.batch(batchSize).prefetch(DS.AUTOTUNE)
+    return trainDS, testDS
+
+
+def trainFold(modelClass, dataProcessor, tickerData, folds, fold, epochs,
+              batchSize, learningRate, threads):
+    """Module level method training and testing the model of one fold
+
+    This runs in a worker process, where the data processor arrives without
+    its ticker data. The ticker data the folds were made from is passed in
+    and set on the processor, rather than read again from the store, which
+    may have new bars since.
+
+    Returns
+    -------
+    result: dict
+        The fold, the number of training and test bars, and the test
+        metrics of the model
+    """
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+    dataProcessor.tickerData = tickerData
+    trainDS, testDS = getFoldDatasets(dataProcessor, folds, fold, batchSize)
+    model = modelClass()
+    model.assignDataProcessor(dataProcessor)
+    model.buildModel(learningRate)
+    model.model.fit(trainDS, epochs=epochs, verbose=0)
+    metrics = model.model.evaluate(testDS, verbose=0, return_dict=True)
+    result = {"fold": fold,
+              "trainBars": sum(tickerFolds[fold][0].stop -
+                               tickerFolds[fold][0].start
+                               for tickerFolds in folds.values()),
+              "testBars": sum(tickerFolds[fold][1].stop -
+                              tickerFolds[fold][1].start
+                              for tickerFolds in folds.values())}
+    result.update({name: float(value) for name, value in metrics.items()})
+    return result
+
+
+class WalkForward():
+    """Walk-forward validation of a forecaster
+
+    The bars of each ticker are split into folds with getFolds(), and a new
+    model is trained and tested on every fold. The folds are trained at the
+    same time in worker processes, each capped to a number of threads so
+    that the workers don't compete for the cores.
+
+    Attributes
+    ----------
+    modelClass: class
+        The forecaster, a child of Core.ForecasterBase.RegressorBase
+    dataProcessor: Core.DataProcessor
+        The data processor of the forecaster
+    numFolds: int
+        The number of folds
+    mode: str
+        Either expanding or rolling, see getFolds()
+    trainSize: int
+        The number of training bars of a rolling window
+    testSize: int
+        The number of test bars of each fold
+    gap: int
+        The number of bars left out between the training and test bars
+    """
+    def __init__(self, modelClass, dataProcessor, numFolds=5,
+                 mode="expanding", trainSize=None, testSize=None, gap=0):
+        self.modelClass = modelClass
+        self.dataProcessor = dataProcessor
+        self.numFolds = numFolds
+        self.mode = mode
+        self.trainSize = trainSize
+        self.testSize = testSize
+        self.gap = gap
+
+    def getFolds(self):
+        """Returns the folds of every ticker
+
+        Returns
+        -------
+        folds: dict
+            The (train, test) slices of each fold of each ticker
+        """
+        tickerData = self.dataProcessor.tickerData
+        return {ticker: getFolds(len(tickerData[ticker]), self.numFolds,
+                                 self.mode, self.trainSize, self.testSize,
+                                 self.gap)
+                for ticker in self.dataProcessor.tickers
+                if ticker in tickerData}
+
+    def evaluate(self, epochs=100, batchSize=64, learningRate=None,
+                 maxWorkers=None, threadsPerWorker=None):
+        """Method to train and test a model on every fold
+
+        Parameters
+        ----------
+        epochs: int, optional
+            The number of epochs each model is trained for
+        batchSize: int, optional
+            The number of windows in a batch
+        learningRate: float, optional
+            The learning rate passed to buildModel
+        maxWorkers: int, optional
+            The number of folds trained at the same time. By default, as
+            many as there are cores, up to the number of folds
+        threadsPerWorker: int, optional
+            The number of threads each worker may use. By default the cores
+            are shared equally between the workers
+
+        Returns
+        -------
+        results: pandas.DataFrame
+            The test metrics of each fold, followed by their mean and
+            standard deviation
+        """
+        folds = self.getFolds()
+        if len(folds) == 0:
+            raise Exception("No ticker data to validate on")
+        cores = os.cpu_count() or 1
+        if maxWorkers is None:
+            maxWorkers = min(self.numFolds, cores)
+        if threadsPerWorker is None:
+            threadsPerWorker = max(1, cores // maxWorkers)
+        tickerData = {ticker: self.dataProcessor.tickerData[ticker]
+                      for ticker in folds}
+        # tensorflow is not safe to fork, so the workers start afresh
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=maxWorkers, mp_context=context,
+                                 initializer=limitThreads,
+                                 initargs=(threadsPerWorker,)) as executor:
+            futures = [executor.submit(trainFold, self.modelClass,
+                                       self.dataProcessor, tickerData, folds,
+                                       fold, epochs, batchSize, learningRate,
+                                       threadsPerWorker)
+                       for fold in range(self.numFolds)]
+            results = [future.result() for future in futures]
+        results = pd.DataFrame(results).set_index("fold")
+        summary = results.agg(["mean", "std"])
+        return pd.concat([results, summary])
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def getWindows(values, length, shift=1):
+    """Module level method to split an array into windows without copying
+
+    The windows are a read-only strided view of values, so no matter how
+    much they overlap they take up no extra memory. Trailing values that do
+    not fill a whole window are left out.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        The values, with time along the first axis
+    length: int
+        The number of values in each window
+    shift: int, optional
+        The number of values between the starts of consecutive windows
+
+    Returns
+    -------
+    windows: numpy.ndarray
+        The view of shape (windows, length) followed by the shape of each
+        value
+    """
+    values = np.asarray(values)
+    if length < 1 or shift < 1:
+        raise Exception("The window length and shift must be positive")
+    count = 0
+    if len(values) >= length:
+        count = (len(values) - length) // shift + 1
+    shape = (count, length) + values.shape[1:]
+    strides = (values.strides[0] * shift,) + values.strides
+    return np.lib.stride_tricks.as_strided(values, shape=shape,
+                                           strides=strides, writeable=False)
+
+
+def getTrainingWindows(values, lookBack, forecast, shift=1,
+                       isSeq2Seq=False, target=None):
+    """Module level method to split an array into inputs and targets
+
+    Both are read-only views of values, see getWindows().
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        The values, with time along the first axis
+    lookBack: int
+        The number of values in each input
+    forecast: int
+        The number of values ahead that are predicted
+    shift: int, optional
+        The number of values between the starts of consecutive windows
+    isSeq2Seq: bool, optional
+        Whether the target of an input is the input shifted forecast values
+        ahead, instead of the forecast values after it
+    target: int, optional
+        The column of values that is predicted. If None, the targets hold
+        every column
+
+    Returns
+    -------
+    X: numpy.ndarray
+        The inputs, of shape (windows, lookBack) followed by the shape of
+        each value
+    Y: numpy.ndarray
+        The targets, of shape (windows, lookBack) if isSeq2Seq and
+        (windows, forecast) otherwise, followed by the shape of each target
+    """
+    windows = getWindows(values, lookBack + forecast, shift)
+    X = windows[:, :lookBack]
+    targets = windows if target is None else windows[:, :, target]
+    if isSeq2Seq:
+        Y = targets[:, forecast:]
+    else:
+        Y = targets[:, lookBack:]
+    return X, Y
@@ -1,9 +1,13 @@
 import yfinance as yf
 from lxml.html import fromstring
-import random
-import requests
-import os
 import pandas as pd
+import numpy as np
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from DataStore.TickStore import TickStore
+from DataStore.SessionPool import ProxyPool, getSharedSession
+from DataStore import RateLimiter
 
 
 class YFinance():
@@ -22,11 +26,27 @@ class YFinance():
         A string indicating which exchange we want to get the stock data from
     intraDayIntervals: list
         A list of intervals supported by this API
-    proxyList: list
-        A list of proxy addresses
+    proxyPool: DataStore.SessionPool.ProxyPool
+        The pool of validated proxies, scored by their health
+    session: requests.Session
+        The keep-alive session used for all requests. If None, the process
+        wide shared session is used. This can also be used to point the API
+        at a local stand-in source
+    maxAttempts: int
+        The number of times a request is tried before giving up
+    backoff: float
+        The base delay in seconds between attempts, doubled after each
+        failed attempt
     """
-    def __init__(self, autoRotate=False, exchange="NSE"):
+    def __init__(self, autoRotate=False, exchange="NSE", session=None,
+                 maxAttempts=5, backoff=1.0):
         self.autoRotate = autoRotate
+        if session is None:
+            # getData() retries with its own backoff and proxy rotation
+            session = getSharedSession(retries=0)
+        self.session = session
+        self.maxAttempts = maxAttempts
+        self.backoff = backoff
 
         if exchange == "NSE":
             self.suffix = ".NS"
@@ -34,7 +54,8 @@ class YFinance():
             self.suffix = ""
 
         if self.autoRotate:
-            self.proxyList = self.getProxies()
+            self.proxyPool = ProxyPool(self.getProxies())
+            self.proxyPool.validate()
 
         self.intraDayIntervals = ["1m", "2m", "5m", "15m", "30m", "1h"]
 
@@ -54,8 +75,7 @@ class YFinance():
         data: pandas.DataFrame
             The dataframe object of the raw ticker data
         """
-        tickerSymbol = ticker+self.suffix
-        tickerObj = yf.Ticker(tickerSymbol)
+        tickerObj = self.getTickerObj(ticker)
         interval = "1d"
 
         if start is None:
@@ -83,8 +103,7 @@ class YFinance():
         data: pandas.DataFrame
             The dataframe object of the raw ticker data
         """
-        tickerSymbol = ticker + self.suffix
-        tickerObj = yf.Ticker(tickerSymbol)
+        tickerObj = self.getTickerObj(ticker)
 
         if interval == "1m":
             period = "7d"
@@ -93,9 +112,33 @@ class YFinance():
         args = {"period": period, "interval": interval}
         return self.getData(tickerObj, args)[:-1]
 
+    def getTickerObj(self, ticker):
+        """Method to get the yfinance Ticker object for a stock
+
+        Parameters
+        ----------
+        ticker: str
+            The name of the stock
+
+        Returns
+        -------
+        tickerObj: yfinance.Ticker
+            The ticker object of the yfinance module
+        """
+        tickerSymbol = ticker + self.suffix
+        return yf.Ticker(tickerSymbol, session=self.session)
+
     def getData(self, tickerObj, arguments):
         """Method to get the raw ticker data
 
+        A failed request is retried up to self.maxAttempts times with an
+        exponential backoff. This is the only layer that retries, as the
+        shared session of this source doesn't retry on its own. When
+        autoRotate is on, every attempt picks a proxy from the pool and
+        reports back how it performed. Every attempt waits for a token from
+        the process wide rate limiter of this source, which is shared by all
+        YFinance instances.
+
         Parameters
         ----------
         tickerObj: yfinance.Ticker
@@ -109,37 +152,148 @@ class YFinance():
         data: pandas.DataFrame
             The dataframe of the raw ticker data
         """
-        if self.autoRotate:
-            proxy = random.choice(self.proxyList)
-        else:
-            proxy = None
-            return tickerObj.history(proxy=proxy, **arguments)
-        while True:
+        proxy = None
+        limiter = RateLimiter.getRateLimiter("YFinance",
+                                             arguments.get("interval"))
+        for attempt in range(self.maxAttempts):
+            limiter.acquire()
+            if self.autoRotate:
+                proxy = self.proxyPool.choose()
+            start = time.time()
             try:
                 data = tickerObj.history(proxy=proxy, **arguments)
-                break
             except Exception as e:
                 print(e)
-                self.proxyList.remove(proxy)
-                proxy = random.choice(self.proxyList)
-        return data
+                if self.autoRotate:
+                    self.proxyPool.reportFailure(proxy)
+                if attempt < self.maxAttempts - 1:
+                    time.sleep(self.backoff * 2 ** attempt)
+                continue
+            if self.autoRotate:
+                self.proxyPool.reportSuccess(proxy, time.time() - start)
+            return data
+        message = "Could not get data for {} after {} attempts"
+        raise Exception(message.format(tickerObj.ticker, self.maxAttempts))
 
-    def saveIntraDay(self, ticker, start=None, savePath="DataStore/StockData"):
+    def saveIntraDay(self, ticker, start=None, savePath="DataStore/StockData",
+                     overlap=5):
         """Method to save the ticker data to a specified location
 
+        If data for the ticker is already saved, only the bars after the last
+        saved bar are requested and appended. The last few saved bars are
+        requested again so that revisions can be detected, see
+        reconcileBars(). The saved history is only rewritten when one of
+        those bars changed, otherwise the new bars are appended with
+        TickStore.append().
+
         Parameters
         ----------
         ticker: str
             The name of the stock
         start: str, optional
             A date indicating from which day we need the data. If None,
-            returns the entire historical data
+            the data after the last saved bar is fetched, or the entire
+            historical data if nothing has been saved yet
+        savePath: str, optional
+            The location at which the data is to be saved
+        overlap: int, optional
+            The number of saved bars that are fetched again to check for
+            revisions
+        """
+        store = TickStore(savePath)
+        oldData = None
+        if store.exists(ticker, "1D"):
+            if start is None:
+                # only the last bars are needed to check for revisions
+                oldData = store.readTail(ticker, "1D", overlap + 1)
+            else:
+                oldData = store.read(ticker, "1D")
+            if start is None and len(oldData) > overlap:
+                start = str(oldData.index[-overlap].date())
+
+        data = self.getIntraDay(ticker, start=start)
+        data.index.names = ["Date"]
+        if oldData is not None and len(oldData) > 0:
+            if len(data) == 0:
+                return
+            merged = self.reconcileBars(oldData, data)
+            if merged is None:
+                # the history was revised (split/dividend adjustment), so
+                # it has to be fetched again entirely
+                data = self.getIntraDay(ticker, start=None)
+                data.index.names = ["Date"]
+            elif self.isAppendOnly(oldData, data):
+                store.append(ticker, "1D", data)
+                return
+            else:
+                # a saved bar was updated, usually the last one if it was
+                # saved before the session closed
+                data = self.reconcileBars(store.read(ticker, "1D"), data)
+        store.write(ticker, "1D", data)
+
+    def isAppendOnly(self, oldData, newData):
+        """Method to check whether new bars only add to the saved bars
+
+        Parameters
+        ----------
+        oldData: pandas.DataFrame
+            The saved bars
+        newData: pandas.DataFrame
+            The newly fetched bars
+
+        Returns
+        -------
+        isAppendOnly: bool
+            True if every saved bar from the first new timestamp onwards was
+            fetched again unchanged
+        """
+        overlap = oldData.index[oldData.index >= newData.index[0]]
+        if not overlap.isin(newData.index).all():
+            return False
+        columns = [column for column in oldData.columns
+                   if column in newData.columns]
+        oldValues = oldData.loc[overlap, columns].values.astype(np.float64)
+        newValues = newData.loc[overlap, columns].values.astype(np.float64)
+        return np.allclose(oldValues, newValues, rtol=1e-6, equal_nan=True)
+
+    def reconcileBars(self, oldData, newData,
+                      priceColumns=["Open", "High", "Low", "Close"]):
+        """Method to merge newly fetched bars into the saved bars
+
+        The new bars replace every saved bar from the first new timestamp
+        onwards. The bars present in both are compared first; if any of them
+        except the last saved bar (which may have been saved before the
+        session closed) has different prices, the saved history has been
+        revised by the source and cannot be merged.
+
+        Parameters
+        ----------
+        oldData: pandas.DataFrame
+            The saved bars
+        newData: pandas.DataFrame
+            The newly fetched bars
+        priceColumns: list, optional
+            The columns that are compared to detect revisions
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The merged bars, or None if the saved bars were revised
         """
-        data = self.getIntraDay(ticker, start=None)
-        if not os.path.isdir(savePath+"/1D"):
-            os.mkdir(savePath+"/1D")
-        savePath = savePath + "/1D/{}.csv".format(ticker)
-        data.to_csv(savePath)
+        overlap = oldData.index[(oldData.index >= newData.index[0]) &
+                                (oldData.index < oldData.index[-1])]
+        overlap = overlap.intersection(newData.index)
+        columns = [column for column in priceColumns
+                   if column in oldData.columns and
+                   column in newData.columns]
+        if len(overlap) > 0 and len(columns) > 0:
+            oldValues = oldData.loc[overlap, columns].values
+            newValues = newData.loc[overlap, columns].values
+            if not np.allclose(oldValues, newValues, rtol=1e-6,
+                               equal_nan=True):
+                return None
+        oldData = oldData[oldData.index < newData.index[0]]
+        return pd.concat([oldData, newData])
 
     def saveInterDay(self, ticker, interval, savePath="DataStore/StockData"):
         """Method to save the interday data to a specified location
@@ -153,21 +307,78 @@ class YFinance():
             intervals are in the self.intraDayIntervals object.
 
         """
-        savePath = savePath + "/{}".format(interval).upper()
-        if not os.path.isdir(savePath):
-            os.mkdir(savePath)
         data = self.getInterDay(ticker, interval)
         data.index.names = ["Date"]
-        savePath = savePath + "/{}.csv".format(ticker)
-        if os.path.isfile(savePath):
-            # append to existing file
-            oldData = pd.read_csv(savePath, index_col="Date",
-                                  parse_dates=["Date"])
-            oldData = oldData.sort_index(ascending=True)
-            data = data[data.index > oldData.index[-1]]
-            data = pd.concat([oldData, data])
+        # only the bars newer than the saved ones are written
+        TickStore(savePath).append(ticker, interval, data)
+
+    def saveMany(self, tickers, interval, savePath="DataStore/StockData",
+                 maxWorkers=8):
+        """Method to download and save the data for many tickers at once
+
+        Each ticker is fetched and written by a worker of a bounded thread
+        pool. A failure for one ticker does not stop the others, it is
+        collected in the returned report instead.
+
+        Parameters
+        ----------
+        tickers: list
+            A list of stock names
+        interval: str
+            The interval width of the data. 1d saves the entire daily
+            history, the others are the ones in self.intraDayIntervals
+        savePath: str, optional
+            The location at which the data is to be saved
+        maxWorkers: int, optional
+            The maximum number of tickers that are fetched concurrently
+
+        Returns
+        -------
+        report: dict
+            A dictionary with the following keys
+                1. "saved": A list of the tickers that were saved
+                2. "failed": A dictionary of the error message for each
+                             ticker that failed
+                3. "duration": The time taken in seconds
+        """
+        interval = interval.lower()
+        start = time.time()
+        report = {"saved": [], "failed": {}}
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            futures = {}
+            for ticker in tickers:
+                if interval == "1d":
+                    future = executor.submit(self.saveIntraDay, ticker,
+                                             savePath=savePath)
+                else:
+                    future = executor.submit(self.saveInterDay, ticker,
+                                             interval, savePath=savePath)
+                futures[future] = ticker
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    future.result()
+                    report["saved"].append(ticker)
+                except Exception as e:
+                    report["failed"][ticker] = "{}: {}".format(
+                        e.__class__.__name__, e)
+        report["duration"] = time.time() - start
+        return report
 
-        data.to_csv(savePath)
+    def printReport(self, report):
+        """Method to print the summary of a saveMany() call
+
+        Parameters
+        ----------
+        report: dict
+            The report returned by saveMany()
+        """
+        total = len(report["saved"]) + len(report["failed"])
+        summary = "Saved {}/{} tickers in {:.2f} seconds"
+        print(summary.format(len(report["saved"]), total,
+                             report["duration"]))
+        for ticker, error in report["failed"].items():
+            print("Failed {}: {}".format(ticker, error))
 
     def getProxies(self, num=20):
         """Method to scrape/load the list of valid proxies
@@ -177,6 +388,9 @@ class YFinance():
         num: int
             The number of proxy addresses to scrape
 
+        The scraped proxies are only candidates, they are validated by the
+        proxy pool before being used.
+
         Returns
         -------
         proxyList: list
@@ -190,10 +404,290 @@ class YFinance():
         #             proxyList.append(line.strip())
         #     return proxyList
         url = 'https://free-proxy-list.net/'
-        response = requests.get(url)
+        response = self.session.get(url)
         parser = fromstring(response.text)
         for i in parser.xpath('//tbody/tr')[:num]:
             proxy = ":".join([i.xpath('.//td[1]/text()')[0],
                               i.xpath('.//td[2]/text()')[0]])
             proxyList.append(proxy)
         return proxyList
+
+
+class ReplayClock():
+    """A clock for driving offline data sources
+
+    The clock starts at a given time and moves forward at speed times the
+    real time. It can also be moved forward by hand, which is how minute
+    interval jobs can be run much faster than real time.
+
+    Attributes
+    ----------
+    start: pandas.Timestamp
+        The time at which the clock started
+    speed: float
+        How many seconds of clock time pass in one real second. A speed of
+        0 means the clock only moves when advance() is called
+    offset: pandas.Timedelta
+        The total time the clock was moved forward by hand
+    """
+    def __init__(self, start=None, speed=1.0, tz="Asia/Kolkata"):
+        if start is None:
+            start = pd.Timestamp.now(tz=tz)
+        start = pd.Timestamp(start)
+        if start.tz is None:
+            start = start.tz_localize(tz)
+        self.start = start
+        self.speed = speed
+        self.offset = pd.Timedelta(0)
+        self.wallStart = time.time()
+
+    def now(self):
+        """Returns the current time of the clock
+
+        Returns
+        -------
+        now: pandas.Timestamp
+            The current clock time
+        """
+        elapsed = (time.time() - self.wallStart) * self.speed
+        return self.start + pd.Timedelta(seconds=elapsed) + self.offset
+
+    def advance(self, delta):
+        """Moves the clock forward
+
+        Parameters
+        ----------
+        delta: str or pandas.Timedelta
+            The amount by which the clock is moved, for example "5min"
+        """
+        self.offset += pd.Timedelta(delta)
+
+
+class ReplaySource(YFinance):
+    """An offline data source with the same interface as YFinance
+
+    Bars are served from a local tick store if present, and are otherwise
+    generated by a deterministic random walk seeded by the ticker, so the
+    same ticker always gets the same bars. No bars after the replay clock's
+    current time are ever returned, so scheduled jobs see the data appear
+    bar by bar as the clock is advanced.
+
+    Attributes
+    ----------
+    dataPath: str
+        The location of a tick store to replay the data from. If None, all
+        the data is synthetic
+    clock: ReplayClock
+        The clock deciding which bars are available
+    syntheticStart: str
+        The date of the first synthetic daily bar
+    sessionStart: str
+        The time at which the synthetic trading session opens
+    sessionMinutes: int
+        The length of the synthetic trading session in minutes
+    """
+    def __init__(self, dataPath=None, clock=None, exchange="NSE",
+                 syntheticStart="2000-01-03"):
+        self.autoRotate = False
+        self.session = None
+        self.suffix = ".NS" if exchange == "NSE" else ""
+        self.intraDayIntervals = ["1m", "2m", "5m", "15m", "30m", "1h"]
+        self.dataPath = dataPath
+        self.store = TickStore(dataPath) if dataPath else None
+        self.clock = clock if clock is not None else ReplayClock()
+        self.syntheticStart = syntheticStart
+        self.sessionStart = "09:15"
+        self.sessionMinutes = 375
+
+    def getIntraDay(self, ticker, start=None):
+        now = self.clock.now()
+        if self.store is not None and self.store.exists(ticker, "1D"):
+            data = self.store.read(ticker, "1D")
+        else:
+            data = self.getSyntheticDaily(ticker, now)
+        # only the bars of sessions that have closed are available
+        sessionEnd = pd.Timedelta(self.sessionStart + ":00") + \
+            pd.Timedelta(minutes=self.sessionMinutes)
+        data = data[data.index + sessionEnd <= self.getClockTime(data.index)]
+        if start is not None:
+            data = data[data.index.date >= pd.Timestamp(start).date()]
+        return data
+
+    def getInterDay(self, ticker, interval):
+        now = self.clock.now()
+        if interval == "1m":
+            period = pd.Timedelta(days=7)
+        else:
+            period = pd.Timedelta(days=60)
+        barLength = self.getBarLength(interval)
+        if self.store is not None and self.store.exists(ticker, interval):
+            data = self.store.read(ticker, interval)
+        else:
+            data = self.getSyntheticInterDay(ticker, interval, now - period,
+                                             now)
+        # only complete bars are available
+        now = self.getClockTime(data.index)
+        data = data[(data.index > now - period) &
+                    (data.index + barLength <= now)]
+        return data
+
+    def getClockTime(self, index):
+        """Returns the clock time in the timezone of an index
+
+        Stored data may have a naive index, in the exchange's local time,
+        which can't be compared with the timezone aware clock.
+
+        Parameters
+        ----------
+        index: pandas.DatetimeIndex
+            The index the clock time is compared with
+
+        Returns
+        -------
+        now: pandas.Timestamp
+            The current clock time, naive if the index is naive
+        """
+        now = self.clock.now()
+        if index.tz is None:
+            return now.tz_localize(None)
+        return now.tz_convert(index.tz)
+
+    def getBarLength(self, interval):
+        if interval.endswith("h"):
+            return pd.Timedelta(hours=int(interval[:-1]))
+        return pd.Timedelta(minutes=int(interval[:-1]))
+
+    def getSeed(self, *keys):
+        key = "/".join(str(key) for key in keys).encode("utf-8")
+        return zlib.crc32(key)
+
+    def getSyntheticDaily(self, ticker, end):
+        """Generates the daily bars of a ticker up to a given time
+
+        Each series (returns, noise, volume and the open jitter) has its own
+        generator, seeded by the ticker and the series, and draws its values
+        in order from the first day. So the bars of a day never change as
+        more days are generated.
+
+        Parameters
+        ----------
+        ticker: str
+            The name of the stock
+        end: pandas.Timestamp
+            The time up to which the bars are generated
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The synthetic daily bars
+        """
+        dates = pd.bdate_range(self.syntheticStart, end.tz_localize(None),
+                               normalize=True, name="Date")
+        dates = dates.tz_localize(end.tz)
+        def getRandom(series):
+            return np.random.RandomState(self.getSeed(ticker, "1d", series))
+
+        numDays = len(dates)
+        basePrice = getRandom("base").uniform(50, 2000)
+        returns = getRandom("returns").normal(0.0003, 0.02, numDays)
+        # drawn day by day, so that a day's noise doesn't depend on numDays
+        noise = np.abs(getRandom("noise").normal(0, 0.01, (numDays, 3))).T
+        volume = getRandom("volume").lognormal(13, 0.5, numDays)
+        close = basePrice * np.exp(np.cumsum(returns))
+        openPrice = np.concatenate([[basePrice], close[:-1]]) * \
+            np.exp(getRandom("open").normal(0, 0.005, numDays))
+        return self.makeBars(dates, openPrice, close, noise, volume)
+
+    def getSyntheticInterDay(self, ticker, interval, start, end):
+        """Generates the intra-session bars of a ticker between two times
+
+        Every session starts from the open of the synthetic daily bar of
+        that day and is seeded by the ticker, interval and date.
+
+        Parameters
+        ----------
+        ticker: str
+            The name of the stock
+        interval: str
+            The interval width of the data
+        start: pandas.Timestamp
+            The time from which the bars are generated
+        end: pandas.Timestamp
+            The time up to which the bars are generated
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The synthetic bars
+        """
+        daily = self.getSyntheticDaily(ticker, end)
+        daily = daily[daily.index >= start.normalize()]
+        barLength = self.getBarLength(interval)
+        numBars = self.sessionMinutes // int(barLength.total_seconds() // 60)
+        sessions = []
+        for date, dayOpen in zip(daily.index, daily["Open"].values):
+            random = np.random.RandomState(self.getSeed(ticker, interval,
+                                                        date.date()))
+            sessionOpen = date + pd.Timedelta(self.sessionStart + ":00")
+            dates = pd.date_range(sessionOpen, periods=numBars,
+                                  freq=barLength, name="Date")
+            returns = random.normal(0, 0.02 / np.sqrt(numBars), numBars)
+            noise = np.abs(random.normal(0, 0.002, (3, numBars)))
+            volume = random.lognormal(13, 0.5, numBars) / numBars
+            close = dayOpen * np.exp(np.cumsum(returns))
+            openPrice = np.concatenate([[dayOpen], close[:-1]])
+            sessions.append(self.makeBars(dates, openPrice, close, noise,
+                                          volume))
+        if not sessions:
+            return daily[:0]
+        return pd.concat(sessions)
+
+    def makeBars(self, dates, openPrice, close, noise, volume):
+        high = np.maximum(openPrice, close) * np.exp(noise[0])
+        low = np.minimum(openPrice, close) * np.exp(-noise[1])
+        data = pd.DataFrame({"Open": openPrice, "High": high, "Low": low,
+                             "Close": close,
+                             "Volume": volume.astype(np.int64),
+                             "Dividends": np.zeros(len(dates)),
+                             "Stock Splits": np.zeros(len(dates))},
+                            index=dates)
+        return data
+
+
+defaultSource = None
+
+
+def setDefaultSource(source):
+    """Module level method to replace the source used across StockMate
+
+    Every data processor and job that is created afterwards uses this
+    source instead of a new YFinance instance. Setting a ReplaySource makes
+    everything run offline.
+
+    Parameters
+    ----------
+    source: YFinance
+        An instance of YFinance or any class with the same interface. None
+        restores the default behavior
+    """
+    global defaultSource
+    defaultSource = source
+
+
+def getSource(autoRotate=False):
+    """Module level method to get the data source
+
+    Parameters
+    ----------
+    autoRotate: bool, optional
+        Whether the YFinance source should rotate proxies. This is ignored
+        if a default source was set
+
+    Returns
+    -------
+    source: YFinance
+        The source set through setDefaultSource(), or a new YFinance
+    """
+    if defaultSource is not None:
+        return defaultSource
+    return YFinance(autoRotate=autoRotate)
@@ -0,0 +1,414 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from DataStore.TickStore import TickStore, getStoreLock
+
+sharedCache = None
+sharedCacheLock = threading.Lock()
+
+
+class FeatureCache():
+    """A persistent cache of computed feature matrices
+
+    Each entry holds the features of one ticker at one interval for one
+    feature specification (the feature list, its parameters and anything
+    else that changes how the features are computed). An entry is stored in
+    the tick store format under <rootPath>/FEATURES/<key>.tick, where key is
+    a hash of the ticker, interval and specification, along with a JSON
+    file recording the version of the raw data it was computed from.
+
+    When the raw data only had bars appended, the features of the new bars
+    are computed from the new bars and the warm-up bars before them, and
+    appended to the entry instead of recomputing the whole history. The
+    least recently used entries are removed once the entries take up more
+    than maxBytes on disk. The last use of an entry is the modification
+    time of its JSON file, so a hit only touches the file instead of
+    rewriting it. The size and last use of the entries are read from disk
+    once, and then kept up to date in memory, so a lookup doesn't scan the
+    cache.
+
+    Attributes
+    ----------
+    rootPath: str
+        The location of the cache
+    maxBytes: int
+        The maximum number of bytes the entries may take up on disk
+    files: DataStore.TickStore
+        The store in which the feature matrices are kept
+    stats: dict
+        The number of hits, extensions, misses and evictions
+    entries: dict
+        The [size in bytes, last used time] of each entry, None until they
+        are first needed
+    totalBytes: int
+        The total size of the entries
+    """
+    INTERVAL = "FEATURES"
+
+    def __init__(self, rootPath="DataStore/FeatureCache",
+                 maxBytes=1024 ** 3):
+        self.rootPath = rootPath
+        self.maxBytes = maxBytes
+        self.files = TickStore(rootPath)
+        self.stats = {"hits": 0, "extensions": 0, "misses": 0,
+                      "evictions": 0}
+        self.entries = None
+        self.totalBytes = 0
+        self.lock = threading.Lock()
+
+    def getKey(self, ticker, interval, spec):
+        """Returns the hash identifying an entry
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the bars
+        spec: dict
+            The JSON serializable feature specification
+
+        Returns
+        -------
+        key: str
+            The hex digest of the hash
+        """
+        description = json.dumps([ticker, interval.upper(), spec],
+                                 sort_keys=True)
+        return hashlib.sha1(description.encode()).hexdigest()
+
+    def getMetaPath(self, key):
+        return self.files.getPath(key, self.INTERVAL, ".json")
+
+    def readMeta(self, key):
+        try:
+            with open(self.getMetaPath(key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def writeMeta(self, key, meta):
+        path = self.getMetaPath(key)
+        # other processes may be writing the same entry
+        tmpPath = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmpPath, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmpPath, path)
+
+    def getDiskVersion(self, version):
+        """Returns the part of a data version that is valid across processes
+
+        The in-process write counter of TickStore.getVersion() means
+        nothing to other processes, so only the files it lists are kept.
+
+        Parameters
+        ----------
+        version: tuple
+            A version returned by TickStore or Resampler getVersion()
+
+        Returns
+        -------
+        version: list
+            The JSON serializable version
+        """
+        version = [item for item in version if not isinstance(item, int)]
+        return json.loads(json.dumps(version))
+
+    def getDigest(self, data, nrows):
+        """Returns a hash of the first nrows bars of raw data
+
+        Parameters
+        ----------
+        data: pandas.DataFrame
+            The raw data
+        nrows: int
+            The number of bars to hash
+
+        Returns
+        -------
+        digest: str
+            The hex digest of the dates and values of the bars
+        """
+        digest = hashlib.sha1()
+        index = pd.DatetimeIndex(data.index[:nrows])
+        digest.update(np.ascontiguousarray(index.asi8).tobytes())
+        for column in data.columns:
+            values = data[column].values[:nrows]
+            if np.issubdtype(values.dtype, np.number):
+                digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    def get(self, ticker, interval, spec, version, data, compute, warmUp=0):
+        """Returns the features of a ticker, computing them if needed
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the bars
+        spec: dict
+            The JSON serializable feature specification
+        version: tuple
+            The version of the raw data
+        data: pandas.DataFrame
+            The raw data
+        compute: function
+            The function computing the features of raw data
+        warmUp: int, optional
+            The number of bars the features need before they are valid
+
+        Returns
+        -------
+        features: pandas.DataFrame
+            The features of every bar of data
+        """
+        key = self.getKey(ticker, interval, spec)
+        version = self.getDiskVersion(version)
+        path = self.files.getPath(key, self.INTERVAL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        grown = False
+        with getStoreLock(path):
+            meta = self.readMeta(key)
+            features = None
+            if meta is not None and self.isPrefix(meta, version, data):
+                try:
+                    features = self.files.read(key, self.INTERVAL).copy()
+                except FileNotFoundError:
+                    features = None
+            if features is not None and len(features) == meta["nrows"]:
+                if len(data) == meta["nrows"]:
+                    self.stats["hits"] += 1
+                else:
+                    features = self.extend(key, meta, data, features,
+                                           compute, warmUp)
+                    grown = True
+            else:
+                self.stats["misses"] += 1
+                features = compute(data)
+                self.files.write(key, self.INTERVAL, features)
+                meta = {"ticker": ticker, "interval": interval.upper(),
+                        "spec": spec}
+                grown = True
+            lastUsed = self.touch(key, meta, version, data)
+            size = self.getEntrySize(key) if grown else None
+        if self.recordEntry(key, lastUsed, size):
+            self.evict()
+        return features
+
+    def isPrefix(self, meta, version, data):
+        """Checks whether an entry was computed from the start of data
+
+        Parameters
+        ----------
+        meta: dict
+            The metadata of the entry
+        version: list
+            The version of the current raw data
+        data: pandas.DataFrame
+            The current raw data
+
+        Returns
+        -------
+        isPrefix: bool
+            True if data is the data of the entry, possibly with bars
+            appended
+        """
+        nrows = meta["nrows"]
+        if len(data) < nrows:
+            return False
+        if meta["version"] == version and len(data) == nrows:
+            return True
+        return self.getDigest(data, nrows) == meta["digest"]
+
+    def extend(self, key, meta, data, features, compute, warmUp):
+        """Method to add the features of the appended bars to an entry
+
+        The features of the new bars are computed from the new bars and the
+        warm-up bars before them. Features that depend on the whole history
+        (like EMA) match a full recomputation to within the decay of their
+        warm-up.
+
+        Returns
+        -------
+        features: pandas.DataFrame
+            The features of every bar of data
+        """
+        nrows = meta["nrows"]
+        self.stats["extensions"] += 1
+        start = max(0, nrows - warmUp - 1)
+        newFeatures = compute(data.iloc[start:]).iloc[nrows - start:]
+        self.files.append(key, self.INTERVAL, newFeatures)
+        return pd.concat([features, newFeatures])
+
+    def touch(self, key, meta, version, data):
+        """Method to record the use of an entry
+
+        The metadata is only rewritten when the entry or the version of its
+        raw data changed. Otherwise only the modification time of the
+        metadata file is updated.
+
+        Returns
+        -------
+        lastUsed: float
+            The time the entry was used
+        """
+        lastUsed = time.time()
+        if meta.get("nrows") != len(data) or "digest" not in meta:
+            meta = dict(meta, digest=self.getDigest(data, len(data)))
+        elif meta.get("version") == version:
+            try:
+                os.utime(self.getMetaPath(key), (lastUsed, lastUsed))
+                return lastUsed
+            except FileNotFoundError:
+                # removed by another process, so it is written again
+                pass
+        meta = dict(meta, version=version, nrows=len(data))
+        meta.pop("lastUsed", None)
+        self.writeMeta(key, meta)
+        return lastUsed
+
+    def getEntrySize(self, key):
+        """Returns the number of bytes an entry takes up on disk
+        """
+        paths = [self.files.getPath(key, self.INTERVAL),
+                 self.getMetaPath(key)]
+        paths.extend(self.files.getSegmentPaths(key, self.INTERVAL))
+        return sum(os.path.getsize(path) for path in paths
+                   if os.path.isfile(path))
+
+    def loadEntries(self):
+        """Method to read the size and last use of the entries from disk
+
+        This is done once, when the entries are first needed. Should be
+        called with self.lock held.
+        """
+        if self.entries is None:
+            self.entries = {key: list(entry)
+                            for key, entry in self.getEntries().items()}
+            self.totalBytes = sum(size for size, _ in self.entries.values())
+
+    def recordEntry(self, key, lastUsed, size=None):
+        """Method to update the size and last use of an entry in memory
+
+        Parameters
+        ----------
+        key: str
+            The key of the entry
+        lastUsed: float
+            The time the entry was used
+        size: int, optional
+            The new size of the entry. If None, the size is unchanged
+
+        Returns
+        -------
+        isOver: bool
+            True if the entry grew and the entries are over maxBytes
+        """
+        with self.lock:
+            self.loadEntries()
+            if key not in self.entries and size is None:
+                # written by another process since the entries were read
+                size = self.getEntrySize(key)
+            entry = self.entries.setdefault(key, [0, lastUsed])
+            entry[1] = lastUsed
+            if size is None:
+                return False
+            grown = size > entry[0]
+            self.totalBytes += size - entry[0]
+            entry[0] = size
+            return grown and self.totalBytes > self.maxBytes
+
+    def getEntries(self):
+        """Returns the size and last use of every entry
+
+        Returns
+        -------
+        entries: dict
+            The (size in bytes, last used time) of each key
+        """
+        folder = os.path.join(self.rootPath, self.INTERVAL)
+        if not os.path.isdir(folder):
+            return {}
+        entries = {}
+        for fileName in os.listdir(folder):
+            if not fileName.endswith(".json"):
+                continue
+            key = fileName[:-len(".json")]
+            try:
+                lastUsed = os.path.getmtime(self.getMetaPath(key))
+            except FileNotFoundError:
+                continue
+            entries[key] = (self.getEntrySize(key), lastUsed)
+        return entries
+
+    def evict(self):
+        """Method to remove the least recently used entries over maxBytes
+
+        This only looks at the entries kept in memory, see recordEntry().
+        """
+        with self.lock:
+            self.loadEntries()
+            keys = sorted(self.entries, key=lambda key: self.entries[key][1])
+            removed = []
+            for key in keys:
+                if self.totalBytes <= self.maxBytes:
+                    break
+                self.totalBytes -= self.entries.pop(key)[0]
+                removed.append(key)
+        for key in removed:
+            self.removeEntry(key)
+            self.stats["evictions"] += 1
+
+    def removeEntry(self, key):
+        path = self.files.getPath(key, self.INTERVAL)
+        with getStoreLock(path):
+            paths = [path, self.getMetaPath(key)]
+            paths.extend(self.files.getSegmentPaths(key, self.INTERVAL))
+            for filePath in paths:
+                if os.path.isfile(filePath):
+                    os.remove(filePath)
+
+    def clear(self):
+        """Method to remove every entry
+        """
+        for key in self.getEntries():
+            self.removeEntry(key)
+        with self.lock:
+            self.entries = {}
+            self.totalBytes = 0
+
+    def getStats(self):
+        """Returns the statistics of the cache
+
+        Returns
+        -------
+        stats: dict
+            The number of hits, extensions, misses and evictions, and the
+            number and total size of the entries
+        """
+        with self.lock:
+            self.loadEntries()
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["bytes"] = self.totalBytes
+        return stats
+
+
+def getFeatureCache():
+    """Module level method to get the process wide feature cache
+
+    Returns
+    -------
+    cache: FeatureCache
+        The shared feature cache
+    """
+    global sharedCache
+    with sharedCacheLock:
+        if sharedCache is None:
+            sharedCache = FeatureCache()
+        return sharedCache
@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+from DataStore.Resampler import Resampler
+
+
+class Panel():
+    """An aligned ticker x time x feature array of several tickers
+
+    The bars of every ticker are placed on one shared calendar, the union
+    of the dates of all the tickers, so that row t of every ticker is the
+    same bar. Bars that a ticker doesn't have are NaN and are marked in the
+    mask. The values are a single C-contiguous array, so selecting a ticker,
+    a date range or a contiguous run of features returns views and no data
+    is copied.
+
+    Attributes
+    ----------
+    values: numpy.ndarray
+        The (ticker, time, feature) array of values
+    mask: numpy.ndarray
+        The (ticker, time) boolean array, True where the ticker has a bar
+    tickers: list
+        The tickers, in the order of the first axis
+    dates: pandas.DatetimeIndex
+        The shared calendar, in the order of the second axis
+    features: list
+        The features, in the order of the last axis
+    """
+    def __init__(self, values, mask, tickers, dates, features):
+        self.values = values
+        self.mask = mask
+        self.tickers = list(tickers)
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        self.features = list(features)
+
+    @classmethod
+    def fromFrames(cls, frames, features=None, dtype=np.float64):
+        """Builds a panel from a dictionary of dataframes
+
+        Parameters
+        ----------
+        frames: dict
+            The dataframe of each ticker, indexed by date
+        features: list, optional
+            The columns to keep. If None, the columns of the first
+            dataframe are used
+        dtype: numpy.dtype, optional
+            The dtype of the values
+
+        Returns
+        -------
+        panel: Panel
+            The aligned panel
+        """
+        tickers = list(frames.keys())
+        if features is None:
+            features = list(frames[tickers[0]].columns) if tickers else []
+        dates = pd.DatetimeIndex([])
+        for ticker in tickers:
+            dates = dates.union(frames[ticker].index)
+
+        values = np.full((len(tickers), len(dates), len(features)), np.nan,
+                         dtype=dtype)
+        mask = np.zeros((len(tickers), len(dates)), dtype=bool)
+        for i, ticker in enumerate(tickers):
+            data = frames[ticker]
+            if not data.index.is_unique:
+                data = data[~data.index.duplicated(keep="last")]
+            rows = dates.get_indexer(data.index)
+            values[i, rows] = data[features].values
+            mask[i, rows] = True
+        return cls(values, mask, tickers, dates, features)
+
+    @classmethod
+    def fromStore(cls, tickers, interval, features=None, start=None,
+                  end=None, resampler=None, dtype=np.float64):
+        """Builds a panel by reading the tickers from the store
+
+        Only the requested columns and date range of each ticker are read.
+
+        Parameters
+        ----------
+        tickers: list
+            The ticker symbols of the stocks
+        interval: str
+            The interval of the bars
+        features: list, optional
+            The stored columns to read. If None, every column is read
+        start: str or pandas.Timestamp, optional
+            The first date to include
+        end: str or pandas.Timestamp, optional
+            The last date to include
+        resampler: DataStore.Resampler, optional
+            The resampler through which the bars are read
+        dtype: numpy.dtype, optional
+            The dtype of the values
+
+        Returns
+        -------
+        panel: Panel
+            The aligned panel
+        """
+        if resampler is None:
+            resampler = Resampler()
+        frames = {}
+        for ticker in tickers:
+            frames[ticker] = resampler.readRange(ticker, interval, start,
+                                                 end, features)
+        return cls.fromFrames(frames, features, dtype)
+
+    def getTickerIndex(self, ticker):
+        if ticker not in self.tickers:
+            raise Exception("{} is not in the panel".format(ticker))
+        return self.tickers.index(ticker)
+
+    def getFeatureIndex(self, feature):
+        for i, name in enumerate(self.features):
+            if name.lower() == feature.lower():
+                return i
+        raise Exception("{} feature is not in the panel".format(feature))
+
+    def toSlice(self, positions):
+        """Turns a list of positions into a slice when they are contiguous
+
+        Parameters
+        ----------
+        positions: list
+            The positions along an axis
+
+        Returns
+        -------
+        selection: slice or list
+            A slice if the positions are a contiguous ascending run, so that
+            indexing with it returns a view, else the positions themselves
+        """
+        if len(positions) > 0 and \
+                list(positions) == list(range(positions[0],
+                                              positions[-1] + 1)):
+            return slice(positions[0], positions[-1] + 1)
+        return positions
+
+    def getDateSlice(self, start=None, end=None):
+        """Returns the slice of the calendar between two dates
+
+        Parameters
+        ----------
+        start: str or pandas.Timestamp, optional
+            The first date to include
+        end: str or pandas.Timestamp, optional
+            The last date to include
+
+        Returns
+        -------
+        dateSlice: slice
+            The slice along the time axis
+        """
+        lo = 0
+        hi = len(self.dates)
+        if start is not None:
+            lo = self.dates.searchsorted(self.toDate(start), side="left")
+        if end is not None:
+            hi = self.dates.searchsorted(self.toDate(end), side="right")
+        return slice(lo, hi)
+
+    def toDate(self, date):
+        date = pd.Timestamp(date)
+        if date.tz is None and self.dates.tz is not None:
+            date = date.tz_localize(self.dates.tz)
+        return date
+
+    def select(self, tickers=None, start=None, end=None, features=None):
+        """Returns a part of the panel
+
+        The date range is always a view. The tickers and features are views
+        as long as they are contiguous and in the order of the panel.
+
+        Parameters
+        ----------
+        tickers: list, optional
+            The tickers to keep. If None, every ticker is kept
+        start: str or pandas.Timestamp, optional
+            The first date to keep
+        end: str or pandas.Timestamp, optional
+            The last date to keep
+        features: list, optional
+            The features to keep. If None, every feature is kept
+
+        Returns
+        -------
+        panel: Panel
+            The selected part of the panel
+        """
+        tickerSel = slice(None)
+        featureSel = slice(None)
+        newTickers = self.tickers
+        newFeatures = self.features
+        if tickers is not None:
+            tickerSel = self.toSlice([self.getTickerIndex(ticker)
+                                      for ticker in tickers])
+            newTickers = list(tickers)
+        if features is not None:
+            positions = [self.getFeatureIndex(feature)
+                         for feature in features]
+            featureSel = self.toSlice(positions)
+            newFeatures = [self.features[i] for i in positions]
+        dateSlice = self.getDateSlice(start, end)
+
+        values = self.values[tickerSel][:, dateSlice][:, :, featureSel]
+        mask = self.mask[tickerSel][:, dateSlice]
+        return Panel(values, mask, newTickers, self.dates[dateSlice],
+                     newFeatures)
+
+    def getTicker(self, ticker, dropMissing=True):
+        """Returns the bars of one ticker as a dataframe
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        dropMissing: bool, optional
+            Whether to leave out the dates on which the ticker has no bar.
+            If False, the dataframe is a view of the panel
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The (time, feature) bars of the ticker
+        """
+        i = self.getTickerIndex(ticker)
+        values = self.values[i]
+        dates = self.dates
+        if dropMissing and not self.mask[i].all():
+            values = values[self.mask[i]]
+            dates = dates[self.mask[i]]
+        return pd.DataFrame(values, index=dates, columns=self.features,
+                            copy=False)
+
+    def getTickerValues(self, ticker, features=None):
+        """Returns the values and mask of one ticker without copying them
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        features: list, optional
+            The features to keep. If None, every feature is kept. They are
+            a view as long as they are contiguous and in the order of the
+            panel
+
+        Returns
+        -------
+        values: numpy.ndarray
+            The (time, feature) values of the ticker on the shared calendar
+        mask: numpy.ndarray
+            The time axis mask, True where the ticker has a bar
+        """
+        i = self.getTickerIndex(ticker)
+        values = self.values[i]
+        if features is not None:
+            values = values[:, self.toSlice([self.getFeatureIndex(feature)
+                                             for feature in features])]
+        return values, self.mask[i]
+
+    def getCommonMask(self):
+        """Returns the dates on which every ticker has a bar
+
+        Returns
+        -------
+        mask: numpy.ndarray
+            A boolean array along the time axis
+        """
+        return self.mask.all(axis=0)
+
+    def getShape(self):
+        return self.values.shape
+
+    def getMemoryUsage(self):
+        return self.values.nbytes + self.mask.nbytes
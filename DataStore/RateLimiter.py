@@ -0,0 +1,153 @@
+import threading
+import time
+
+# requests per second and burst size, keyed by (source, interval). A limit
+# with an interval of None applies to every interval of the source that has
+# no limit of its own.
+defaultRateLimits = {
+    ("YFinance", None): {"rate": 2.0, "capacity": 5},
+}
+
+rateLimits = dict(defaultRateLimits)
+rateLimiters = {}
+rateLimitersLock = threading.Lock()
+
+
+class TokenBucket():
+    """A thread-safe token bucket rate limiter
+
+    Tokens are refilled at a constant rate up to the capacity of the
+    bucket and every request takes one token. Requests that find the bucket
+    empty reserve the next token and wait for it, so waiting requests are
+    served in the order in which they arrived.
+
+    Attributes
+    ----------
+    rate: float
+        The number of tokens added per second
+    capacity: float
+        The maximum number of tokens, i.e. the allowed burst
+    tokens: float
+        The number of tokens currently available. This goes negative when
+        requests are waiting for tokens
+    stats: dict
+        The number of requests, the total and the longest wait in seconds
+    """
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.lastRefill = time.monotonic()
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "totalWait": 0.0, "maxWait": 0.0}
+
+    def acquire(self):
+        """Method to take a token, waiting for one if necessary
+
+        Returns
+        -------
+        wait: float
+            The time in seconds this request had to wait
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens +
+                              (now - self.lastRefill) * self.rate)
+            self.lastRefill = now
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate)
+            self.stats["requests"] += 1
+            self.stats["totalWait"] += wait
+            self.stats["maxWait"] = max(self.stats["maxWait"], wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def getStats(self):
+        """Returns the wait statistics of this limiter
+
+        Returns
+        -------
+        stats: dict
+            The number of requests, the total, mean and longest wait
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        if stats["requests"] > 0:
+            stats["meanWait"] = stats["totalWait"] / stats["requests"]
+        else:
+            stats["meanWait"] = 0.0
+        return stats
+
+
+def configureRateLimit(source, rate, capacity, interval=None):
+    """Module level method to set the rate limit of a source
+
+    This replaces any limiter that was already created for the source, so
+    it should be called before the source is used.
+
+    Parameters
+    ----------
+    source: str
+        The name of the data source, for example YFinance
+    rate: float
+        The number of requests allowed per second
+    capacity: float
+        The number of requests allowed in a burst
+    interval: str, optional
+        If given, the limit only applies to requests of this interval
+    """
+    key = (source, interval.lower() if interval else None)
+    with rateLimitersLock:
+        rateLimits[key] = {"rate": rate, "capacity": capacity}
+        rateLimiters.pop(key, None)
+
+
+def getRateLimiter(source, interval=None):
+    """Module level method to get the process wide limiter of a source
+
+    Every API client of the same source (and interval, if it has its own
+    limit) shares the returned limiter.
+
+    Parameters
+    ----------
+    source: str
+        The name of the data source
+    interval: str, optional
+        The interval of the data being requested
+
+    Returns
+    -------
+    limiter: TokenBucket
+        The shared rate limiter
+    """
+    key = (source, interval.lower() if interval else None)
+    with rateLimitersLock:
+        if key not in rateLimits:
+            key = (source, None)
+        if key not in rateLimits:
+            message = "No rate limit configured for {}"
+            raise Exception(message.format(source))
+        if key not in rateLimiters:
+            limits = rateLimits[key]
+            rateLimiters[key] = TokenBucket(limits["rate"],
+                                            limits["capacity"])
+        return rateLimiters[key]
+
+
+def getAllStats():
+    """Module level method to get the wait statistics of every limiter
+
+    Returns
+    -------
+    stats: dict
+        The stats of each limiter, keyed by "source" or "source/interval"
+    """
+    with rateLimitersLock:
+        limiters = dict(rateLimiters)
+    allStats = {}
+    for (source, interval), limiter in limiters.items():
+        name = source if interval is None else "{}/{}".format(source,
+                                                              interval)
+        allStats[name] = limiter.getStats()
+    return allStats
@@ -0,0 +1,402 @@
+import numpy as np
+import pandas as pd
+import os
+from DataStore.TickStore import TickStore
+from DataStore.TickerCache import getTickerCache
+
+
+def getIntervalLength(interval):
+    """Module level method to get the length of an interval
+
+    Parameters
+    ----------
+    interval: str
+        The interval, for example 1M, 15M, 1H or 1D (case insensitive)
+
+    Returns
+    -------
+    length: pandas.Timedelta
+        The length of one bar of the interval
+    """
+    interval = interval.upper()
+    units = {"M": "minutes", "H": "hours", "D": "days"}
+    if interval[-1] not in units or not interval[:-1].isdigit():
+        raise Exception("{} is not a valid interval".format(interval))
+    return pd.Timedelta(**{units[interval[-1]]: int(interval[:-1])})
+
+
+def getLocalValues(index):
+    """Module level method to get the wall clock times of an index in ns
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype("datetime64[ns]").view(np.int64)
+
+
+def getBarEnds(index, interval, sessionStart="09:15", sessionMinutes=375):
+    """Module level method to get the time at which each bar is complete
+
+    A bar ends after the length of its interval, or when the trading session
+    of its last day closes, whichever comes first. So a 1H bar starting at
+    15:15 ends at 15:30, and a daily bar ends when its session closes.
+
+    Parameters
+    ----------
+    index: pandas.DatetimeIndex
+        The start of each bar
+    interval: str
+        The interval of the bars
+    sessionStart: str, optional
+        The time at which the trading session opens
+    sessionMinutes: int, optional
+        The length of the trading session in minutes
+
+    Returns
+    -------
+    ends: pandas.DatetimeIndex
+        The end of each bar, in the timezone of index
+    """
+    step = getIntervalLength(interval).value
+    dayLength = pd.Timedelta(days=1).value
+    sessionEnd = (pd.Timedelta(sessionStart + ":00") +
+                  pd.Timedelta(minutes=sessionMinutes)).value
+    local = getLocalValues(index)
+    lastDay = (local + step - 1) // dayLength * dayLength
+    ends = np.minimum(local + step, lastDay + sessionEnd)
+    ends = pd.DatetimeIndex(ends.view("datetime64[ns]"))
+    if pd.DatetimeIndex(index).tz is not None:
+        ends = ends.tz_localize(index.tz)
+    return ends
+
+
+def resampleBars(data, interval, sessionStart="09:15", sourceInterval=None,
+                 completeOnly=True, sessionMinutes=375):
+    """Module level method to aggregate OHLCV bars into a coarser interval
+
+    Intra-day bars are aligned to the start of the trading session (so 30M
+    bars start at 09:15, 09:45, ...) and never span two days. Daily bars
+    are aligned to midnight in the timezone of the data. The aggregation is
+    done with numpy reductions over the bar boundaries, with no loop over
+    the bars.
+
+    Every bar but the last one is complete, as finer bars after it exist.
+    The last bar is only complete once the finer bars reach its end (see
+    getBarEnds()), so while its interval is still running it is dropped,
+    unless completeOnly is False.
+
+    Parameters
+    ----------
+    data: pandas.DataFrame
+        The finer bars, sorted by date
+    interval: str
+        The interval to aggregate into
+    sessionStart: str, optional
+        The time at which the trading session opens
+    sourceInterval: str, optional
+        The interval of the finer bars. If None, it is taken as the
+        smallest gap between them
+    completeOnly: bool, optional
+        Whether the last bar is dropped when it is incomplete
+    sessionMinutes: int, optional
+        The length of the trading session in minutes
+
+    Returns
+    -------
+    data: pandas.DataFrame
+        The aggregated bars
+    """
+    step = getIntervalLength(interval).value
+    dayLength = pd.Timedelta(days=1).value
+    index = pd.DatetimeIndex(data.index)
+    local = getLocalValues(index)
+    day = local // dayLength * dayLength
+    if step >= dayLength:
+        bucket = day // step * step
+    else:
+        anchor = pd.Timedelta(sessionStart + ":00").value
+        bucket = day + anchor + (local - day - anchor) // step * step
+
+    if len(bucket) == 0:
+        return data[:0]
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+    ends = np.concatenate([starts[1:], [len(bucket)]])
+    dates = pd.DatetimeIndex(bucket[starts].view("datetime64[ns]"),
+                             name="Date")
+    if index.tz is not None:
+        dates = dates.tz_localize(index.tz)
+
+    if completeOnly:
+        if sourceInterval is None and len(local) > 1:
+            gap = np.diff(local).min()
+            sourceInterval = "{}M".format(max(1, gap // 60 // 10 ** 9))
+        if sourceInterval is not None:
+            sourceEnd = getBarEnds(index[-1:], sourceInterval, sessionStart,
+                                   sessionMinutes)[0]
+            bucketEnd = getBarEnds(dates[-1:], interval, sessionStart,
+                                   sessionMinutes)[0]
+            if sourceEnd < bucketEnd:
+                starts, ends, dates = starts[:-1], ends[:-1], dates[:-1]
+                if len(starts) == 0:
+                    return data[:0]
+
+    reductions = {"open": lambda values: values[starts],
+                  "high": lambda values: np.maximum.reduceat(values, starts),
+                  "low": lambda values: np.minimum.reduceat(values, starts),
+                  "close": lambda values: values[ends - 1],
+                  "volume": lambda values: np.add.reduceat(values, starts)}
+    columns = {}
+    for column in data.columns:
+        if column.lower() in reductions:
+            values = np.asarray(data[column].values)[:ends[-1]]
+            columns[column] = reductions[column.lower()](values)
+    return pd.DataFrame(columns, index=dates)
+
+
+class Resampler():
+    """Builds coarser intervals on demand from the finest stored bars
+
+    If a ticker is not stored at the requested interval, the bars are
+    aggregated from the finest stored interval that divides it, and the
+    result is cached for as long as the source data doesn't change.
+
+    Attributes
+    ----------
+    store: DataStore.TickStore
+        The store from which the bars are read
+    cache: DataStore.TickerCache
+        The cache of the read and resampled bars. By default the process
+        wide cache is used
+    """
+    def __init__(self, store=None, cache=None):
+        if store is None:
+            store = TickStore()
+        if cache is None:
+            cache = getTickerCache()
+        self.store = store
+        self.cache = cache
+
+    def getStoredIntervals(self, ticker):
+        """Returns the intervals a ticker is stored at, finest first
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+
+        Returns
+        -------
+        intervals: list
+            The stored intervals
+        """
+        if not os.path.isdir(self.store.rootPath):
+            return []
+        intervals = []
+        for interval in os.listdir(self.store.rootPath):
+            try:
+                getIntervalLength(interval)
+            except Exception:
+                continue
+            if self.store.exists(ticker, interval):
+                intervals.append(interval)
+        return sorted(intervals, key=getIntervalLength)
+
+    def getSourceInterval(self, ticker, interval):
+        """Returns the stored interval that interval can be built from
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The requested interval
+
+        Returns
+        -------
+        sourceInterval: str
+            The finest stored interval that divides interval, or None
+        """
+        length = getIntervalLength(interval)
+        for sourceInterval in self.getStoredIntervals(ticker):
+            sourceLength = getIntervalLength(sourceInterval)
+            if sourceLength < length and length % sourceLength == \
+                    pd.Timedelta(0):
+                return sourceInterval
+        return None
+
+    def canRead(self, ticker, interval):
+        """Checks whether a ticker can be read at an interval
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The requested interval
+
+        Returns
+        -------
+        canRead: bool
+            True if the interval is stored or can be resampled
+        """
+        return self.store.exists(ticker, interval) or \
+            self.getSourceInterval(ticker, interval) is not None
+
+    def read(self, ticker, interval, completeOnly=True):
+        """Reads a ticker at an interval, resampling it if necessary
+
+        Both the stored and the resampled data are kept in the process wide
+        ticker cache, so repeated reads of an unchanged ticker don't read
+        the files again.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The requested interval
+        completeOnly: bool, optional
+            Whether a resampled last bar is dropped while it is incomplete,
+            see resampleBars()
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The bars of the ticker at the requested interval. This is shared
+            with the cache and must not be modified in place
+        """
+        key = (os.path.abspath(self.store.rootPath), ticker,
+               interval.upper(), completeOnly)
+        version = self.getVersion(ticker, interval, self.cache.checkFiles)
+        if self.store.exists(ticker, interval):
+            return self.cache.getOrLoad(
+                key, version, lambda: self.store.read(ticker, interval))
+        sourceInterval = version[0]
+        return self.cache.getOrLoad(
+            key, version,
+            lambda: resampleBars(self.store.read(ticker, sourceInterval),
+                                 interval, sourceInterval=sourceInterval,
+                                 completeOnly=completeOnly))
+
+    def getVersion(self, ticker, interval, checkFiles=True):
+        """Returns the version of the data a ticker is read from
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The requested interval
+        checkFiles: bool, optional
+            Whether the files are checked as well, see TickStore.getVersion
+
+        Returns
+        -------
+        version: tuple
+            The version of the stored interval. If the interval has to be
+            resampled, this is the source interval followed by its version
+        """
+        if self.store.exists(ticker, interval):
+            return self.store.getVersion(ticker, interval, checkFiles)
+        sourceInterval = self.getSourceInterval(ticker, interval)
+        if sourceInterval is None:
+            message = "No data found for {} to build {} bars from"
+            raise Exception(message.format(ticker, interval))
+        return (sourceInterval,) + self.store.getVersion(
+            ticker, sourceInterval, checkFiles)
+
+    def readTail(self, ticker, interval, numRows, completeOnly=True):
+        """Reads only the last bars of a ticker at an interval
+
+        If the interval has to be resampled, only enough of the finer bars
+        to build numRows complete bars are read.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The requested interval
+        numRows: int
+            The number of bars to read from the end
+        completeOnly: bool, optional
+            Whether a resampled last bar is dropped while it is incomplete,
+            see resampleBars()
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The last numRows bars of the ticker
+        """
+        if self.store.exists(ticker, interval):
+            return self.store.readTail(ticker, interval, numRows)
+        sourceInterval = self.getSourceInterval(ticker, interval)
+        if sourceInterval is None:
+            message = "No data found for {} to build {} bars from"
+            raise Exception(message.format(ticker, interval))
+        ratio = getIntervalLength(interval) // \
+            getIntervalLength(sourceInterval)
+        # two extra bars, as the first one built may be missing finer bars
+        # and the last one may be incomplete
+        data = self.store.readTail(ticker, sourceInterval,
+                                   (numRows + 2) * ratio)
+        return resampleBars(data, interval, sourceInterval=sourceInterval,
+                            completeOnly=completeOnly)[-numRows:]
+
+    def readRange(self, ticker, interval, start=None, end=None,
+                  columns=None, completeOnly=True):
+        """Reads the bars of a ticker between two times at an interval
+
+        Only the stored blocks covering the range are read. If the interval
+        has to be resampled, the finer bars of every bar that starts within
+        the range are read and aggregated.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The requested interval
+        start: str or pandas.Timestamp, optional
+            The first time to include. If None, reads from the first bar
+        end: str or pandas.Timestamp, optional
+            The last time to include. If None, reads till the last bar
+        columns: list, optional
+            The columns to read. If None, every column is read
+        completeOnly: bool, optional
+            Whether a resampled last bar is dropped while it is incomplete,
+            see resampleBars()
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The bars of the ticker that start within the range
+        """
+        if self.store.exists(ticker, interval):
+            return self.store.getRange(ticker, interval, start, end, columns)
+        sourceInterval = self.getSourceInterval(ticker, interval)
+        if sourceInterval is None:
+            message = "No data found for {} to build {} bars from"
+            raise Exception(message.format(ticker, interval))
+        length = getIntervalLength(interval)
+        sourceEnd = None
+        if end is not None:
+            # the last bar starting at end still needs its finer bars
+            sourceEnd = pd.Timestamp(end) + length - \
+                getIntervalLength(sourceInterval)
+        data = self.store.getRange(ticker, sourceInterval, start, sourceEnd,
+                                   columns)
+        data = resampleBars(data, interval, sourceInterval=sourceInterval,
+                            completeOnly=completeOnly)
+        if start is not None and len(data):
+            # the first bar may be missing the finer bars before start
+            first = pd.Timestamp(start)
+            if first.tz is None and data.index.tz is not None:
+                first = first.tz_localize(data.index.tz)
+            data = data[data.index >= first]
+        if end is not None and len(data):
+            last = pd.Timestamp(end)
+            if last.tz is None and data.index.tz is not None:
+                last = last.tz_localize(data.index.tz)
+            data = data[data.index <= last]
+        return data
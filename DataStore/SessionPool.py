@@ -0,0 +1,199 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+
+sharedSessions = {}
+sharedSessionLock = threading.Lock()
+
+
+def getSharedSession(poolSize=32, retries=3, backoffFactor=0.5):
+    """Module level method to get the process wide HTTP session
+
+    The session keeps connections alive and is shared by every API
+    client, so repeated requests to the same host reuse their connection.
+    Connection errors and throttling/server error responses are retried
+    with exponential backoff by the transport adapter. Clients that retry
+    failed requests themselves should ask for a session with 0 retries, so
+    that the retries don't multiply. One session is kept for each set of
+    arguments.
+
+    Parameters
+    ----------
+    poolSize: int, optional
+        The maximum number of connections kept per host
+    retries: int, optional
+        The number of retries for a failed request
+    backoffFactor: float, optional
+        The base delay in seconds of the exponential backoff
+
+    Returns
+    -------
+    session: requests.Session
+        The shared session
+    """
+    key = (poolSize, retries, backoffFactor)
+    with sharedSessionLock:
+        if key not in sharedSessions:
+            retry = Retry(total=retries, backoff_factor=backoffFactor,
+                          status_forcelist=[429, 500, 502, 503, 504])
+            adapter = HTTPAdapter(pool_connections=poolSize,
+                                  pool_maxsize=poolSize, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            sharedSessions[key] = session
+        return sharedSessions[key]
+
+
+class ProxyPool():
+    """A pool of proxies that are scored by their health
+
+    Every proxy keeps a running average of its latency and a count of its
+    consecutive failures. Proxies are chosen at random, weighted towards
+    the fast and healthy ones, and a proxy is dropped once it fails
+    maxFailures times in a row.
+
+    Attributes
+    ----------
+    proxies: dict
+        A dictionary of the stats of each proxy
+    maxFailures: int
+        The number of consecutive failures after which a proxy is dropped
+    smoothing: float
+        The weight of the newest latency in the running average
+    """
+    def __init__(self, proxies, maxFailures=3, smoothing=0.3):
+        self.maxFailures = maxFailures
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.proxies = {}
+        for proxy in proxies:
+            self.addProxy(proxy)
+
+    def addProxy(self, proxy, latency=1.0):
+        """Method to add a proxy to the pool
+
+        Parameters
+        ----------
+        proxy: str
+            The proxy address
+        latency: float, optional
+            The initial latency estimate in seconds
+        """
+        with self.lock:
+            self.proxies[proxy] = {"latency": latency, "failures": 0,
+                                   "successes": 0}
+
+    def getScore(self, stats):
+        """Returns the selection weight of a proxy
+
+        Parameters
+        ----------
+        stats: dict
+            The stats of the proxy
+
+        Returns
+        -------
+        score: float
+            The weight of the proxy, higher is better
+        """
+        return 1 / (stats["latency"] * (1 + stats["failures"]))
+
+    def choose(self):
+        """Method to choose a proxy weighted by its score
+
+        Returns
+        -------
+        proxy: str
+            The chosen proxy address
+
+        Raises
+        ------
+        Exception
+            If there are no proxies left in the pool
+        """
+        with self.lock:
+            if not self.proxies:
+                raise Exception("No healthy proxies left in the pool")
+            proxies = list(self.proxies.keys())
+            weights = [self.getScore(self.proxies[proxy])
+                       for proxy in proxies]
+        return random.choices(proxies, weights=weights)[0]
+
+    def reportSuccess(self, proxy, latency):
+        """Method to update the stats of a proxy after a successful request
+
+        Parameters
+        ----------
+        proxy: str
+            The proxy address
+        latency: float
+            The time taken by the request in seconds
+        """
+        with self.lock:
+            if proxy not in self.proxies:
+                return
+            stats = self.proxies[proxy]
+            stats["latency"] += self.smoothing * (latency - stats["latency"])
+            stats["failures"] = 0
+            stats["successes"] += 1
+
+    def reportFailure(self, proxy):
+        """Method to update the stats of a proxy after a failed request
+
+        Parameters
+        ----------
+        proxy: str
+            The proxy address
+        """
+        with self.lock:
+            if proxy not in self.proxies:
+                return
+            self.proxies[proxy]["failures"] += 1
+            if self.proxies[proxy]["failures"] >= self.maxFailures:
+                del self.proxies[proxy]
+
+    def validate(self, testURL="https://query1.finance.yahoo.com",
+                 timeout=5, maxWorkers=16):
+        """Method to check all the proxies concurrently
+
+        Proxies that cannot reach testURL within the timeout are dropped
+        and the latency of the others is recorded.
+
+        Parameters
+        ----------
+        testURL: str, optional
+            The url that is requested through each proxy
+        timeout: float, optional
+            The time in seconds after which a proxy is considered dead
+        maxWorkers: int, optional
+            The number of proxies that are checked at once
+
+        Returns
+        -------
+        numHealthy: int
+            The number of proxies left in the pool
+        """
+        def check(proxy):
+            address = proxy if "://" in proxy else "http://" + proxy
+            proxies = {"http": address, "https": address}
+            start = time.time()
+            try:
+                requests.head(testURL, proxies=proxies, timeout=timeout)
+            except Exception:
+                return proxy, None
+            return proxy, time.time() - start
+
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            results = list(executor.map(check, list(self.proxies.keys())))
+        for proxy, latency in results:
+            if latency is None:
+                with self.lock:
+                    self.proxies.pop(proxy, None)
+            else:
+                self.addProxy(proxy, latency)
+        return len(self.proxies)
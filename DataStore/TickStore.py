@@ -0,0 +1,808 @@
+import numpy as np
+import pandas as pd
+import json
+import os
+import struct
+import threading
+
+storeLocks = {}
+storeLocksGuard = threading.Lock()
+storeVersions = {}
+
+
+def getStoreLock(path):
+    """Module level method to get the lock guarding a store file
+
+    Appends and compactions of the same ticker, from any TickStore instance
+    in this process, are serialized through this lock.
+
+    Parameters
+    ----------
+    path: str
+        The path of the store file
+
+    Returns
+    -------
+    lock: threading.RLock
+        The lock for the path
+    """
+    path = os.path.abspath(path)
+    with storeLocksGuard:
+        if path not in storeLocks:
+            storeLocks[path] = threading.RLock()
+        return storeLocks[path]
+
+
+def bumpStoreVersion(path):
+    """Module level method to mark a store file as changed
+
+    Parameters
+    ----------
+    path: str
+        The path of the store file
+    """
+    path = os.path.abspath(path)
+    with storeLocksGuard:
+        storeVersions[path] = storeVersions.get(path, 0) + 1
+
+
+class TickStore():
+    """A columnar, memory-mappable store for the ticker data
+
+    Every ticker/interval pair is kept in a single binary file under
+    <rootPath>/<INTERVAL>/<ticker>.tick. The file is laid out as follows,
+
+        1. An 8 byte magic string
+        2. An unsigned 64 bit integer with the length of the header
+        3. A JSON header describing the number of rows, the index and the
+           dtype and byte offset of each column
+        4. The index as int64 nanoseconds since the epoch (UTC), followed
+           by each column as a contiguous array
+
+    Every array starts on a 64 byte boundary so that it can be memory
+    mapped directly, which makes opening a ticker roughly zero-copy. The
+    header also keeps a sparse index with the first timestamp of every
+    block of BLOCK_SIZE rows, so that a date range can be located by
+    touching only the blocks that cover it.
+
+    New bars can be appended without rewriting the file. Each append is
+    written as a small segment file (in the same format) under
+    <rootPath>/<INTERVAL>/<ticker>.segments/, and readers merge the
+    segments with the main file transparently. Once maxSegments segments
+    have piled up they are compacted into the main file in the background.
+
+    Attributes
+    ----------
+    rootPath: str
+        The location under which all the ticker data is stored
+    maxSegments: int
+        The number of segments after which a ticker is compacted
+    dtypes: dict
+        The dtype each column is stored as, keyed by the lower case column
+        name, for example COMPACT_DTYPES. Columns that aren't in it keep
+        the dtype they are written with. Columns with missing or fractional
+        values are stored as float64 instead of an integer dtype
+    """
+    MAGIC = b"SMTICK01"
+    ALIGNMENT = 64
+    BLOCK_SIZE = 4096
+    EXTENSION = ".tick"
+    SEGMENTS = ".segments"
+    # volumes are whole numbers past the 2^24 that float32 holds exactly
+    COMPACT_DTYPES = {"open": "<f4", "high": "<f4", "low": "<f4",
+                      "close": "<f4", "adj close": "<f4", "volume": "<i8"}
+
+    def __init__(self, rootPath="DataStore/StockData", maxSegments=16,
+                 dtypes=None):
+        self.rootPath = rootPath
+        self.maxSegments = maxSegments
+        self.dtypes = dtypes or {}
+
+    def getPath(self, ticker, interval, extension=None):
+        """Returns the path of the store file for a ticker
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data, for example 1D or 5M
+        extension: str, optional
+            The file extension. Defaults to the store's extension
+
+        Returns
+        -------
+        path: str
+            The path of the file
+        """
+        if extension is None:
+            extension = self.EXTENSION
+        return os.path.join(self.rootPath, interval.upper(),
+                            ticker + extension)
+
+    def exists(self, ticker, interval):
+        """Checks whether data is available for a ticker
+
+        Legacy CSV files count as available, as they are migrated the first
+        time they are read.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+
+        Returns
+        -------
+        exists: bool
+            True if the ticker data is present in the store
+        """
+        return os.path.isfile(self.getPath(ticker, interval)) or \
+            os.path.isfile(self.getPath(ticker, interval, ".csv"))
+
+    def write(self, ticker, interval, data):
+        """Writes the ticker data into the store
+
+        The data is written to a temporary file first and then moved in
+        place, so that readers never see a partially written file. The
+        temporary file is named after the process, see getTmpPath().
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+        data: pandas.DataFrame
+            The ticker data with a DatetimeIndex
+        """
+        path = self.getPath(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with getStoreLock(path):
+            tmpPath = self.getTmpPath(path)
+            self.writeFile(tmpPath, data)
+            os.replace(tmpPath, path)
+            # the new file supersedes every pending segment
+            for segmentPath in self.getSegmentPaths(ticker, interval):
+                os.remove(segmentPath)
+            bumpStoreVersion(path)
+
+    def append(self, ticker, interval, data):
+        """Appends new bars to the ticker data
+
+        Only the bars after the last stored bar are written, as a new
+        segment file. The cost of an append only depends on the number of
+        new bars, not on the length of the history.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+        data: pandas.DataFrame
+            The ticker data with a DatetimeIndex
+
+        Returns
+        -------
+        numAppended: int
+            The number of bars that were appended
+        """
+        path = self.getPath(ticker, interval)
+        with getStoreLock(path):
+            if not self.exists(ticker, interval):
+                self.write(ticker, interval, data)
+                return len(data)
+            if not os.path.isfile(path):
+                self.migrateCSV(ticker, interval)
+            lastTimestamp = self.getLastTimestamp(ticker, interval)
+            if lastTimestamp is not None:
+                if pd.DatetimeIndex(data.index).tz is None:
+                    lastTimestamp = lastTimestamp.tz_localize(None)
+                data = data[data.index > lastTimestamp]
+            if len(data) == 0:
+                return 0
+            segmentDir = path + self.SEGMENTS
+            os.makedirs(segmentDir, exist_ok=True)
+            segmentPaths = self.getSegmentPaths(ticker, interval)
+            if segmentPaths:
+                number = int(os.path.basename(segmentPaths[-1])[:-5]) + 1
+            else:
+                number = 0
+            segmentPath = os.path.join(segmentDir,
+                                       "{:08d}{}".format(number,
+                                                         self.EXTENSION))
+            tmpPath = self.getTmpPath(segmentPath)
+            self.writeFile(tmpPath, data)
+            os.replace(tmpPath, segmentPath)
+            bumpStoreVersion(path)
+            numSegments = len(segmentPaths) + 1
+
+        if numSegments >= self.maxSegments:
+            threading.Thread(target=self.compact, args=(ticker, interval),
+                             daemon=True).start()
+        return len(data)
+
+    def compact(self, ticker, interval):
+        """Merges all the segments of a ticker into its main file
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+        """
+        path = self.getPath(ticker, interval)
+        with getStoreLock(path):
+            if not self.getSegmentPaths(ticker, interval):
+                return
+            self.write(ticker, interval, self.read(ticker, interval))
+
+    def getTmpPath(self, path):
+        """Returns the temporary file a store file is written to first
+
+        The lock of a store file only serializes the writers of one process,
+        so the temporary file is unique to the process. Writers in other
+        processes then never write into the same temporary file.
+
+        Parameters
+        ----------
+        path: str
+            The path of the store file
+
+        Returns
+        -------
+        tmpPath: str
+            The path of the temporary file
+        """
+        return "{}.{}.tmp".format(path, os.getpid())
+
+    def getSegmentPaths(self, ticker, interval):
+        """Returns the paths of all the segments of a ticker, oldest first
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+
+        Returns
+        -------
+        segmentPaths: list
+            The paths of the segment files
+        """
+        segmentDir = self.getPath(ticker, interval) + self.SEGMENTS
+        if not os.path.isdir(segmentDir):
+            return []
+        segmentPaths = [os.path.join(segmentDir, fileName)
+                        for fileName in os.listdir(segmentDir)
+                        if fileName.endswith(self.EXTENSION)]
+        return sorted(segmentPaths)
+
+    def getVersion(self, ticker, interval, checkFiles=True):
+        """Returns the version of the stored data of a ticker
+
+        The version changes whenever the data is written or appended to,
+        either through the in-process version counter or, for changes made
+        by other processes, through the modification time and size of the
+        files.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+        checkFiles: bool, optional
+            Whether the files are checked as well. If False, only the
+            in-process version counter is used and the disk is not touched
+
+        Returns
+        -------
+        version: tuple
+            The version counter, followed by the path, modification time
+            and size of every file
+        """
+        path = self.getPath(ticker, interval)
+        with storeLocksGuard:
+            version = [storeVersions.get(os.path.abspath(path), 0)]
+        if not checkFiles:
+            return tuple(version)
+        paths = [path, self.getPath(ticker, interval, ".csv")]
+        paths.extend(self.getSegmentPaths(ticker, interval))
+        for filePath in paths:
+            if os.path.isfile(filePath):
+                stat = os.stat(filePath)
+                version.append((filePath, stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def getLastTimestamp(self, ticker, interval):
+        """Returns the timestamp of the last stored bar
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+
+        Returns
+        -------
+        timestamp: pandas.Timestamp
+            The timestamp (UTC) of the last bar, None if nothing is stored
+        """
+        paths = [self.getPath(ticker, interval)]
+        paths.extend(self.getSegmentPaths(ticker, interval))
+        for path in reversed(paths):
+            index, _, _ = self.readFileArrays(path)
+            if len(index) > 0:
+                return pd.Timestamp(int(index[-1]), tz="UTC")
+        return None
+
+    def writeFile(self, path, data):
+        """Writes a DataFrame into a single store file
+
+        Parameters
+        ----------
+        path: str
+            The location of the file
+        data: pandas.DataFrame
+            The ticker data with a DatetimeIndex
+        """
+        data = data.sort_index(ascending=True)
+        index = pd.DatetimeIndex(data.index)
+        tz = None
+        if index.tz is not None:
+            tz = str(index.tz)
+            index = index.tz_convert("UTC").tz_localize(None)
+        arrays = [index.values.astype("datetime64[ns]").view(np.int64)]
+        columns = []
+        for column in data.columns:
+            values = data[column].values
+            if not np.issubdtype(values.dtype, np.number):
+                continue
+            if column.lower() in self.dtypes:
+                dtype = np.dtype(self.dtypes[column.lower()])
+                # missing or fractional values can't be stored as integers
+                if dtype.kind in "iu" and not (np.isfinite(values).all() and
+                                               (values % 1 == 0).all()):
+                    dtype = np.dtype("<f8")
+                values = values.astype(dtype, copy=False)
+            arrays.append(np.ascontiguousarray(values))
+            columns.append({"name": column, "dtype": values.dtype.str})
+
+        header = {"version": 1, "nrows": len(data), "tz": tz,
+                  "index": {"name": "Date", "dtype": "<i8"},
+                  "columns": columns, "blockSize": self.BLOCK_SIZE,
+                  "blockIndex": arrays[0][::self.BLOCK_SIZE].tolist()}
+        headerBytes = self.encodeHeader(header, arrays)
+        with open(path, "wb") as f:
+            f.write(self.MAGIC)
+            f.write(struct.pack("<Q", len(headerBytes)))
+            f.write(headerBytes)
+            for array in arrays:
+                f.write(b"\0" * self.getPadding(f.tell()))
+                f.write(array.tobytes())
+
+    def encodeHeader(self, header, arrays):
+        """Fills in the byte offsets of every array and encodes the header
+
+        Parameters
+        ----------
+        header: dict
+            The header without offsets
+        arrays: list
+            The index followed by every column
+
+        Returns
+        -------
+        headerBytes: bytes
+            The encoded header, padded to the alignment
+        """
+        # the offsets depend on the length of the header itself, so this is
+        # repeated until the encoded length stops changing
+        headerLength = 0
+        while True:
+            offset = len(self.MAGIC) + 8 + headerLength
+            offsets = []
+            for array in arrays:
+                offset += self.getPadding(offset)
+                offsets.append(offset)
+                offset += array.nbytes
+            header["index"]["offset"] = offsets[0]
+            for column, columnOffset in zip(header["columns"], offsets[1:]):
+                column["offset"] = columnOffset
+            headerBytes = json.dumps(header).encode("utf-8")
+            headerBytes += b" " * self.getPadding(len(self.MAGIC) + 8 +
+                                                  len(headerBytes))
+            if len(headerBytes) == headerLength:
+                return headerBytes
+            headerLength = len(headerBytes)
+
+    def getPadding(self, offset):
+        return (-offset) % self.ALIGNMENT
+
+    def readHeader(self, path):
+        """Reads the header of a store file
+
+        Parameters
+        ----------
+        path: str
+            The location of the file
+
+        Returns
+        -------
+        header: dict
+            The decoded header
+        """
+        with open(path, "rb") as f:
+            magic = f.read(len(self.MAGIC))
+            if magic != self.MAGIC:
+                raise Exception("{} is not a valid tick file".format(path))
+            headerLength = struct.unpack("<Q", f.read(8))[0]
+            return json.loads(f.read(headerLength).decode("utf-8"))
+
+    def readArrays(self, ticker, interval):
+        """Memory maps the index and columns of a ticker
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+
+        Returns
+        -------
+        index: numpy.memmap
+            The int64 epoch (ns, UTC) index. If there are segments that have
+            not been compacted yet, this is an in-memory copy instead
+        columns: dict
+            A dictionary of the read-only memory mapped columns
+        header: dict
+            The header of the file
+        """
+        parts, header = self.readParts(ticker, interval)
+        index, columns = self.concatParts(parts, header)
+        return index, columns, dict(header, nrows=len(index))
+
+    def readParts(self, ticker, interval):
+        """Memory maps the main file and every segment of a ticker
+
+        Rows of a segment that are already in an earlier part (because a
+        compaction merged it in the meantime) are left out.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+
+        Returns
+        -------
+        parts: list
+            The (index, columns, header) of the main file and every
+            segment, oldest first
+        header: dict
+            The header of the main file
+        """
+        path = self.getPath(ticker, interval)
+        if not os.path.isfile(path):
+            self.migrateCSV(ticker, interval)
+        index, columns, header = self.readFileArrays(path)
+        parts = [(index, columns, header)]
+        lastTimestamp = index[-1] if len(index) else None
+        for segmentPath in self.getSegmentPaths(ticker, interval):
+            try:
+                segIndex, segColumns, segHeader = \
+                    self.readFileArrays(segmentPath)
+            except FileNotFoundError:
+                # removed by a compaction that finished in the meantime
+                continue
+            if lastTimestamp is not None and len(segIndex) > 0 and \
+                    segIndex[0] <= lastTimestamp:
+                keep = segIndex > lastTimestamp
+                segIndex = segIndex[keep]
+                segColumns = {name: column[keep]
+                              for name, column in segColumns.items()}
+                # the block index no longer matches the filtered rows
+                segHeader = dict(segHeader, blockIndex=None)
+            if len(segIndex) == 0:
+                continue
+            parts.append((segIndex, segColumns, segHeader))
+            lastTimestamp = segIndex[-1]
+        return parts, header
+
+    def concatParts(self, parts, header):
+        if len(parts) == 1:
+            return parts[0][:2]
+        if len(parts) == 0:
+            return np.empty(0, dtype=np.int64), \
+                {column["name"]: np.empty(0, dtype=column["dtype"])
+                 for column in header["columns"]}
+        index = np.concatenate([part[0] for part in parts])
+        columns = {name: np.concatenate([part[1][name] for part in parts])
+                   for name in parts[0][1]}
+        return index, columns
+
+    def readTail(self, ticker, interval, numRows=None, after=None):
+        """Reads only the last rows of a ticker
+
+        The rows are sliced off the end of the memory mapped files, and the
+        rows after a timestamp are found by binary search, so the cost does
+        not depend on the length of the history.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+        numRows: int, optional
+            The number of rows to read from the end
+        after: str or pandas.Timestamp, optional
+            Only the rows after this time are read. If both numRows and
+            after are given, the rows satisfying both are read
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The last rows of the ticker data
+        """
+        parts, header = self.readParts(ticker, interval)
+        if after is not None:
+            after = self.toEpoch(after, header["tz"])
+        remaining = numRows
+        selected = []
+        for index, columns, partHeader in reversed(parts):
+            start = 0
+            if after is not None:
+                start = self.locate(index, partHeader, after, "right")
+            if remaining is not None:
+                start = max(start, len(index) - remaining)
+                remaining -= len(index) - start
+            if start < len(index):
+                selected.insert(0, (index[start:],
+                                    {name: column[start:]
+                                     for name, column in columns.items()},
+                                    partHeader))
+            if (remaining is not None and remaining <= 0) or start > 0:
+                break
+        index, columns = self.concatParts(selected, header)
+        return self.toDataFrame(index, columns, header["tz"])
+
+    def getRange(self, ticker, interval, start=None, end=None,
+                 columns=None):
+        """Reads the rows of a ticker between two times
+
+        The bounds are first narrowed down with the sparse block index in
+        the header and then searched for within a single block, so only the
+        blocks that cover the range (and only the requested columns) are
+        read from disk.
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+        start: str or pandas.Timestamp, optional
+            The first time to include. If None, reads from the first row
+        end: str or pandas.Timestamp, optional
+            The last time to include. If None, reads till the last row
+        columns: list, optional
+            The columns to read. If None, every column is read
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The rows of the ticker data within the range
+        """
+        parts, header = self.readParts(ticker, interval)
+        if start is not None:
+            start = self.toEpoch(start, header["tz"])
+        if end is not None:
+            end = self.toEpoch(end, header["tz"])
+        selected = []
+        for index, partColumns, partHeader in parts:
+            if len(index) == 0:
+                continue
+            if start is not None and index[-1] < start:
+                continue
+            if end is not None and index[0] > end:
+                break
+            lo = 0
+            hi = len(index)
+            if start is not None:
+                lo = self.locate(index, partHeader, start, "left")
+            if end is not None:
+                hi = self.locate(index, partHeader, end, "right")
+            if columns is not None:
+                partColumns = {name: partColumns[name] for name in columns}
+            selected.append((index[lo:hi],
+                             {name: column[lo:hi]
+                              for name, column in partColumns.items()},
+                             partHeader))
+        if not selected and columns is not None:
+            header = dict(header, columns=[column for column
+                                           in header["columns"]
+                                           if column["name"] in columns])
+        index, partColumns = self.concatParts(selected, header)
+        return self.toDataFrame(index, partColumns, header["tz"])
+
+    def locate(self, index, header, timestamp, side):
+        """Finds the position of a timestamp in the index of a file
+
+        Parameters
+        ----------
+        index: numpy.ndarray
+            The int64 epoch index of the file
+        header: dict
+            The header of the file
+        timestamp: int
+            The epoch (ns, UTC) to look for
+        side: str
+            "left" for the first position with a timestamp >= timestamp,
+            "right" for the first position with a timestamp > timestamp
+
+        Returns
+        -------
+        position: int
+            The position in the index
+        """
+        blockIndex = header.get("blockIndex")
+        if not blockIndex:
+            return int(np.searchsorted(index, timestamp, side=side))
+        blockSize = header["blockSize"]
+        block = int(np.searchsorted(blockIndex, timestamp, side=side)) - 1
+        if block < 0:
+            return 0
+        lo = block * blockSize
+        hi = min(lo + blockSize, len(index))
+        return lo + int(np.searchsorted(index[lo:hi], timestamp, side=side))
+
+    def toEpoch(self, timestamp, tz):
+        """Converts a time into the int64 epoch used by the index
+
+        Parameters
+        ----------
+        timestamp: str or pandas.Timestamp
+            The time. If it has no timezone, it is taken to be in tz
+        tz: str
+            The timezone of the ticker data
+
+        Returns
+        -------
+        epoch: int
+            The nanoseconds since the epoch (UTC)
+        """
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tz is None:
+            timestamp = timestamp.tz_localize(tz or "UTC")
+        return timestamp.value
+
+    def readFileArrays(self, path):
+        header = self.readHeader(path)
+        nrows = header["nrows"]
+        if nrows == 0:
+            index = np.empty(0, dtype=np.int64)
+            columns = {column["name"]: np.empty(0, dtype=column["dtype"])
+                       for column in header["columns"]}
+            return index, columns, header
+        index = np.memmap(path, dtype=header["index"]["dtype"], mode="r",
+                          offset=header["index"]["offset"], shape=(nrows,))
+        columns = {}
+        for column in header["columns"]:
+            columns[column["name"]] = np.memmap(path, dtype=column["dtype"],
+                                                mode="r",
+                                                offset=column["offset"],
+                                                shape=(nrows,))
+        return index, columns, header
+
+    def read(self, ticker, interval):
+        """Reads the ticker data as a DataFrame
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The ticker data, sorted by date
+        """
+        index, columns, header = self.readArrays(ticker, interval)
+        return self.toDataFrame(index, columns, header["tz"])
+
+    def toDataFrame(self, index, columns, tz=None):
+        """Builds a DataFrame over the given arrays without copying them
+
+        Parameters
+        ----------
+        index: numpy.ndarray
+            The int64 epoch (ns, UTC) index
+        columns: dict
+            A dictionary of the column arrays
+        tz: str, optional
+            The timezone the index is to be converted to
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The ticker data
+        """
+        dates = pd.DatetimeIndex(np.asarray(index).view("datetime64[ns]"),
+                                 name="Date")
+        if tz is not None:
+            dates = dates.tz_localize("UTC").tz_convert(tz)
+        return pd.DataFrame(columns, index=dates, copy=False)
+
+    def migrateCSV(self, ticker, interval, removeCSV=False):
+        """Converts a legacy CSV file of a ticker into the store format
+
+        Parameters
+        ----------
+        ticker: str
+            The ticker symbol of the stock
+        interval: str
+            The interval of the data
+        removeCSV: bool, optional
+            Whether the CSV file is to be deleted after the migration
+        """
+        csvPath = self.getPath(ticker, interval, ".csv")
+        if not os.path.isfile(csvPath):
+            message = "No data found for {} at {} interval"
+            raise Exception(message.format(ticker, interval))
+        data = pd.read_csv(csvPath, index_col="Date", parse_dates=["Date"])
+        self.write(ticker, interval, data)
+        if removeCSV:
+            os.remove(csvPath)
+
+
+def migrateCSVStore(rootPath="DataStore/StockData", removeCSV=False):
+    """Module level method to migrate an entire CSV tree to the tick store
+
+    Parameters
+    ----------
+    rootPath: str
+        The location under which the CSV files are stored as
+        <rootPath>/<INTERVAL>/<ticker>.csv
+    removeCSV: bool, optional
+        Whether the CSV files are to be deleted after migration
+
+    Returns
+    -------
+    migrated: list
+        A list of (ticker, interval) tuples that were migrated
+    """
+    store = TickStore(rootPath)
+    migrated = []
+    for interval in sorted(os.listdir(rootPath)):
+        intervalPath = os.path.join(rootPath, interval)
+        if not os.path.isdir(intervalPath):
+            continue
+        for fileName in sorted(os.listdir(intervalPath)):
+            if not fileName.endswith(".csv"):
+                continue
+            ticker = fileName[:-4]
+            try:
+                store.migrateCSV(ticker, interval, removeCSV)
+                migrated.append((ticker, interval))
+            except Exception as e:
+                print("Could not migrate {}/{}: {}".format(interval, ticker,
+                                                           e))
+    return migrated
+
+
+if __name__ == "__main__":
+    import sys
+    rootPath = sys.argv[1] if len(sys.argv) > 1 else "DataStore/StockData"
+    for ticker, interval in migrateCSVStore(rootPath):
+        print("Migrated {}/{}".format(interval, ticker))
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+import threading
+
+sharedCache = None
+sharedCacheLock = threading.Lock()
+
+
+class TickerCache():
+    """A thread-safe LRU cache of ticker DataFrames
+
+    Entries are stored along with the version of the data they were read
+    from, and an entry whose version no longer matches is dropped instead of
+    being returned. The least recently used entries are evicted once the
+    cached DataFrames take up more than memoryBudget bytes.
+
+    The cached DataFrames are shared by every caller and must not be
+    modified in place.
+
+    Attributes
+    ----------
+    memoryBudget: int
+        The maximum number of bytes taken up by the cached DataFrames
+    checkFiles: bool
+        Whether versions include the modification time and size of the
+        files. If False, only writes made by this process invalidate entries
+    entries: collections.OrderedDict
+        The cached (version, data, size) of each key, oldest first
+    stats: dict
+        The number of hits, misses, invalidations and evictions
+    """
+    def __init__(self, memoryBudget=512 * 1024 ** 2, checkFiles=True):
+        self.memoryBudget = memoryBudget
+        self.checkFiles = checkFiles
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0,
+                      "evictions": 0}
+
+    def get(self, key, version):
+        """Returns the cached data for a key
+
+        Parameters
+        ----------
+        key: tuple
+            The key of the data, for example (ticker, interval)
+        version: tuple
+            The current version of the data
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The cached data, None if it is missing or outdated
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[0] != version:
+                self.removeEntry(key)
+                self.stats["invalidations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, version, data):
+        """Adds data to the cache, evicting old entries if needed
+
+        Parameters
+        ----------
+        key: tuple
+            The key of the data
+        version: tuple
+            The version of the data
+        data: pandas.DataFrame
+            The data to be cached
+        """
+        size = int(data.memory_usage(index=True, deep=False).sum())
+        if size > self.memoryBudget:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.removeEntry(key)
+            self.entries[key] = (version, data, size)
+            self.size += size
+            while self.size > self.memoryBudget:
+                oldestKey = next(iter(self.entries))
+                self.removeEntry(oldestKey)
+                self.stats["evictions"] += 1
+
+    def getOrLoad(self, key, version, loader):
+        """Returns the cached data, loading and caching it on a miss
+
+        Parameters
+        ----------
+        key: tuple
+            The key of the data
+        version: tuple
+            The current version of the data
+        loader: function
+            Called with no arguments to load the data on a miss
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The data for the key
+        """
+        data = self.get(key, version)
+        if data is None:
+            data = loader()
+            self.put(key, version, data)
+        return data
+
+    def removeEntry(self, key):
+        _, _, size = self.entries.pop(key)
+        self.size -= size
+
+    def clear(self):
+        """Removes every entry from the cache
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def getStats(self):
+        """Returns the statistics of the cache
+
+        Returns
+        -------
+        stats: dict
+            The hits, misses, invalidations and evictions along with the
+            hit rate, the number of entries and the bytes in use
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["bytes"] = self.size
+        lookups = stats["hits"] + stats["misses"]
+        stats["hitRate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def getTickerCache():
+    """Module level method to get the process wide ticker cache
+
+    Returns
+    -------
+    cache: TickerCache
+        The cache shared by every reader in this process
+    """
+    global sharedCache
+    with sharedCacheLock:
+        if sharedCache is None:
+            sharedCache = TickerCache()
+        return sharedCache
@@ -0,0 +1,337 @@
+import json
+import os
+import shutil
+import numpy as np
+
+
+class WindowStore():
+    """Stores the training windows of a data processor on disk
+
+    Exporting the windows of a processor once lets a model train on more
+    windows than fit in memory. The windows of each split (train and valid)
+    are written to shards of at most shardBytes, under
+    <rootPath>/<name>/<split>-<shard>.x.bin and .y.bin. Each shard file is
+    the windows back to back as raw little endian values, so it can be
+    memory mapped with numpy or streamed by tf.data without parsing. An
+    index.json next to the shards records the shape and dtype of the windows
+    and the number of windows in each shard.
+
+    Attributes
+    ----------
+    rootPath: str
+        The location of the exported windows
+    shardBytes: int
+        The maximum size of the X and Y files of a shard together
+    """
+    def __init__(self, rootPath="DataStore/WindowStore",
+                 shardBytes=256 * 1024 ** 2):
+        self.rootPath = rootPath
+        self.shardBytes = shardBytes
+
+    def getPath(self, name, fileName=None):
+        path = os.path.join(self.rootPath, name)
+        if fileName is not None:
+            path = os.path.join(path, fileName)
+        return path
+
+    def exists(self, name):
+        return os.path.isfile(self.getPath(name, "index.json"))
+
+    def readIndex(self, name):
+        """Returns the index of exported windows
+
+        Parameters
+        ----------
+        name: str
+            The name the windows were exported under
+
+        Returns
+        -------
+        index: dict
+            The configuration of the processor, the shape and dtype of the
+            windows and the shards of each split
+        """
+        if not self.exists(name):
+            raise Exception("No windows have been exported as {}".format(name))
+        with open(self.getPath(name, "index.json")) as f:
+            return json.load(f)
+
+    def getConfig(self, dataProcessor):
+        """Returns the configuration of a processor that decides its windows
+
+        Parameters
+        ----------
+        dataProcessor: Core.DataProcessor
+            The processor
+
+        Returns
+        -------
+        config: dict
+            The JSON serializable configuration, see
+            Core.DataProcessor.getConfig()
+        """
+        return dataProcessor.getConfig()
+
+    def export(self, dataProcessor, name, validationSplit=0.7,
+               chunkSize=4096):
+        """Method to write the training windows of a processor to disk
+
+        The inputProcessor() of the processor must return the training
+        windows as numpy arrays (X, Y). Windows are copied to disk chunkSize
+        windows at a time, so only the raw ticker data of the processor
+        needs to fit in memory. Windows already exported under the same name
+        are replaced once the export finishes.
+
+        Parameters
+        ----------
+        dataProcessor: Core.DataProcessor
+            The processor whose windows are exported
+        name: str
+            The name to export the windows under
+        validationSplit: float, optional
+            The portion of each ticker's data used for training
+        chunkSize: int, optional
+            The number of windows copied at a time
+
+        Returns
+        -------
+        index: dict
+            The index of the exported windows
+        """
+        folder = self.getPath(name)
+        tmpFolder = folder + ".tmp"
+        if os.path.isdir(tmpFolder):
+            shutil.rmtree(tmpFolder)
+        os.makedirs(tmpFolder)
+        writers = {split: ShardWriter(tmpFolder, split, self.shardBytes,
+                                      chunkSize)
+                   for split in ["train", "valid"]}
+        tickers = [ticker for ticker in dataProcessor.tickers
+                   if ticker in dataProcessor.tickerData]
+        for ticker in tickers:
+            windows = dataProcessor.getTickerWindows(ticker, validationSplit)
+            for split, processed in zip(["train", "valid"], windows):
+                if not isinstance(processed, tuple) or len(processed) != 2:
+                    message = "inputProcessor must return numpy (X, Y) " + \
+                        "windows to be exported"
+                    raise Exception(message)
+                writers[split].write(*processed)
+        for writer in writers.values():
+            writer.close()
+        shapes = [writer.shapes for writer in writers.values()
+                  if writer.shapes is not None]
+        if len(shapes) == 0:
+            shutil.rmtree(tmpFolder)
+            raise Exception("The processor has no windows to export")
+        if any(shape != shapes[0] for shape in shapes):
+            shutil.rmtree(tmpFolder)
+            raise Exception("The train and valid windows differ in shape")
+        index = {"config": self.getConfig(dataProcessor),
+                 "tickers": tickers, "validationSplit": validationSplit,
+                 "xShape": shapes[0][0], "yShape": shapes[0][1],
+                 "xDType": shapes[0][2], "yDType": shapes[0][3],
+                 "splits": {split: {"count": writer.count,
+                                    "shards": writer.shards}
+                            for split, writer in writers.items()}}
+        with open(os.path.join(tmpFolder, "index.json"), "w") as f:
+            json.dump(index, f)
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+        os.replace(tmpFolder, folder)
+        return index
+
+    def getArrays(self, name, split="train", shard=0):
+        """Returns the windows of a shard as memory mapped arrays
+
+        Parameters
+        ----------
+        name: str
+            The name the windows were exported under
+        split: str, optional
+            Either train or valid
+        shard: int, optional
+            The position of the shard in the split
+
+        Returns
+        -------
+        X: numpy.memmap
+            The read-only inputs of the shard
+        Y: numpy.memmap
+            The read-only targets of the shard
+        """
+        index = self.readIndex(name)
+        entry = index["splits"][split]["shards"][shard]
+        shape = (entry["count"],)
+        X = np.memmap(self.getPath(name, entry["x"]), mode="r",
+                      dtype=np.dtype(index["xDType"]).newbyteorder("<"),
+                      shape=shape + tuple(index["xShape"]))
+        Y = np.memmap(self.getPath(name, entry["y"]), mode="r",
+                      dtype=np.dtype(index["yDType"]).newbyteorder("<"),
+                      shape=shape + tuple(index["yShape"]))
+        return X, Y
+
+    def getDataset(self, name, split="train", batchSize=64, shuffle=True,
+                   shuffleBuffer=10000, cycleLength=4, seed=None):
+        """Returns a tf.data pipeline streaming exported windows from disk
+
+        Several shards are read at once by a parallel interleave and the
+        raw records are decoded a batch at a time, so the pipeline only
+        holds the shuffle buffer and a few batches in memory.
+
+        Parameters
+        ----------
+        name: str
+            The name the windows were exported under
+        split: str, optional
+            Either train or valid
+        batchSize: int, optional
+            The number of windows in a batch
+        shuffle: bool, optional
+            Whether the shards and the windows are shuffled on every epoch
+        shuffleBuffer: int, optional
+            The number of windows held in the shuffle buffer
+        cycleLength: int, optional
+            The number of shards read at the same time
+        seed: int, optional
+            The seed of the shuffling
+
+        Returns
+        -------
+        dataset: tf.data.Dataset
+            The batches of (X, Y) windows
+        """
+        import tensorflow as tf
+        from tensorflow import data as DS
+
+        index = self.readIndex(name)
+        shards = index["splits"][split]["shards"]
+        xShape, yShape = index["xShape"], index["yShape"]
+        xDType = tf.as_dtype(np.dtype(index["xDType"]).name)
+        yDType = tf.as_dtype(np.dtype(index["yDType"]).name)
+        xBytes = int(np.prod(xShape)) * xDType.size
+        yBytes = int(np.prod(yShape)) * yDType.size
+        xPaths = [self.getPath(name, shard["x"]) for shard in shards]
+        yPaths = [self.getPath(name, shard["y"]) for shard in shards]
+        paths = DS.Dataset.from_tensor_slices(
+            (tf.constant(xPaths, dtype=tf.string),
+             tf.constant(yPaths, dtype=tf.string)))
+        if shuffle:
+            paths = paths.shuffle(max(1, len(shards)), seed=seed,
+                                  reshuffle_each_iteration=True)
+
+        def readShard(xPath, yPath):
+            return DS.Dataset.zip((
+                DS.FixedLengthRecordDataset(xPath, xBytes,
+                                            buffer_size=1024 ** 2),
+                DS.FixedLengthRecordDataset(yPath, yBytes,
+                                            buffer_size=1024 ** 2)))
+
+        def decode(x, y):
+            x = tf.reshape(tf.io.decode_raw(x, xDType), [-1] + xShape)
+            y = tf.reshape(tf.io.decode_raw(y, yDType), [-1] + yShape)
+            return x, y
+
+        dataset = paths.interleave(readShard, cycle_length=cycleLength,
+                                   num_parallel_calls=DS.AUTOTUNE,
+                                   deterministic=not shuffle)
+        if shuffle:
+            dataset = dataset.shuffle(shuffleBuffer, seed=seed,
+                                      reshuffle_each_iteration=True)
+        dataset = dataset.batch(batchSize)
+        dataset = dataset.map(decode, num_parallel_calls=DS.AUTOTUNE)
+        return dataset.prefetch(DS.AUTOTUNE)
+
+    def remove(self, name):
+        if os.path.isdir(self.getPath(name)):
+            shutil.rmtree(self.getPath(name))
+
+
+class ShardWriter():
+    """Writes the windows of one split into shards of raw values
+
+    Attributes
+    ----------
+    folder: str
+        The folder the shards are written to
+    split: str
+        The name of the split, used as the prefix of the shard files
+    shardBytes: int
+        The maximum size of the X and Y files of a shard together
+    chunkSize: int
+        The number of windows copied at a time
+    shards: list
+        The file names and window count of each finished shard
+    shapes: tuple
+        The shape of a window of X and Y and their dtypes, None until the
+        first windows are written
+    count: int
+        The number of windows written
+    """
+    def __init__(self, folder, split, shardBytes, chunkSize=4096):
+        self.folder = folder
+        self.split = split
+        self.shardBytes = shardBytes
+        self.chunkSize = chunkSize
+        self.shards = []
+        self.shapes = None
+        self.count = 0
+        self.files = None
+        self.shardCount = 0
+        self.capacity = 0
+
+    def write(self, X, Y):
+        """Method to append windows to the split
+
+        Parameters
+        ----------
+        X: numpy.ndarray
+            The inputs, one window along the first axis
+        Y: numpy.ndarray
+            The targets of the inputs
+        """
+        X, Y = np.asarray(X), np.asarray(Y)
+        if len(X) != len(Y):
+            raise Exception("There must be a target for every window")
+        if len(X) == 0:
+            return
+        X = X.astype(X.dtype.newbyteorder("<"), copy=False)
+        Y = Y.astype(Y.dtype.newbyteorder("<"), copy=False)
+        shapes = (list(X.shape[1:]), list(Y.shape[1:]), X.dtype.name,
+                  Y.dtype.name)
+        if self.shapes is None:
+            self.shapes = shapes
+            windowBytes = X[0].nbytes + Y[0].nbytes
+            self.capacity = max(1, self.shardBytes // windowBytes)
+        elif shapes != self.shapes:
+            raise Exception("Every window must have the same shape")
+        start = 0
+        while start < len(X):
+            if self.files is None:
+                self.open()
+            end = min(len(X), start + self.chunkSize,
+                      start + self.capacity - self.shardCount)
+            self.files[0].write(np.ascontiguousarray(X[start:end]).tobytes())
+            self.files[1].write(np.ascontiguousarray(Y[start:end]).tobytes())
+            self.shardCount += end - start
+            self.count += end - start
+            start = end
+            if self.shardCount == self.capacity:
+                self.close()
+
+    def open(self):
+        prefix = "{}-{:05d}".format(self.split, len(self.shards))
+        self.fileNames = (prefix + ".x.bin", prefix + ".y.bin")
+        self.files = [open(os.path.join(self.folder, fileName), "wb")
+                      for fileName in self.fileNames]
+        self.shardCount = 0
+
+    def close(self):
+        """Method to finish the shard being written, if any
+        """
+        if self.files is None:
+            return
+        for f in self.files:
+            f.close()
+        self.shards.append({"x": self.fileNames[0], "y": self.fileNames[1],
+                            "count": self.shardCount})
+        self.files = None
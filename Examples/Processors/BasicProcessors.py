@@ -1,6 +1,6 @@
 from Core.DataProcessor import DataProcessor
+from Core.Windowing import getWindows, getTrainingWindows
 import numpy as np
-from tensorflow import data as DS
 
 
 class UniVarProcessor(DataProcessor):
@@ -22,11 +22,13 @@ class UniVarProcessor(DataProcessor):
         to sequence or not
     tickerData: dict
         A dictionary containing all the ticker data
+    dtypes: dict, optional
+        The dtype policy of the features, see Core.DataProcessor
     """
 
     def __init__(self, tickers, features, lookBack, forecast,
-                 interval, isSeq2Seq=False):
-        super().__init__(tickers, features, interval)
+                 interval, isSeq2Seq=False, dtypes=None):
+        super().__init__(tickers, features, interval, dtypes)
 
         self.lookBack = lookBack
         self.forecast = forecast
@@ -37,13 +39,8 @@ class UniVarProcessor(DataProcessor):
         self.tickerData = self.getTickerData()
 
     def inputProcessor(self, data, context):
-        close = data["Close"]
-        if context["isTrain"]:
-            X, Y = self.convertToWindows(close, True)
-            return np.array(X), np.array(Y)
-        else:
-            X = self.convertToWindows(close, False)
-            return np.array(X)
+        close = self.getTickerValues(data, context, ["Close"])[:, 0]
+        return self.convertToWindows(close, context["isTrain"])
 
     def outputProcessor(self, modelOut, context):
         return modelOut
@@ -51,58 +48,28 @@ class UniVarProcessor(DataProcessor):
     def convertToWindows(self, data, isTrain, shuffle=False):
         """Converts the input data to a windowed dataset
 
+        The windows don't overlap, and are read-only views of the data
+        unless they are shuffled.
+
         Parameters
         ----------
-        data: np.array
-            The specific ticker data
+        data: numpy.ndarray
+            The close of the ticker
         isTrain: bool
             A boolean indicating whether to create a target
         shuffle: bool, optional
             A boolean indicating whether the data should be shuffled
         """
-        data = data.values
         if isTrain:
-            windowSize = self.lookBack + self.forecast
-            windowData = self.splitArray(data, windowSize, dropRemaining=True)
+            X, Y = getTrainingWindows(data, self.lookBack, self.forecast,
+                                      shift=self.lookBack + self.forecast,
+                                      isSeq2Seq=self.isSeq2Seq)
             if shuffle:
-                np.random.shuffle(windowData)
-
-            if not self.isSeq2Seq:
-                X = [item[:-self.forecast] for item in windowData]
-                Y = [item[-self.forecast:] for item in windowData]
-            else:
-                X = [item[:-self.forecast] for item in windowData]
-                Y = [item[self.forecast:] for item in windowData]
-
+                order = np.random.permutation(len(X))
+                X, Y = X[order], Y[order]
             return X, Y
         else:
-            windowData = self.splitArray(data, self.lookBack,
-                                         dropRemaining=True)
-            return windowData
-
-    def splitArray(self, array, unitLength, dropRemaining=False):
-        """A method to split an array into equal sized chunks
-
-        Parameters
-        ----------
-        array: list
-            The array that is to be split
-        unitLength: int
-            The chunk size
-        dropRemaining: bool, optional
-            Indicates whether leftover elements should be kept
-        """
-        start = 0
-        finalAr = []
-        while True:
-            end = start + unitLength
-            if end > len(array):
-                if not dropRemaining:
-                    finalAr.append(array[end-unitLength:])
-                break
-            finalAr.append(array[start:end])
-            start = end
-        return finalAr
+            return getWindows(data, self.lookBack, shift=self.lookBack)
 
 
 class MultiVarProcessor(DataProcessor):
@@ -126,23 +93,32 @@ class MultiVarProcessor(DataProcessor):
         to sequence or not
     tickerData: dict
         A dictionary containing all the ticker data
+    dtypes: dict, optional
+        The dtype policy of the features, see Core.DataProcessor
+    scaler: str, optional
+        The scaler of the features, for example minmax, zscore or
+        rolling_50. See Core.Scalers. None if the features are not scaled
     """
 
     def __init__(self, tickers, features, lookBack, forecast,
-                 targetFeature, interval, isSeq2Seq=False):
-        super().__init__(tickers, features, interval)
+                 targetFeature, interval, isSeq2Seq=False,
+                 dtypes=None, scaler=None):
+        super().__init__(tickers, features, interval, dtypes)
 
         self.lookBack = lookBack
         self.forecast = forecast
         self.yInd = self.features.index(targetFeature)
+        self.targetFeature = targetFeature
         self.tickers = tickers
         self.features = features
         self.isSeq2Seq = isSeq2Seq
+        self.scaler = scaler
 
         self.tickerData = self.getTickerData()
 
     def inputProcessor(self, data, context):
-        tickerData = data
+        tickerData = self.getTickerValues(data, context)
+        tickerData = self.scaleData(tickerData, context)
         if context["isTrain"]:
             ds = self.convertToWindows(tickerData, True)
             return ds
@@ -154,47 +130,36 @@ class MultiVarProcessor(DataProcessor):
         nOut = np.zeros(shape=(len(modelOut), self.forecast))
         for i, row in enumerate(modelOut):
             nOut[i] = row[-self.forecast:].reshape(-self.forecast,)
-        return nOut
+        # the last row of the window each prediction was made from
+        rows = np.arange(len(nOut)) * self.forecast + self.lookBack - 1
+        return self.unscaleData(nOut, context, self.yInd, rows)
 
     def convertToWindows(self, data, isTrain):
         """Converts the input data to a windowed dataset
 
+        The windows are read-only views of the data, see Core.Windowing.
+
         Parameters
         ----------
-        data: np.array
-            The specific ticker data
+        data: numpy.ndarray
+            The (time, feature) values of the ticker
         isTrain: bool
             A boolean indicating whether to create a target
-        shuffle: bool, optional
-            A boolean indicating whether the data should be shuffled
         """
-        data = data.values
-        dataset = DS.Dataset.from_tensor_slices(data)
         if isTrain:
-            dataset = dataset.window(self.lookBack + self.forecast,
-                                     shift=self.forecast,
-                                     drop_remainder=True)
-            dataset = dataset.flat_map(
-                lambda w: w.batch(self.lookBack + self.forecast))
-            if self.isSeq2Seq:
-                dataset = dataset.map(lambda w: (
-                    w[:-self.forecast], w[self.forecast:, self.yInd]))
-            else:
-                dataset = dataset.map(lambda w: (
-                    w[:-self.forecast], w[-self.forecast:, self.yInd]))
-            return dataset
+            return getTrainingWindows(data, self.lookBack, self.forecast,
+                                      shift=self.forecast,
+                                      isSeq2Seq=self.isSeq2Seq,
+                                      target=self.yInd)
         else:
-            dataset = dataset.window(self.lookBack, shift=self.forecast,
-                                     drop_remainder=True)
-            dataset = dataset.flat_map(lambda w: w.batch(self.lookBack))
-            dataset = dataset.batch(1).prefetch(1)
-            return dataset
+            return getWindows(data, self.lookBack, shift=self.forecast)
 
 
 class testProcessor(DataProcessor):
     def __init__(self, tickers, features, lookBack, forecast,
-                 targetFeature, interval, isSeq2Seq=False):
-        super().__init__(tickers, features, interval)
+                 targetFeature, interval, isSeq2Seq=False,
+                 dtypes=None, scaler="minmax"):
+        super().__init__(tickers, features, interval, dtypes)
 
         self.lookBack = lookBack
         self.forecast = forecast
@@ -203,16 +168,13 @@ class testProcessor(DataProcessor):
         self.tickers = tickers
         self.features = features
         self.isSeq2Seq = isSeq2Seq
+        self.scaler = scaler
 
         self.tickerData = self.getTickerData()
 
     def inputProcessor(self, data, context):
-        tickerData = self.tickerData[context['ticker']]
-        data = data.copy()
-        for feature in self.features:
-            data[feature] = (data[feature] - min(tickerData[feature])) /\
-                            (max(tickerData[feature]) -
-                                min(tickerData[feature]))
+        data = self.getTickerValues(data, context)
+        data = self.scaleData(data, context)
         if context["isTrain"]:
             ds = self.convertToWindows(data, True)
             return ds
@@ -221,36 +183,19 @@ class testProcessor(DataProcessor):
             return ds
 
     def outputProcessor(self, modelOut, context):
-        data = self.tickerData[context['ticker']][self.targetFeature]
-        factor = max(data) - min(data)
-        out = (modelOut * factor) + min(data)
-        nOut = np.zeros(shape=(len(out), self.forecast))
-        for i, row in enumerate(out):
+        nOut = np.zeros(shape=(len(modelOut), self.forecast))
+        for i, row in enumerate(modelOut):
             nOut[i] = row[-self.forecast:].reshape(-self.forecast,)
-        return nOut
+        rows = np.arange(len(nOut)) * self.forecast + self.lookBack - 1
+        return self.unscaleData(nOut, context, self.yInd, rows)
 
     def convertToWindows(self, data, isTrain):
-        data = data.values
-        dataset = DS.Dataset.from_tensor_slices(data)
         if isTrain:
-            dataset = dataset.window(self.lookBack + self.forecast,
-                                     shift=1,
-                                     drop_remainder=True)
-            dataset = dataset.flat_map(
-                lambda w: w.batch(self.lookBack + self.forecast))
-            if self.isSeq2Seq:
-                dataset = dataset.map(lambda w: (
-                    w[:-self.forecast], w[self.forecast:, self.yInd]))
-            else:
-                dataset = dataset.map(lambda w: (
-                    w[:-self.forecast], w[-self.forecast:, self.yInd]))
-            return dataset
+            return getTrainingWindows(data, self.lookBack, self.forecast,
+                                      shift=1, isSeq2Seq=self.isSeq2Seq,
+                                      target=self.yInd)
         else:
-            dataset = dataset.window(self.lookBack, shift=self.forecast,
-                                     drop_remainder=True)
-            dataset = dataset.flat_map(lambda w: w.batch(self.lookBack))
-            dataset = dataset.batch(1).prefetch(1)
-            return dataset
+            return getWindows(data, self.lookBack, shift=self.forecast)
 
 
 class DQNProcessor(DataProcessor):
@@ -259,19 +204,19 @@ class DQNProcessor(DataProcessor):
     This DPF supports QLearning.BasicDQN and QLearning.WaveNetDQN.
 
     """
-    def __init__(self, tickers, features, lookBack, interval):
-        super().__init__(tickers, features, interval)
+    def __init__(self, tickers, features, lookBack, interval,
+                 dtypes=None):
+        super().__init__(tickers, features, interval, dtypes)
         self.lookBack = lookBack+1
 
     def inputProcessor(self, data, context):
-        data = data.diff(1).dropna().values.reshape(len(data)-1)
+        data = np.diff(self.getTickerValues(data, context)[:, 0])
         if len(data) == self.lookBack-1:
             return data.reshape(1, 1, self.lookBack-1)
-        shape = data.shape[:-1] + \
-            (data.shape[-1] - self.lookBack, self.lookBack-1)
-        strides = data.strides + (data.strides[-1],)
-        windowedData = np.lib.stride_tricks.as_strided(data, shape=shape,
-                                                       strides=strides)
+        # the windows ending on the last two bars are left out, training
+        # steps stop before them
+        count = max(0, len(data) - self.lookBack)
+        windowedData = getWindows(data, self.lookBack-1)[:count]
         # use below for for BasicDQN
         if len(windowedData) == 1:
             return windowedData.reshape(1, self.lookBack-1)
@@ -0,0 +1,110 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+from Core import Indicators
+from Core.StreamingIndicators import StreamingFeatures
+
+years = 3
+barsPerDay = 375
+# the bars the streaming indicators are checked on, as they are slow
+streamBars = 20000
+# the largest difference from pandas allowed, relative to the largest value
+tolerance = 1e-9
+features = ["sma_20", "sma_50", "ema_12", "ema_26", "rsi_14",
+            "macd_12_26_9", "macdsignal_12_26_9", "macdhist_12_26_9",
+            "bbupper_20_2", "bbmid_20", "bblower_20_2", "atr_14", "vwap",
+            "volatility_20", "returns_1"]
+
+
+def getMinuteSeries(years, seed=0):
+    """Generates a random walk of minute bars over trading days
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2017-01-02", periods=years * 250)
+    minutes = pd.timedelta_range("09:15:00", periods=barsPerDay, freq="1min")
+    index = (days.values[:, None] + minutes.values[None, :]).ravel()
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 5e-4, len(index))))
+    spread = np.abs(rng.normal(0, 5e-4, len(index))) * close
+    return pd.DataFrame({"Open": np.roll(close, 1), "High": close + spread,
+                         "Low": close - spread, "Close": close,
+                         "Volume": rng.integers(100, 10000, len(index))},
+                        index=pd.DatetimeIndex(index, name="Date"))
+
+
+def naiveIndicators(data):
+    """The same indicators with pandas rolling and ewm, one at a time
+    """
+    close = data["Close"]
+    out = {}
+    out["sma_20"] = close.rolling(20).mean()
+    out["sma_50"] = close.rolling(50).mean()
+    out["ema_12"] = close.ewm(span=12, adjust=False).mean()
+    out["ema_26"] = close.ewm(span=26, adjust=False).mean()
+    diff = close.diff()
+    avgGain = diff.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    avgLoss = (-diff).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    out["rsi_14"] = 100 - 100 / (1 + avgGain / avgLoss)
+    macd = close.ewm(span=12, adjust=False).mean() - \
+        close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    out["macd_12_26_9"] = macd
+    out["macdsignal_12_26_9"] = signal
+    out["macdhist_12_26_9"] = macd - signal
+    std = close.rolling(20).std(ddof=0)
+    out["bbupper_20_2"] = close.rolling(20).mean() + 2 * std
+    out["bbmid_20"] = close.rolling(20).mean()
+    out["bblower_20_2"] = close.rolling(20).mean() - 2 * std
+    previous = close.shift(1)
+    trueRange = pd.concat([data["High"] - data["Low"],
+                           (data["High"] - previous).abs(),
+                           (data["Low"] - previous).abs()], axis=1).max(axis=1)
+    out["atr_14"] = trueRange.ewm(alpha=1 / 14, adjust=False).mean()
+    typical = (data["High"] + data["Low"] + close) / 3
+    day = data.index.normalize()
+    out["vwap"] = (typical * data["Volume"]).groupby(day).cumsum() / \
+        data["Volume"].groupby(day).cumsum()
+    out["volatility_20"] = close.pct_change().rolling(20).std(ddof=0)
+    out["returns_1"] = close.pct_change()
+    return out
+
+
+def timeIt(function, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.time()
+        result = function()
+        best = min(best, time.time() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    data = getMinuteSeries(years)
+    print("{} minute bars, {} features".format(len(data), len(features)))
+    engineTime, engineOut = timeIt(
+        lambda: Indicators.computeFeatures(data, features))
+    naiveTime, naiveOut = timeIt(lambda: naiveIndicators(data))
+    print("FeatureEngine took {:.3f} seconds".format(engineTime))
+    print("pandas rolling took {:.3f} seconds".format(naiveTime))
+    # the recursive indicators are seeded differently, so they are compared
+    # once the seed has decayed
+    warmUp = max(Indicators.getWarmUp(feature) for feature in features)
+    for feature in features:
+        difference = np.nanmax(np.abs(engineOut[feature][warmUp:] -
+                                      naiveOut[feature].values[warmUp:]))
+        print("{:>20} max abs difference {:.3e}".format(feature, difference))
+        scale = np.nanmax(np.abs(naiveOut[feature].values[warmUp:]))
+        assert difference <= tolerance * scale, feature
+    assert engineTime < naiveTime, "FeatureEngine is slower than pandas"
+
+    # the streaming indicators start from the same bar as the engine, so
+    # they are compared from the first bar
+    tail = data[-streamBars:]
+    batch = Indicators.computeFeatures(tail, features)
+    streamed = StreamingFeatures(features).updateFrame(tail)
+    for feature in features:
+        assert np.array_equal(batch[feature], streamed[feature].values,
+                              equal_nan=True), feature
+    print("Streaming indicators are equal over {} bars".format(streamBars))
@@ -8,16 +8,20 @@ import torch.nn as nn
 import torch.nn.functional as F
 import torch.optim as optim
 from torch.utils.data import Dataset
-import yfinance as yf
+import sys
+sys.path.append(".")
+from DataStore.APIInterface import ReplaySource, ReplayClock
 
 
 ticker = "INDUSINDBK"
+# synthetic bars up to a fixed date, so every run trains on the same data
+source = ReplaySource(clock=ReplayClock("2020-06-01", speed=0))
 
 
 class TradeDataset(Dataset):
 
     def __init__(self, ticker, lookBack=30):
-        self.data = yf.Ticker("{}.NS".format(ticker)).history("max").reset_index()
+        self.data = source.getIntraDay(ticker).reset_index()
         self.data = self.data.sort_index()
         self.lookBack = lookBack
         self.createDataset()
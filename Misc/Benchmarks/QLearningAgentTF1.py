@@ -2,14 +2,18 @@ import numpy as np
 import tensorflow.compat.v1 as tf
 import random
 import tqdm
-import yfinance as yf
+import sys
+sys.path.append(".")
+from DataStore.APIInterface import ReplaySource, ReplayClock
 
 # tf.disable_v2_behavior()
 tf.compat.v1.disable_eager_execution()
 tf.set_random_seed(1997)
 
 ticker = "INDUSINDBK"
-df_full = yf.Ticker("{}.NS".format(ticker)).history("max").reset_index()
+# synthetic bars up to a fixed date, so every run trains on the same data
+source = ReplaySource(clock=ReplayClock("2020-06-01", speed=0))
+df_full = source.getIntraDay(ticker).reset_index()
 
 df = df_full.copy()["Close"]
 data = df.copy()
@@ -6,11 +6,15 @@ from matplotlib import pyplot as plt
 import numpy as np
 import random
 import tqdm
-import yfinance as yf
+import sys
+sys.path.append(".")
+from DataStore.APIInterface import ReplaySource, ReplayClock
 
 
 ticker = "INDUSINDBK"
-df_full = yf.Ticker("{}.NS".format(ticker)).history("max").reset_index()
+# synthetic bars up to a fixed date, so every run trains on the same data
+source = ReplaySource(clock=ReplayClock("2020-06-01", speed=0))
+df_full = source.getIntraDay(ticker).reset_index()
 # df_full = pd.read_csv("DataStore/StockData/{}.csv".format(ticker), index_col="timestamp")
 
 
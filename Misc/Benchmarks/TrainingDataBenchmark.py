@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath("."))
+from DataStore import APIInterface
+from DataStore.APIInterface import ReplaySource, ReplayClock
+from Examples.Processors.BasicProcessors import MultiVarProcessor
+
+tickerCounts = [1, 10, 100]
+features = ["Close", "Volume", "sma_20", "rsi_14"]
+lookBack = 30
+forecast = 1
+batchSize = 64
+
+
+def timeEpoch(dataset):
+    """Iterates over one epoch of a dataset
+
+    Returns
+    -------
+    duration: float
+        The seconds the epoch took
+    windows: int
+        The number of windows in the epoch
+    """
+    windows = 0
+    start = time.time()
+    for X, _ in dataset:
+        windows += int(X.shape[0])
+    return time.time() - start, windows
+
+
+if __name__ == "__main__":
+    # synthetic bars up to a fixed date, written to a scratch store so the
+    # real one is left untouched
+    APIInterface.setDefaultSource(
+        ReplaySource(clock=ReplayClock("2020-06-01", speed=0)))
+    os.chdir(tempfile.mkdtemp())
+    for count in tickerCounts:
+        tickers = ["BENCH{}".format(i) for i in range(count)]
+        start = time.time()
+        processor = MultiVarProcessor(tickers, features, lookBack, forecast,
+                                      "Close", "1D")
+        loadTime = time.time() - start
+        start = time.time()
+        trainDS, _ = processor.getTrainingData(batchSize=batchSize)
+        buildTime = time.time() - start
+        # the first epoch also fills the shuffle buffer and tunes prefetch
+        timeEpoch(trainDS)
+        epochTime, windows = timeEpoch(trainDS)
+        message = "{:>3} tickers: load {:.2f}s, build {:.2f}s, " + \
+            "epoch {:.2f}s, {} windows, {:.0f} windows/s"
+        print(message.format(count, loadTime, buildTime, epochTime, windows,
+                             windows / epochTime))
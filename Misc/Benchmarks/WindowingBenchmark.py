@@ -0,0 +1,79 @@
+import sys
+import time
+import numpy as np
+from tensorflow import data as DS
+
+sys.path.append(".")
+from Core.Windowing import getTrainingWindows
+
+bars = 100000
+numFeatures = 5
+lookBack = 60
+forecast = 5
+
+
+def splitArrayWindows(data):
+    """UniVarProcessor's windows before Core.Windowing
+    """
+    unitLength = lookBack + forecast
+    windowData = []
+    start = 0
+    while start + unitLength <= len(data):
+        windowData.append(data[start:start + unitLength])
+        start += unitLength
+    X = np.array([item[:-forecast] for item in windowData])
+    Y = np.array([item[-forecast:] for item in windowData])
+    return X, Y
+
+
+def datasetWindows(data, yInd=0):
+    """MultiVarProcessor's windows before Core.Windowing
+    """
+    dataset = DS.Dataset.from_tensor_slices(data)
+    dataset = dataset.window(lookBack + forecast, shift=forecast,
+                             drop_remainder=True)
+    dataset = dataset.flat_map(lambda w: w.batch(lookBack + forecast))
+    return dataset.map(lambda w: (w[:-forecast], w[-forecast:, yInd]))
+
+
+def stridedDataset(data, yInd=0):
+    X, Y = getTrainingWindows(data, lookBack, forecast, shift=forecast,
+                              target=yInd)
+    return DS.Dataset.from_tensor_slices((X, Y))
+
+
+def consume(dataset):
+    windows = 0
+    for X, _ in dataset.batch(256):
+        windows += len(X)
+    return windows
+
+
+def rate(function, repeat=3):
+    """Returns the best windows per second of function over a few runs
+    """
+    best = 0
+    for _ in range(repeat):
+        start = time.time()
+        windows = function()
+        best = max(best, windows / (time.time() - start))
+    return best
+
+
+def report(name, before, after):
+    message = "{:>9}: before {:>12,.0f} windows/s, after {:>14,.0f} " + \
+        "windows/s ({:.0f}x)"
+    print(message.format(name, before, after, after / before))
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    close = rng.normal(size=bars).astype(np.float32)
+    data = rng.normal(size=(bars, numFeatures)).astype(np.float32)
+    print("{} bars, lookBack {}, forecast {}".format(bars, lookBack,
+                                                      forecast))
+    report("UniVar", rate(lambda: len(splitArrayWindows(close)[0])),
+           rate(lambda: len(getTrainingWindows(
+               close, lookBack, forecast, shift=lookBack + forecast)[0])))
+    report("MultiVar", rate(lambda: consume(datasetWindows(data))),
+           rate(lambda: consume(stridedDataset(data))))
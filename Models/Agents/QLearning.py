@@ -104,7 +104,8 @@ class BasicDQN(AgentBase):
 
     def train(self, epochs=200, logFreq=1):
         self.trainData = self.dataProcessor.getTrainingData()
-        self.rawData = self.tickerData[self.dataProcessor.tickers[0]]
+        tickerData = self.dataProcessor.tickerData
+        self.rawData = tickerData[self.dataProcessor.tickers[0]]
         self.rawData = self.rawData.values
         for epoch in range(epochs):
             self.profit = 0
@@ -6,11 +6,16 @@ import sys
 import Examples.Processors.BasicProcessors as bp
 import traceback
 import dill
+import pandas as pd
 from Utils import Plotter as plot
 from Utils import UIInitializer as uint
-import pandas as pd
 from Core import Jobs as jobs
 from Core.Jobs import SubscriptionJob as sj
+from DataStore.TickStore import TickStore
+from DataStore.Resampler import Resampler
+
+tickStore = TickStore()
+resampler = Resampler(tickStore)
 
 
 def saveTelegramAPIKey(apiKey):
@@ -127,6 +132,10 @@ def buildForecaster(modelData, model):
         The compiled keras model
     """
     multiVar = buildForecasterDP(modelData)
+    if multiVar.loadFailures:
+        message = "Could not load {} for {}, training without them"
+        tbot.sendMessage(message.format(", ".join(multiVar.loadFailures),
+                                        modelData["modelName"]))
     model.assignDataProcessor(multiVar)
     model.buildModel()
     return model
@@ -150,7 +159,8 @@ def buildForecasterDP(modelData):
                                     lookBack=int(modelData["lookBack"]),
                                     forecast=int(modelData["forecast"]),
                                     targetFeature=modelData["targetFeature"],
-                                    isSeq2Seq=True)
+                                    isSeq2Seq=True,
+                                    scaler=modelData.get("scaler"))
     return multiVar
 
 
@@ -171,7 +181,7 @@ def trainAndSaveForecaster(model, modelName):
         The values of the specified metrics after training.
         Metrics may include MSE, Loss etc,...
     """
-    model.train(validationSplit=0.8, epochs=5000, batchSize=32)
+    model.train(validationSplit=0.8, epochs=5000, batchSize=32, cache=True)
     model.saveModel(modelName)
     return model.history
 
@@ -251,11 +261,13 @@ def getTickers(modelLoc):
     return dataProc.tickers
 
 
-def getForecasterPlot(modelLoc, ticker, plotType, numDays, modelType):
+def getForecasterPlot(modelLoc, ticker, plotType, numDays, modelType,
+                      start=None, end=None):
     """Method to get the plotly plots for the ticker
 
     This method plots the entire raw data for the ticker as well
-    as the predictions.
+    as the predictions. If start or end is given, only the bars within
+    that range are read, plotted and predicted on.
 
     Parameters
     ----------
@@ -270,6 +282,10 @@ def getForecasterPlot(modelLoc, ticker, plotType, numDays, modelType):
         The number of days used for the model prediction
     modelType: str
         Indicates whether the model is an agent or a forecaster
+    start: str, optional
+        The first date to plot
+    end: str, optional
+        The last date to plot
 
     Returns
     -------
@@ -295,14 +311,34 @@ def getForecasterPlot(modelLoc, ticker, plotType, numDays, modelType):
         return {"error": message.format(numDays,
                                         model.dataProcessor.lookBack)}
 
-    allData = getTickerData(ticker, model.dataProcessor.interval)
-    allData = model.dataProcessor.getFeatures(allData)
-
-    if numDays == -1 or numDays >= len(allData):
-        reqData = allData
+    dataProcessor = model.dataProcessor
+    allFeatures = None
+    if start is not None or end is not None:
+        allData = getTickerData(ticker, dataProcessor.interval)
+        first, last = getRangePositions(allData.index, start, end)
+        if last - first < dataProcessor.lookBack:
+            message = ("Cannot predict for {} bars when model's"
+                       " lookBack={}")
+            return {"error": message.format(last - first,
+                                            dataProcessor.lookBack)}
+        # the features of the first bars need the warm-up bars before them
+        warmUpStart = max(0, first - dataProcessor.getWarmUp())
+        allFeatures = dataProcessor.getFeatures(
+            allData.iloc[warmUpStart:last])[first - warmUpStart:]
+        allData = allData.iloc[first:last]
+        reqData = allFeatures
     else:
-        numDays = int(numDays)
-        reqData = allData[-numDays:]
+        allData = getTickerData(ticker, dataProcessor.interval)
+        if numDays == -1 or numDays >= len(allData):
+            reqData = dataProcessor.getFeatures(allData)
+            allFeatures = reqData
+        else:
+            # only the bars needed for the prediction go through
+            # getFeatures
+            numRows = numDays + dataProcessor.getWarmUp()
+            reqData = resampler.readTail(ticker, dataProcessor.interval,
+                                         numRows)
+            reqData = dataProcessor.getFeatures(reqData)[-numDays:]
 
     context = {"isTrain": False,
                "ticker": ticker}
@@ -311,8 +347,17 @@ def getForecasterPlot(modelLoc, ticker, plotType, numDays, modelType):
     elif modelType == "agent":
         predictions = model.getAllActions(reqData, context)
     if modelType == "forecaster":
-        targetFeature = model.dataProcessor.features[model.dataProcessor.yInd]
-        figure = plot.getForecasterPredictionFigure(ticker, allData,
+        targetFeature = dataProcessor.features[dataProcessor.yInd]
+        if targetFeature.lower() in dataProcessor.OHLCV:
+            plotData = allData
+            targetFeature = dataProcessor.getColumnName(allData,
+                                                        targetFeature)
+        else:
+            # indicator targets are only in the features of the data
+            if allFeatures is None:
+                allFeatures = dataProcessor.getFeatures(allData)
+            plotData = allFeatures
+        figure = plot.getForecasterPredictionFigure(ticker, plotData,
                                                     predictions,
                                                     targetFeature,
                                                     plotType)
@@ -322,6 +367,37 @@ def getForecasterPlot(modelLoc, ticker, plotType, numDays, modelType):
     return figure
 
 
+def getRangePositions(index, start=None, end=None):
+    """Method to get the positions of the bars between two dates
+
+    Parameters
+    ----------
+    index: pandas.DatetimeIndex
+        The dates of the bars
+    start: str, optional
+        The first date to include. If None, starts from the first bar
+    end: str, optional
+        The last date to include. If None, ends with the last bar
+
+    Returns
+    -------
+    first: int
+        The position of the first bar in the range
+    last: int
+        The position after the last bar in the range
+    """
+    def toDate(date):
+        date = pd.Timestamp(date)
+        if date.tz is None and index.tz is not None:
+            date = date.tz_localize(index.tz)
+        return date
+
+    first = 0 if start is None else index.searchsorted(toDate(start))
+    last = len(index) if end is None else \
+        index.searchsorted(toDate(end), side="right")
+    return first, last
+
+
 def getTickerData(ticker, interval):
     """Method to retrieve the latest raw ticker
 
@@ -335,11 +411,7 @@ def getTickerData(ticker, interval):
     df: pandas.DataFrame
         The raw data of the ticker
     """
-    df = pd.read_csv("DataStore/StockData/{}/{}.csv".format(interval.upper(),
-                                                            ticker),
-                     index_col="Date", parse_dates=["Date"])
-    df.sort_index(ascending=True)
-    return df
+    return resampler.read(ticker, interval)
 
 
 def toggleAgentSubscription(modelData):
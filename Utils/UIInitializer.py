@@ -1,4 +1,5 @@
 from DataStore import Indices as Indices
+from Core import Indicators
 import os
 import sys
 import importlib
@@ -212,8 +213,10 @@ def getAllSavedAgents(savePath="DataStore/SavedModels/Agents"):
 
 
 def getAllFeatures():
-    # currently only these are supported
+    # the indicators are listed with their default parameters, other
+    # parameters can be given in the same way, for example sma_50
     features = ["open", "high", "low", "close", "volume"]
+    features.extend(Indicators.getDefaultFeatures())
     return features
 
 
@@ -67,9 +67,11 @@ def getPlot():
     plotType = request.json["plotType"]
     numDays = request.json["numDays"]
     modelType = request.json["type"]
+    start = request.json.get("start")
+    end = request.json.get("end")
     figure = urh.getForecasterPlot(modelLoc, ticker,
                                    plotType, numDays,
-                                   modelType)
+                                   modelType, start, end)
     return figure
 
 
@@ -0,0 +1,87 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+pytest.importorskip("lxml")
+sys.path.append(".")
+from DataStore.APIInterface import YFinance
+from DataStore.TickStore import TickStore
+
+
+def getBars(periods):
+    index = pd.date_range("2024-01-01", periods=periods, freq="D",
+                          name="Date")
+    close = np.arange(100.0, 100.0 + periods)
+    return pd.DataFrame({"Open": close, "High": close + 1,
+                         "Low": close - 1, "Close": close,
+                         "Volume": np.full(periods, 1000.0)}, index=index)
+
+
+class FakeSource(YFinance):
+    """Serves the daily bars of history and records the starts requested"""
+    def __init__(self, history):
+        super().__init__(session=object())
+        self.history = history
+        self.starts = []
+
+    def getIntraDay(self, ticker, start=None):
+        self.starts.append(start)
+        if start is None:
+            return self.history.copy()
+        return self.history[self.history.index >= start].copy()
+
+
+def save(tmp_path, history, saved=None):
+    source = FakeSource(history)
+    store = TickStore(str(tmp_path))
+    if saved is not None:
+        store.write("TEST", "1D", saved)
+    source.saveIntraDay("TEST", savePath=str(tmp_path), overlap=5)
+    return source, store
+
+
+def assertSameBars(data, expected):
+    assert list(data.index) == list(expected.index)
+    np.testing.assert_array_equal(data[expected.columns].values,
+                                  expected.values)
+
+
+def testFirstSaveFetchesEverything(tmp_path):
+    history = getBars(30)
+    source, store = save(tmp_path, history)
+    assert source.starts == [None]
+    assertSameBars(store.read("TEST", "1D"), history)
+
+
+def testNewBarsAreAppended(tmp_path):
+    history = getBars(30)
+    source, store = save(tmp_path, history, history.iloc[:25])
+    # only the last saved bars are fetched again
+    assert source.starts == [str(history.index[20].date())]
+    assert len(store.getSegmentPaths("TEST", "1D")) == 1
+    assertSameBars(store.read("TEST", "1D"), history)
+
+
+def testRevisedLastBarIsReplaced(tmp_path):
+    history = getBars(30)
+    saved = history.iloc[:25].copy()
+    # saved before the session closed
+    saved.iloc[-1, saved.columns.get_loc("Close")] -= 0.5
+    source, store = save(tmp_path, history, saved)
+    assert len(source.starts) == 1
+    assert store.getSegmentPaths("TEST", "1D") == []
+    assertSameBars(store.read("TEST", "1D"), history)
+
+
+def testRevisedHistoryIsFetchedAgain(tmp_path):
+    history = getBars(30)
+    saved = history.iloc[:25]
+    # a split halves every price before it
+    adjusted = history.copy()
+    prices = ["Open", "High", "Low", "Close"]
+    adjusted.loc[adjusted.index[:28], prices] /= 2
+    source, store = save(tmp_path, adjusted, saved)
+    assert source.starts == [str(history.index[20].date()), None]
+    assertSameBars(store.read("TEST", "1D"), adjusted)
@@ -0,0 +1,94 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+from DataStore.FeatureCache import FeatureCache
+
+
+def getBars(periods):
+    index = pd.date_range("2024-01-01", periods=periods, freq="D",
+                          name="Date")
+    close = np.linspace(100.0, 200.0, periods)
+    return pd.DataFrame({"Close": close}, index=index)
+
+
+class Compute():
+    """Computes a 5 bar moving sum and records the bars it was given"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, data):
+        self.calls.append(len(data))
+        return pd.DataFrame({"sum_5": data["Close"].rolling(5).sum()})
+
+
+def getFeatures(cache, data, compute, version=("v1",)):
+    return cache.get("TEST", "1D", {"features": ["sum_5"]}, version, data,
+                     compute, warmUp=5)
+
+
+def testHitDoesNotRewriteMeta(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    compute = Compute()
+    data = getBars(50)
+    first = getFeatures(cache, data, compute)
+    key = cache.getKey("TEST", "1D", {"features": ["sum_5"]})
+    metaPath = cache.getMetaPath(key)
+    os.utime(metaPath, (0, 0))
+    inode = os.stat(metaPath).st_ino
+    second = getFeatures(cache, data, compute)
+    assert compute.calls == [50]
+    assert cache.stats["hits"] == 1
+    np.testing.assert_array_equal(first.values, second.values)
+    assert os.stat(metaPath).st_ino == inode
+    assert os.path.getmtime(metaPath) > 0
+    assert cache.getEntries()[key][1] == os.path.getmtime(metaPath)
+
+
+def testExtendComputesOnlyNewBars(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    compute = Compute()
+    data = getBars(60)
+    getFeatures(cache, data.iloc[:50], compute)
+    features = getFeatures(cache, data, compute, ("v2",))
+    assert cache.stats["extensions"] == 1
+    # the 10 new bars and the warm-up bars before them
+    assert compute.calls == [50, 16]
+    expected = Compute()(data)
+    assert len(features) == 60
+    np.testing.assert_allclose(features.values, expected.values)
+    reloaded = getFeatures(cache, data, compute, ("v2",))
+    assert cache.stats["hits"] == 1
+    np.testing.assert_allclose(reloaded.values, expected.values)
+
+
+def testChangedHistoryIsRecomputed(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    compute = Compute()
+    data = getBars(50)
+    getFeatures(cache, data, compute)
+    changed = data.copy()
+    changed.iloc[10, 0] = 0.0
+    features = getFeatures(cache, changed, compute, ("v2",))
+    assert cache.stats["misses"] == 2
+    np.testing.assert_allclose(features.values, Compute()(changed).values)
+
+
+def testLeastRecentlyUsedIsEvicted(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    compute = Compute()
+    data = getBars(50)
+    specs = [{"features": [name]} for name in ["a", "b", "c"]]
+    for spec in specs[:2]:
+        cache.get("TEST", "1D", spec, ("v1",), data, compute)
+    keys = [cache.getKey("TEST", "1D", spec) for spec in specs]
+    # the first entry is used again, so the second is the oldest
+    cache.get("TEST", "1D", specs[0], ("v1",), data, compute)
+    cache.maxBytes = cache.getStats()["bytes"]
+    cache.get("TEST", "1D", specs[2], ("v1",), data, compute)
+    assert cache.stats["evictions"] == 1
+    assert set(cache.entries) == {keys[0], keys[2]}
+    assert not os.path.exists(cache.getMetaPath(keys[1]))
+    assert cache.getStats()["bytes"] <= cache.maxBytes
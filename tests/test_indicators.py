@@ -0,0 +1,69 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(".")
+from Core import Indicators
+from Core.StreamingIndicators import StreamingFeatures
+
+features = ["ema_12", "ema_26", "ema_1", "rsi_14", "rsi_3", "macd_12_26_9",
+            "macdsignal_12_26_9", "macdhist_12_26_9", "atr_14"]
+
+
+def getBars(numBars=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01 09:15", periods=numBars, freq="1min",
+                          name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, numBars)))
+    spread = np.abs(rng.normal(0, 1e-3, numBars)) * close
+    return pd.DataFrame({"Open": np.roll(close, 1), "High": close + spread,
+                         "Low": close - spread, "Close": close,
+                         "Volume": rng.integers(100, 10000, numBars)},
+                        index=index)
+
+
+@pytest.mark.parametrize("feature", features)
+def testStreamingIsBitForBitEqual(feature):
+    data = getBars()
+    batch = Indicators.computeFeatures(data, [feature])[feature]
+    streamed = StreamingFeatures([feature]).updateFrame(data)[feature]
+    assert np.array_equal(batch, streamed.values, equal_nan=True)
+
+
+def testRecurrenceMatchesLoop():
+    rng = np.random.default_rng(1)
+    inputs = rng.normal(size=5000)
+    for beta in [0.5, 0.9, 0.99, 0.999]:
+        expected = []
+        current = 1.0
+        for value in inputs.tolist():
+            current = beta * current + value
+            expected.append(current)
+        values = Indicators.getRecurrence(inputs, beta, 1.0)
+        scale = np.max(np.abs(expected))
+        assert np.allclose(values, expected, rtol=0, atol=1e-10 * scale)
+
+
+def testStateSaveAndRestore(tmp_path):
+    data = getBars()
+    allFeatures = features + ["sma_20", "bbupper_20_2", "volatility_10",
+                              "returns_5", "vwap", "Close"]
+    expected = StreamingFeatures(allFeatures).updateFrame(data)
+    first = StreamingFeatures(allFeatures)
+    head = first.updateFrame(data.iloc[:1234])
+    path = str(tmp_path / "state.json")
+    first.save(path)
+    second = StreamingFeatures(allFeatures)
+    second.load(path)
+    # the bars that were already processed are skipped
+    tail = second.updateFrame(data.iloc[1000:])
+    assert len(tail) == len(data) - 1234
+    restored = pd.concat([head, tail])
+    assert np.array_equal(expected.values, restored.values, equal_nan=True)
+
+
+def testStateOfOtherFeaturesIsRejected():
+    state = StreamingFeatures(["ema_12"]).getState()
+    with pytest.raises(Exception):
+        StreamingFeatures(["ema_26"]).setState(state)
@@ -0,0 +1,61 @@
+import sys
+import numpy as np
+import pytest
+
+pytest.importorskip("yfinance")
+pytest.importorskip("lxml")
+sys.path.append(".")
+from DataStore import APIInterface, FeatureCache
+from DataStore.APIInterface import ReplaySource, ReplayClock
+from Examples.Processors.BasicProcessors import MultiVarProcessor
+
+features = ["Close", "sma_20", "rsi_14", "ema_12"]
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FeatureCache, "sharedCache", None)
+    source = ReplaySource(clock=ReplayClock("2012-06-01 16:00", speed=0))
+    monkeypatch.setattr(APIInterface, "defaultSource", source)
+    return MultiVarProcessor(["TEST"], features, 30, 5, "Close", "1D",
+                             scaler="zscore")
+
+
+def testTickerDataHasNoWarmUp(processor):
+    data = processor.tickerData["TEST"]
+    assert not data.isna().any().any()
+
+
+def testWindowsHaveNoNaN(processor):
+    train, valid = processor.getTickerWindows("TEST", 0.7)
+    for X, Y in [train, valid]:
+        assert len(X) > 0
+        assert not np.isnan(X).any() and not np.isnan(Y).any()
+
+
+def testWindowsOfRawFeaturesHaveNoNaN(processor):
+    data = processor.getFeatures(processor.resampler.read("TEST", "1D"))
+    X, Y = processor.inputProcessor(data, {"isTrain": True,
+                                           "ticker": "TEST"})
+    assert not np.isnan(X).any() and not np.isnan(Y).any()
+
+
+def testTrainingDataHasNoNaN(processor):
+    pytest.importorskip("tensorflow")
+    trainDS, validDS = processor.getTrainingData(batchSize=256)
+    for dataset in [trainDS, validDS]:
+        for X, Y in dataset:
+            assert not np.isnan(X.numpy()).any()
+            assert not np.isnan(Y.numpy()).any()
+
+
+def testConcurrentLoadsDoNotMix(processor):
+    processor.tickers = ["TEST", "OTHER"]
+    first = processor.loadTickerData(block=False)
+    processor.tickers = ["TEST"]
+    second = processor.loadTickerData(block=False)
+    assert list(second.result()) == ["TEST"]
+    assert list(processor.tickerData) == ["TEST"]
+    assert list(first.result()) == ["TEST", "OTHER"]
+    assert list(processor.tickerData) == ["TEST", "OTHER"]
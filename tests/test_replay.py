@@ -0,0 +1,39 @@
+import sys
+import pytest
+
+pytest.importorskip("yfinance")
+pytest.importorskip("lxml")
+sys.path.append(".")
+from DataStore.APIInterface import ReplaySource, ReplayClock
+
+
+def getSource(start="2020-06-01 16:00"):
+    return ReplaySource(clock=ReplayClock(start, speed=0))
+
+
+def testDailyPrefixIsStableAfterAdvance():
+    source = getSource()
+    before = source.getIntraDay("TEST")
+    source.clock.advance("10D")
+    after = source.getIntraDay("TEST")
+    assert len(after) > len(before)
+    assert after.iloc[:len(before)].equals(before)
+
+
+def testInterDayPrefixIsStableAfterAdvance():
+    source = getSource()
+    before = source.getInterDay("TEST", "15m")
+    source.clock.advance("1D")
+    after = source.getInterDay("TEST", "15m")
+    shared = before.index.intersection(after.index)
+    assert len(shared) > 0
+    assert after.loc[shared].equals(before.loc[shared])
+
+
+def testNoBarsAfterTheClock():
+    source = getSource("2020-06-01 12:00")
+    daily = source.getIntraDay("TEST")
+    assert daily.index[-1].date() < source.clock.now().date()
+    bars = source.getInterDay("TEST", "15m")
+    assert (bars.index + source.getBarLength("15m") <=
+            source.clock.now()).all()
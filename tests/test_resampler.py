@@ -0,0 +1,55 @@
+import sys
+import pandas as pd
+
+sys.path.append(".")
+from DataStore.Resampler import getBarEnds, resampleBars
+
+
+def getBars(start, periods, freq="5min"):
+    index = pd.date_range(start, periods=periods, freq=freq,
+                          tz="Asia/Kolkata", name="Date")
+    values = list(range(1, periods + 1))
+    return pd.DataFrame({"Open": values, "High": values, "Low": values,
+                         "Close": values, "Volume": values}, index=index)
+
+
+def testIncompleteLastBarIsDropped():
+    # 09:15 to 10:20, so the 10:15 bar only has its first 10 minutes
+    data = getBars("2024-01-01 09:15", 14)
+    bars = resampleBars(data, "30M", sourceInterval="5M")
+    assert list(bars.index.strftime("%H:%M")) == ["09:15", "09:45"]
+    assert bars["Close"].iloc[-1] == 12
+
+
+def testCompleteLastBarIsKept():
+    data = getBars("2024-01-01 09:15", 18)
+    bars = resampleBars(data, "30M", sourceInterval="5M")
+    assert list(bars.index.strftime("%H:%M")) == ["09:15", "09:45", "10:15"]
+    assert bars["Volume"].iloc[-1] == sum(range(13, 19))
+
+
+def testIncompleteLastBarIsKeptOnRequest():
+    data = getBars("2024-01-01 09:15", 14)
+    bars = resampleBars(data, "30M", sourceInterval="5M", completeOnly=False)
+    assert len(bars) == 3
+    assert bars["Close"].iloc[-1] == 14
+
+
+def testLastBarEndsAtSessionClose():
+    # the 15:15 hour bar is complete at 15:30, when the session closes
+    data = getBars("2024-01-01 09:15", 75)
+    bars = resampleBars(data, "1H", sourceInterval="5M")
+    assert bars.index[-1].strftime("%H:%M") == "15:15"
+    assert getBarEnds(bars.index[-1:], "1H")[0].strftime("%H:%M") == "15:30"
+
+
+def testDailyBarNeedsTheWholeSession():
+    data = getBars("2024-01-01 09:15", 74)
+    assert len(resampleBars(data, "1D", sourceInterval="5M")) == 0
+    data = getBars("2024-01-01 09:15", 75)
+    assert len(resampleBars(data, "1D", sourceInterval="5M")) == 1
+
+
+def testSourceIntervalIsInferred():
+    data = getBars("2024-01-01 09:15", 14)
+    assert len(resampleBars(data, "30M")) == 2
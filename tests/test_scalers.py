@@ -0,0 +1,60 @@
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(".")
+from Core.Scalers import getScaler
+
+
+def getValues(numRows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-2, numRows)))
+    volume = rng.integers(1000, 100000, numRows).astype(float)
+    return np.stack([close, volume, np.full(numRows, 5.0)], axis=1)
+
+
+@pytest.mark.parametrize("name", ["minmax", "zscore"])
+def testInverseRoundTrip(name):
+    values = getValues()
+    scaler = getScaler(name).fit(values[:150])
+    scaled = scaler.transform(values)
+    for column in range(values.shape[1]):
+        inverted = scaler.inverse(scaled[:, column], column)
+        np.testing.assert_allclose(inverted, values[:, column])
+
+
+@pytest.mark.parametrize("name", ["rolling_20", "expanding"])
+def testRollingInverseRoundTrip(name):
+    values = getValues()
+    scaler = getScaler(name).fit(values)
+    scaled = scaler.transform(values)
+    rows = np.arange(len(values))
+    for column in range(values.shape[1]):
+        inverted = scaler.inverse(scaled[:, column], column, rows)
+        np.testing.assert_allclose(inverted, values[:, column])
+    # without rows, the statistics of the last row are used
+    last = scaler.inverse(scaled[-1:, 0], 0)
+    np.testing.assert_allclose(last, values[-1:, 0])
+
+
+def testLogReturnInverseRoundTrip():
+    values = getValues()
+    scaler = getScaler("logreturn").fit(values)
+    scaled = scaler.transform(values)
+    np.testing.assert_allclose(scaled[0], 0.0)
+    # the returns of the next 3 rows, predicted at each row
+    rows = np.arange(len(values) - 3)
+    ahead = np.stack([scaled[rows + step, 0] for step in [1, 2, 3]], axis=1)
+    inverted = scaler.inverse(ahead, 0, rows)
+    expected = np.stack([values[rows + step, 0] for step in [1, 2, 3]],
+                        axis=1)
+    np.testing.assert_allclose(inverted, expected)
+
+
+def testTransformInPlace():
+    values = getValues()
+    scaler = getScaler("zscore").fit(values)
+    expected = scaler.transform(values)
+    scaled = scaler.transform(values, inPlace=True)
+    assert scaled is values or np.shares_memory(scaled, values)
+    np.testing.assert_array_equal(scaled, expected)
@@ -0,0 +1,105 @@
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+from DataStore.TickStore import TickStore
+
+
+def getBars(start, periods, volume=None):
+    index = pd.date_range(start, periods=periods, freq="D", name="Date")
+    values = np.arange(1, periods + 1, dtype=float)
+    if volume is None:
+        volume = values * 1000
+    return pd.DataFrame({"Open": values, "High": values + 1,
+                         "Low": values - 1, "Close": values,
+                         "Volume": volume}, index=index)
+
+
+def testCompactVolumeIsExact(tmp_path):
+    store = TickStore(str(tmp_path), dtypes=TickStore.COMPACT_DTYPES)
+    volume = [2.0 ** 24 + 1, 2.0 ** 40 + 3, 7.0]
+    store.write("TEST", "1D", getBars("2024-01-01", 3, volume))
+    data = store.read("TEST", "1D")
+    assert data["Volume"].dtype == np.int64
+    assert data["Volume"].tolist() == [2 ** 24 + 1, 2 ** 40 + 3, 7]
+
+
+def testCompactVolumeKeepsMissingValues(tmp_path):
+    store = TickStore(str(tmp_path), dtypes=TickStore.COMPACT_DTYPES)
+    store.write("TEST", "1D", getBars("2024-01-01", 3, [1.0, np.nan, 3.0]))
+    data = store.read("TEST", "1D")
+    assert data["Volume"].iloc[0] == 1 and np.isnan(data["Volume"].iloc[1])
+
+
+def assertSameBars(data, expected):
+    assert list(data.index) == list(expected.index)
+    np.testing.assert_array_equal(data[expected.columns].values,
+                                  expected.values)
+
+
+def testWriteReadRoundTrip(tmp_path):
+    store = TickStore(str(tmp_path))
+    bars = getBars("2024-01-01", 100)
+    store.write("TEST", "1D", bars)
+    assertSameBars(store.read("TEST", "1D"), bars)
+    lastTimestamp = store.getLastTimestamp("TEST", "1D")
+    assert lastTimestamp == bars.index[-1].tz_localize("UTC")
+
+
+def testTimezoneRoundTrip(tmp_path):
+    store = TickStore(str(tmp_path))
+    bars = getBars("2024-01-01", 10).tz_localize("Asia/Kolkata")
+    store.write("TEST", "1D", bars)
+    data = store.read("TEST", "1D")
+    assert str(data.index.tz) == "Asia/Kolkata"
+    assertSameBars(data, bars)
+
+
+def testAppendOnlyWritesNewBars(tmp_path):
+    store = TickStore(str(tmp_path))
+    bars = getBars("2024-01-01", 100)
+    store.write("TEST", "1D", bars.iloc[:60])
+    # the overlapping bars are skipped
+    assert store.append("TEST", "1D", bars.iloc[50:80]) == 20
+    assert store.append("TEST", "1D", bars.iloc[80:]) == 20
+    assert store.append("TEST", "1D", bars.iloc[90:]) == 0
+    assert len(store.getSegmentPaths("TEST", "1D")) == 2
+    assertSameBars(store.read("TEST", "1D"), bars)
+    assertSameBars(store.readTail("TEST", "1D", 30), bars.iloc[-30:])
+    assertSameBars(store.readTail("TEST", "1D", after=bars.index[54]),
+                   bars.iloc[55:])
+
+
+def testCompactMergesSegments(tmp_path):
+    store = TickStore(str(tmp_path))
+    bars = getBars("2024-01-01", 100)
+    store.write("TEST", "1D", bars.iloc[:40])
+    for start in range(40, 100, 20):
+        store.append("TEST", "1D", bars.iloc[start:start + 20])
+    version = store.getVersion("TEST", "1D")
+    store.compact("TEST", "1D")
+    assert store.getSegmentPaths("TEST", "1D") == []
+    assert store.getVersion("TEST", "1D") != version
+    assertSameBars(store.read("TEST", "1D"), bars)
+
+
+def testGetRangeAcrossSegments(tmp_path):
+    # blocks of 16 rows, so the range is found through the block index
+    store = TickStore(str(tmp_path))
+    store.BLOCK_SIZE = 16
+    bars = getBars("2024-01-01", 300)
+    store.write("TEST", "1D", bars.iloc[:200])
+    store.append("TEST", "1D", bars.iloc[200:])
+    start, end = bars.index[37], bars.index[250]
+    assertSameBars(store.getRange("TEST", "1D", start, end),
+                   bars.iloc[37:251])
+    assertSameBars(store.getRange("TEST", "1D", end=bars.index[9]),
+                   bars.iloc[:10])
+    between = bars.index[120] + pd.Timedelta(hours=12)
+    assertSameBars(store.getRange("TEST", "1D", start=between),
+                   bars.iloc[121:])
+    data = store.getRange("TEST", "1D", start, end, columns=["Close"])
+    assert list(data.columns) == ["Close"]
+    assertSameBars(data, bars.iloc[37:251][["Close"]])
+    assert len(store.getRange("TEST", "1D", "2030-01-01")) == 0
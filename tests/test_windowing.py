@@ -0,0 +1,50 @@
+import sys
+import numpy as np
+
+sys.path.append(".")
+from Core.Windowing import getTrainingWindows, getWindows
+
+
+def getValues(numRows=50, numFeatures=3):
+    # each value encodes its row and column
+    return (np.arange(numRows)[:, None] * 10 +
+            np.arange(numFeatures)[None, :]).astype(np.float32)
+
+
+def testWindowShapes():
+    values = getValues()
+    assert getWindows(values, 10).shape == (41, 10, 3)
+    assert getWindows(values, 10, shift=3).shape == (14, 10, 3)
+    assert getWindows(values[:5], 10).shape == (0, 10, 3)
+
+
+def testWindowsAreReadOnlyViews():
+    values = getValues()
+    windows = getWindows(values, 10)
+    assert np.shares_memory(windows, values)
+    assert not windows.flags.writeable
+
+
+def testTargetsFollowTheInputs():
+    values = getValues()
+    X, Y = getTrainingWindows(values, 10, 3, shift=2, target=0)
+    assert X.shape == (19, 10, 3) and Y.shape == (19, 3)
+    for i in range(len(X)):
+        start = i * 2
+        np.testing.assert_array_equal(X[i], values[start:start + 10])
+        np.testing.assert_array_equal(Y[i], values[start + 10:start + 13, 0])
+
+
+def testTargetsOfEveryColumn():
+    values = getValues()
+    X, Y = getTrainingWindows(values, 10, 3)
+    assert Y.shape == (38, 3, 3)
+    np.testing.assert_array_equal(Y[-1], values[-3:])
+
+
+def testSeq2SeqTargetsAreShiftedInputs():
+    values = getValues()
+    X, Y = getTrainingWindows(values, 10, 3, isSeq2Seq=True, target=1)
+    assert X.shape == (38, 10, 3) and Y.shape == (38, 10)
+    for i in range(len(X)):
+        np.testing.assert_array_equal(Y[i], values[i + 3:i + 13, 1])